@@ -1,5 +1,6 @@
 import streamlit as st
 import pandas as pd
+from pandas.api.types import union_categoricals
 import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime, timedelta
@@ -10,6 +11,38 @@ from streamlit_calendar import calendar
 import uuid
 import io
 import base64
+import bisect
+import html
+import functools
+import operator
+from collections import OrderedDict, deque
+import hashlib
+import os
+import re
+import threading
+import time
+import zlib
+import logging
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+try:
+    import resource
+except ImportError:  # Not available on Windows; peak memory is then not reported
+    resource = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.feather as feather
+except ImportError:  # Snapshots and Arrow string kernels are optimisations; run without them
+    pa = pc = feather = None
+
+try:
+    import sqlalchemy as sa
+except ImportError:  # Only needed when a CRM database is configured
+    sa = None
+
+logger = logging.getLogger(__name__)
 
 # Configure page - MUST be first Streamlit command
 st.set_page_config(
@@ -270,6 +303,15 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+# Error reporting
+def report_load_error(message):
+    """Show a loading error on the page, or log it when raised off the script
+    thread (loaders also run in the background refresher)"""
+    if get_script_run_ctx(suppress_warning=True) is None:
+        logger.error(message)
+    else:
+        st.error(message)
+
 # Authentication functions
 def load_auth_config():
     """Load authentication configuration from JSON file"""
@@ -302,6 +344,10 @@ def load_auth_config():
             "google_sheets": {
                 "url": "https://docs.google.com/spreadsheets/d/1LFfNwb9lRQpIosSEvV3O6zIwymUIWeG9L_k7cxw1jQs/export?format=csv",
                 "calendar_sheet": "https://docs.google.com/spreadsheets/d/1LFfNwb9lRQpIosSEvV3O6zIwymUIWeG9L_k7cxw1jQs/export?format=csv&gid=1"
+            },
+            "database": {
+                # e.g. sqlite:///crm.db locally or postgresql://... in production; empty keeps data in memory
+                "url": os.environ.get("CRM_DATABASE_URL", "")
             }
         }
         
@@ -310,7 +356,7 @@ def load_auth_config():
         
         return st.session_state.auth_config
     except Exception as e:
-        st.error(f"Error loading auth config: {e}")
+        report_load_error(f"Error loading auth config: {e}")
         return {}
 
 def authenticate_user(username, password):
@@ -330,8 +376,503 @@ def check_permission(permission):
     user_permissions = st.session_state.user.get("permissions", [])
     return permission in user_permissions
 
+# Named cache regions
+# 'indexes' holds the per-version bitmaps, id and prefix indexes, kept apart
+# from the many per-query masks in 'filters' and the rendered tables in
+# 'renders' so paging or dragging a slider does not evict them
+CACHE_REGIONS = ['crm', 'calendar', 'aggregates', 'indexes', 'filters', 'renders']
+# Clearing a region also clears the regions derived from it
+CACHE_REGION_DEPENDENTS = {'crm': ['aggregates', 'indexes', 'filters', 'renders']}
+CACHE_REGION_MAX_ENTRIES = {'indexes': 32, 'renders': 16}
+CACHE_REGION_DEFAULT_MAX_ENTRIES = 64
+
+@st.cache_resource
+def get_cache_regions():
+    """Process-wide named caches plus the table of computations currently in flight"""
+    return {
+        'lock': threading.Lock(),
+        'entries': {region: OrderedDict() for region in CACHE_REGIONS},
+        # Bumped on every clear so results computed before it are not stored after it
+        'generations': {region: 0 for region in CACHE_REGIONS},
+        'inflight': {},
+        'stats': {region: {'hits': 0, 'misses': 0, 'coalesced': 0, 'invalidations': 0} for region in CACHE_REGIONS}
+    }
+
+def freeze_cache_key(value):
+    """Turn arguments (dicts, lists, sets) into a hashable cache key"""
+    if isinstance(value, dict):
+        return tuple(sorted((key, freeze_cache_key(item)) for key, item in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze_cache_key(item) for item in value)
+    if isinstance(value, (set, frozenset)):
+        return tuple(sorted(freeze_cache_key(item) for item in value))
+    return value
+
+def run_single_flight(key, compute, region=None):
+    """Run compute once per key at a time; concurrent callers wait for the leader and share its result"""
+    regions = get_cache_regions()
+    with regions['lock']:
+        flight = regions['inflight'].get(key)
+        leader = flight is None
+        if leader:
+            flight = {'done': threading.Event(), 'result': None, 'error': None}
+            regions['inflight'][key] = flight
+        elif region is not None:
+            regions['stats'][region]['coalesced'] += 1
+    
+    if not leader:
+        flight['done'].wait()
+        if flight['error'] is not None:
+            raise flight['error']
+        return flight['result']
+    
+    try:
+        flight['result'] = compute()
+    except Exception as e:
+        flight['error'] = e
+        raise
+    finally:
+        with regions['lock']:
+            regions['inflight'].pop(key, None)
+        flight['done'].set()
+    return flight['result']
+
+def cached_in_region(region, key, compute):
+    """Return the cached value for key in a region, computing it (once, however many callers) on a miss"""
+    regions = get_cache_regions()
+    entries = regions['entries'][region]
+    with regions['lock']:
+        if key in entries:
+            entries.move_to_end(key)
+            regions['stats'][region]['hits'] += 1
+            return entries[key]
+        regions['stats'][region]['misses'] += 1
+        generation = regions['generations'][region]
+    
+    value = run_single_flight((region, key), compute, region)
+    
+    with regions['lock']:
+        if regions['generations'][region] == generation:
+            entries[key] = value
+            while len(entries) > CACHE_REGION_MAX_ENTRIES.get(region, CACHE_REGION_DEFAULT_MAX_ENTRIES):
+                entries.popitem(last=False)
+    return value
+
+def peek_region_cache(region, key):
+    """Cached value for key in a region, or None; never computes and does not count as a miss"""
+    regions = get_cache_regions()
+    with regions['lock']:
+        return regions['entries'][region].get(key)
+
+def region_cache(region):
+    """Decorator caching a function's results in a named region, keyed by its arguments"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args):
+            return cached_in_region(region, (func.__name__, freeze_cache_key(args)), lambda: func(*args))
+        wrapper.invalidate = lambda *args: invalidate_cache(region, (func.__name__, freeze_cache_key(args)))
+        return wrapper
+    return decorator
+
+def invalidate_cache(region, key=None):
+    """Drop one cached key, or a whole region together with the regions derived from it"""
+    regions = get_cache_regions()
+    with regions['lock']:
+        if key is not None:
+            regions['entries'][region].pop(key, None)
+            regions['stats'][region]['invalidations'] += 1
+            return
+        
+        for name in [region] + CACHE_REGION_DEPENDENTS.get(region, []):
+            regions['entries'][name].clear()
+            regions['generations'][name] += 1
+            regions['stats'][name]['invalidations'] += 1
+
+def refresh_cache_region(region, force=False):
+    """Clear a region and reload its shared dataset from the source, once for all concurrent callers"""
+    invalidate_cache(region)
+    return refresh_shared_dataset(region, force=force)
+
+def reset_cache_region(region):
+    """Clear a region and unload its shared dataset so the next reader loads it with the current settings"""
+    invalidate_cache(region)
+    drop_shared_dataset(region)
+
+def cache_region_stats():
+    """Entry counts and hit/miss/coalescing counters per cache region"""
+    regions = get_cache_regions()
+    with regions['lock']:
+        return pd.DataFrame([
+            {'Region': region, 'Entries': len(regions['entries'][region]), **regions['stats'][region]}
+            for region in CACHE_REGIONS
+        ])
+
 # Google Sheets data loading
-@st.cache_data(ttl=300)  # Cache for 5 minutes
+CRM_REQUIRED_COLUMNS = [
+    'call_id', 'customer_name', 'voice_agent_name', 'call_date',
+    'call_duration_seconds', 'customer_satisfaction', 'call_category',
+    'call_outcome', 'revenue_impact', 'transcript', 'call_summary'
+]
+# Value used for a required column the source does not have ('N/A' otherwise; call_date defaults to today)
+CRM_COLUMN_DEFAULTS = {'customer_satisfaction': 0, 'revenue_impact': 0, 'call_duration_seconds': 0}
+
+# Compact in-memory schema: low-cardinality labels become categoricals, Yes/No
+# flags become real booleans and scores are downcast. Money columns stay float64.
+CRM_CATEGORICAL_COLUMNS = [
+    'call_category', 'customer_tier', 'call_outcome', 'voice_agent_name',
+    'emotion_detected', 'call_complexity', 'language_detected', 'intent_detected',
+    'next_best_action', 'competitor_mentioned', 'assigned_rep', 'decision_timeline'
+]
+CRM_BOOLEAN_COLUMNS = [
+    'call_success', 'escalation_required', 'follow_up_required', 'appointment_scheduled'
+]
+CRM_FLOAT32_COLUMNS = [
+    'customer_satisfaction', 'sentiment_score', 'confidence_score', 'silence_percentage',
+    'ai_accuracy_score', 'agent_performance_score', 'lead_quality_score', 'conversion_probability'
+]
+CRM_INT32_COLUMNS = [
+    'call_duration_seconds', 'resolution_time_seconds', 'summary_word_count',
+    'speech_rate_wpm', 'interruption_count'
+]
+
+# Force a full download every N delta syncs so in-place edits to old rows are picked up
+SHEET_FULL_RESYNC_INTERVAL = 12
+# Bytes re-requested before the last known end of the sheet to confirm it only grew
+SHEET_RANGE_OVERLAP = 256
+
+# Rows parsed per chunk when ingesting large CSV exports
+CRM_INGEST_CHUNK_ROWS = 100_000
+
+def prepare_crm_frame(df):
+    """Fill in missing required columns and coerce types on raw sheet rows"""
+    missing = {col: CRM_COLUMN_DEFAULTS.get(col, 'N/A') for col in CRM_REQUIRED_COLUMNS if col not in df.columns}
+    if 'call_date' in missing:
+        missing['call_date'] = datetime.now().strftime('%Y-%m-%d')
+    if missing:
+        df = df.assign(**missing)
+    
+    # Convert date columns
+    df['call_date'] = pd.to_datetime(df['call_date'])
+    
+    return compact_crm_frame(df)
+
+def peak_rss_mb():
+    """Peak resident memory of this process in MB, or None where it cannot be measured"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and in kilobytes elsewhere
+    return peak / 1e6 if os.uname().sysname == 'Darwin' else peak / 1e3
+
+def ingest_crm_csv(source, chunksize=CRM_INGEST_CHUNK_ROWS):
+    """Ingest a (possibly multi-GB) CSV export chunk by chunk into the compact schema
+    
+    Only one raw chunk is held at a time: each is repaired, coerced and has its
+    text fields moved to the transcript store before the next is parsed, and
+    only its compact columns are kept. Columns are then combined one at a
+    time, so peak memory stays near the size of the result rather than twice it.
+    Returns the combined frame and a dict of ingest stats.
+    """
+    started = time.perf_counter()
+    pieces, chunks = {}, 0
+    reader = pd.read_csv(
+        source,
+        chunksize=chunksize,
+        # Label columns are parsed straight into categoricals rather than via object strings
+        dtype={col: 'category' for col in CRM_CATEGORICAL_COLUMNS}
+    )
+    with reader:
+        for chunk in reader:
+            for col, values in prepare_crm_frame(chunk).items():
+                pieces.setdefault(col, []).append(values)
+            chunks += 1
+    
+    df = combine_crm_column_pieces(pieces) if chunks else prepare_crm_frame(pd.DataFrame(columns=CRM_REQUIRED_COLUMNS))
+    seconds = time.perf_counter() - started
+    stats = {
+        'rows': len(df),
+        'chunks': chunks,
+        'seconds': seconds,
+        'rows_per_second': len(df) / seconds if seconds > 0 else None,
+        'memory_mb': df.memory_usage(deep=True).sum() / 1e6,
+        'peak_rss_mb': peak_rss_mb()
+    }
+    return df, stats
+
+def combine_crm_column_pieces(pieces):
+    """One CRM frame from {column: [chunk values, ...]}, consuming the pieces
+    
+    Each column's pieces are dropped as soon as the column is combined;
+    categoricals are unioned so they stay categorical.
+    """
+    columns = {}
+    for col in list(pieces):
+        values = pieces.pop(col)
+        if all(isinstance(piece.dtype, pd.CategoricalDtype) for piece in values):
+            columns[col] = pd.Series(union_categoricals(values, ignore_order=True), name=col)
+        else:
+            columns[col] = pd.concat(values, ignore_index=True)
+        del values
+    return normalize_crm_dtypes(pd.concat(columns, axis=1))
+
+def to_flag(values):
+    """Convert Yes/No style values (a scalar or a Series) to booleans"""
+    if isinstance(values, pd.Series):
+        if pd.api.types.is_bool_dtype(values):
+            return values.astype(bool)
+        return values.astype(str).str.strip().str.lower().isin(['yes', 'y', 'true', '1'])
+    return str(values).strip().lower() in ('yes', 'y', 'true', '1')
+
+def normalize_crm_dtypes(df):
+    """Convert CRM columns to their compact dtypes (categoricals, booleans, float32/int32)"""
+    for col in CRM_CATEGORICAL_COLUMNS + TEXT_KEY_COLUMNS:
+        if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype('category')
+    
+    for col in CRM_BOOLEAN_COLUMNS:
+        if col in df.columns and not pd.api.types.is_bool_dtype(df[col]):
+            df[col] = to_flag(df[col])
+    
+    for col in CRM_FLOAT32_COLUMNS:
+        if col in df.columns and df[col].dtype != np.float32:
+            df[col] = pd.to_numeric(df[col], errors='coerce').astype(np.float32)
+    
+    for col in CRM_INT32_COLUMNS:
+        if col in df.columns and df[col].dtype != np.int32:
+            values = pd.to_numeric(df[col], errors='coerce')
+            # Only downcast when every value is a whole number that fits
+            fits = (
+                values.notna().all()
+                and (values % 1 == 0).all()
+                and values.between(np.iinfo(np.int32).min, np.iinfo(np.int32).max).all()
+            )
+            df[col] = values.astype(np.int32 if fits else np.float32)
+    
+    return df
+
+def concat_crm_frames(frames):
+    """Concatenate CRM frames without losing the compact dtypes
+    
+    Categorical columns are given one shared set of categories first, since
+    pandas falls back to object dtype when concatenating mismatched categoricals.
+    """
+    frames = [extract_text_columns(frame) for frame in frames if frame is not None]
+    categorical_columns = CRM_CATEGORICAL_COLUMNS + TEXT_KEY_COLUMNS + [
+        col for frame in frames for col in frame.columns
+        if isinstance(frame[col].dtype, pd.CategoricalDtype) and col not in CRM_CATEGORICAL_COLUMNS + TEXT_KEY_COLUMNS
+    ]
+    
+    for col in dict.fromkeys(categorical_columns):
+        present = [frame[col] for frame in frames if col in frame.columns]
+        if len(present) < 2:
+            continue
+        
+        categories = pd.Index([])
+        for values in present:
+            labels = values.cat.categories if isinstance(values.dtype, pd.CategoricalDtype) else pd.Index(values.dropna().unique())
+            categories = categories.append(labels.difference(categories))
+        dtype = pd.CategoricalDtype(categories)
+        frames = [frame.assign(**{col: frame[col].astype(dtype)}) if col in frame.columns else frame for frame in frames]
+    
+    # Columns missing from some frames come back as object; re-apply the schema
+    return normalize_crm_dtypes(pd.concat(frames, ignore_index=True))
+
+def compact_crm_frame(df):
+    """Apply the compact schema and move long text fields into the transcript store"""
+    return extract_text_columns(normalize_crm_dtypes(df))
+
+def set_crm_values(df, rows, updates):
+    """Assign values (scalars or row-aligned Series) into a CRM frame, keeping its compact dtypes
+    
+    Text fields held in the transcript store are written there and only their key is set.
+    """
+    for col, value in updates.items():
+        if col in TEXT_STORE_COLUMNS and f"{col}_key" in df.columns:
+            col = f"{col}_key"
+            if isinstance(value, pd.Series):
+                value = pd.Series(put_texts(value), index=value.index)
+            else:
+                value = put_texts(pd.Series([value]))[0]
+        
+        if col in CRM_BOOLEAN_COLUMNS:
+            value = to_flag(value)
+        elif col in df.columns and isinstance(df[col].dtype, pd.CategoricalDtype):
+            labels = pd.unique(value.dropna()) if isinstance(value, pd.Series) else [value]
+            missing = [label for label in labels if not pd.isna(label) and label not in df[col].cat.categories]
+            if missing:
+                df[col] = df[col].cat.add_categories(missing)
+            if isinstance(value, pd.Series):
+                value = value.astype(object)
+        elif col in df.columns and pd.api.types.is_float_dtype(df[col].dtype):
+            if isinstance(value, pd.Series):
+                value = pd.to_numeric(value, errors='coerce').astype(df[col].dtype)
+            else:
+                value = df[col].dtype.type(np.nan if pd.isna(value) else value)
+
+        df.loc[rows, col] = value
+    return df
+
+def crm_memory_report(df):
+    """Per-column memory of the compact frame compared with plain object/64-bit columns"""
+    rows = []
+    for col in df.columns:
+        values = df[col]
+        if isinstance(values.dtype, pd.CategoricalDtype) or pd.api.types.is_bool_dtype(values):
+            baseline = values.astype(object)
+            if pd.api.types.is_bool_dtype(values):
+                baseline = baseline.map({True: 'Yes', False: 'No'})
+        elif values.dtype == np.float32:
+            baseline = values.astype(np.float64)
+        elif values.dtype == np.int32:
+            baseline = values.astype(np.int64)
+        else:
+            baseline = values
+        
+        rows.append({
+            'Column': col,
+            'Dtype': str(values.dtype),
+            'Bytes': int(values.memory_usage(index=False, deep=True)),
+            'Uncompacted Bytes': int(baseline.memory_usage(index=False, deep=True))
+        })
+    
+    report = pd.DataFrame(rows)
+    report['Saving %'] = (1 - report['Bytes'] / report['Uncompacted Bytes'].where(report['Uncompacted Bytes'] > 0)).mul(100).round(1)
+    return report.sort_values('Uncompacted Bytes', ascending=False, ignore_index=True)
+
+@st.cache_resource
+def get_sheet_sync_state():
+    """Process-wide delta sync state for CSV sheets, keyed by sheet URL"""
+    return {}
+
+def _sheet_fingerprints(raw):
+    """Hash every raw sheet row, indexed by call_id"""
+    hashes = pd.util.hash_pandas_object(raw, index=False).to_numpy()
+    return pd.Series(hashes, index=raw['call_id'].to_numpy())
+
+def _merge_sheet_rows(state, raw, appended_only):
+    """Merge freshly parsed sheet rows into the previously synced frame
+    
+    Rows whose fingerprint is unchanged are reused from the last sync as-is; only
+    new or changed rows go through prepare_crm_frame. For a full download the
+    sheet order is kept and rows missing from the sheet are dropped; for an
+    appended byte range the new rows replace any earlier rows with the same call_id.
+    """
+    old_df = state.get('df')
+    old_fp = state.get('fingerprints')
+    
+    # Without stable, unique call_ids we cannot diff rows, so prepare everything
+    if 'call_id' not in raw.columns or raw['call_id'].isna().any() or raw['call_id'].duplicated().any():
+        state['fingerprints'] = None
+        if appended_only and old_df is not None:
+            return concat_crm_frames([old_df, prepare_crm_frame(raw)])
+        return prepare_crm_frame(raw)
+    
+    new_fp = _sheet_fingerprints(raw)
+    
+    if old_df is None or old_fp is None:
+        state['fingerprints'] = new_fp
+        return prepare_crm_frame(raw)
+    
+    if appended_only:
+        kept = old_df[~old_df['call_id'].isin(raw['call_id'])]
+        state['fingerprints'] = pd.concat([old_fp[~old_fp.index.isin(new_fp.index)], new_fp])
+        return concat_crm_frames([kept, prepare_crm_frame(raw)])
+    
+    unchanged = raw['call_id'].map(old_fp).to_numpy() == new_fp.to_numpy()
+    old_positions = pd.Index(old_df['call_id']).get_indexer(raw['call_id'][unchanged])
+    fresh = prepare_crm_frame(raw[~unchanged].reset_index(drop=True))
+    merged = concat_crm_frames([old_df.iloc[old_positions], fresh])
+    
+    # Restore the sheet's own row order
+    order = np.concatenate([np.flatnonzero(unchanged), np.flatnonzero(~unchanged)])
+    merged = merged.iloc[np.argsort(order, kind='stable')].reset_index(drop=True)
+    
+    state['fingerprints'] = new_fp
+    return merged
+
+def sync_sheet_delta(sheets_url, sync_state, http=requests, timeout=30):
+    """Bring the synced copy of a CSV sheet up to date and return it
+    
+    The stored ETag/Last-Modified validators are sent so an unchanged sheet costs
+    a 304. When the server honours Range requests only the bytes past the last
+    known end are fetched and parsed; otherwise the full CSV is parsed but only
+    rows whose fingerprint changed are re-prepared. Any other answer (such as a
+    416 after the sheet shrank) falls back to a full download in the same call.
+    The synced frame is kept sorted by call_date, like the shared store.
+    """
+    state = sync_state.setdefault(sheets_url, {'lock': threading.Lock()})
+    
+    with state['lock']:
+        headers = {}
+        if state.get('df') is not None:
+            if state.get('etag'):
+                headers['If-None-Match'] = state['etag']
+            if state.get('last_modified'):
+                headers['If-Modified-Since'] = state['last_modified']
+        
+        use_range = (
+            state.get('df') is not None
+            and state.get('accepts_ranges')
+            and state.get('syncs_since_full', 0) < SHEET_FULL_RESYNC_INTERVAL
+        )
+        if use_range:
+            headers['Range'] = f"bytes={max(state['length'] - len(state['tail']), 0)}-"
+        
+        response = http.get(sheets_url, headers=headers, timeout=timeout)
+        
+        if response.status_code == 304:
+            state['syncs_since_full'] = state.get('syncs_since_full', 0) + 1
+            return state['df']
+        
+        if response.status_code == 206:
+            body = response.content
+            # The overlap must match what we saw last time, otherwise the sheet was rewritten
+            if body.startswith(state['tail']):
+                new_bytes = body[len(state['tail']):]
+                if new_bytes.strip():
+                    raw = pd.read_csv(io.BytesIO(state['header'] + new_bytes))
+                    state['df'] = sort_crm_by_date(_merge_sheet_rows(state, raw, appended_only=True))
+                state['length'] += len(new_bytes)
+                state['tail'] = body[-SHEET_RANGE_OVERLAP:]
+                state['etag'] = response.headers.get('ETag')
+                state['last_modified'] = response.headers.get('Last-Modified')
+                state['syncs_since_full'] = state.get('syncs_since_full', 0) + 1
+                return state['df']
+        
+        if response.status_code != 200 and headers:
+            # A rewritten overlap, a 416 because the sheet shrank below the saved
+            # offset, or any other answer: forget the validators and range state
+            # so a failed refetch cannot wedge later syncs, and fetch it all
+            for key in ('etag', 'last_modified', 'accepts_ranges'):
+                state.pop(key, None)
+            response = http.get(sheets_url, timeout=timeout)
+        
+        response.raise_for_status()
+        body = response.content
+        raw = pd.read_csv(io.BytesIO(body))
+        state['df'] = sort_crm_by_date(_merge_sheet_rows(state, raw, appended_only=False))
+        state['header'] = body.split(b'\n', 1)[0] + b'\n'
+        state['length'] = len(body)
+        state['tail'] = body[-SHEET_RANGE_OVERLAP:]
+        state['etag'] = response.headers.get('ETag')
+        state['last_modified'] = response.headers.get('Last-Modified')
+        state['accepts_ranges'] = response.headers.get('Accept-Ranges', '').lower() == 'bytes'
+        state['syncs_since_full'] = 0
+        return state['df']
+
+def fetch_crm_from_sheets(sheets_url):
+    """Delta-sync the CRM sheet and snapshot it if it changed (no Streamlit calls, safe off the UI thread)"""
+    sync_state = get_sheet_sync_state()
+    previous = sync_state.get(sheets_url, {}).get('df')
+    df = sync_sheet_delta(sheets_url, sync_state)
+    
+    # Keep a columnar copy of the last good dataset for fast cold starts
+    if df is not previous:
+        write_crm_snapshot(df, source=sheets_url)
+    
+    return df
+
+@region_cache('crm')
 def load_data_from_google_sheets():
     """Load CRM data from Google Sheets"""
     try:
@@ -342,38 +883,478 @@ def load_data_from_google_sheets():
             # Fallback to sample data
             return create_comprehensive_sample_data()
         
-        # Load data from Google Sheets
-        df = pd.read_csv(sheets_url)
-        
-        # Ensure required columns exist
-        required_columns = [
-            'call_id', 'customer_name', 'voice_agent_name', 'call_date',
-            'call_duration_seconds', 'customer_satisfaction', 'call_category',
-            'call_outcome', 'revenue_impact', 'transcript', 'call_summary'
-        ]
-        
-        for col in required_columns:
-            if col not in df.columns:
-                if col == 'call_date':
-                    df[col] = datetime.now().strftime('%Y-%m-%d')
-                elif col in ['customer_satisfaction', 'revenue_impact', 'call_duration_seconds']:
-                    df[col] = 0
-                else:
-                    df[col] = 'N/A'
-        
-        # Convert date columns
-        df['call_date'] = pd.to_datetime(df['call_date'])
-        
-        return df
+        # Load data from Google Sheets, transferring and preparing only what changed
+        return fetch_crm_from_sheets(sheets_url)
         
     except Exception as e:
-        st.error(f"Error loading data from Google Sheets: {e}")
+        report_load_error(f"Error loading data from Google Sheets: {e}")
         return create_comprehensive_sample_data()
 
-def create_comprehensive_sample_data():
-    """Create comprehensive sample data with all features"""
-    sample_transcripts = [
-        """Agent: Hello! Thank you for calling TechCorp. My name is AI Agent Emma. How can I assist you today?
+# Transcript store
+TEXT_STORE_COLUMNS = ['transcript', 'call_summary']
+TEXT_KEY_COLUMNS = [f"{col}_key" for col in TEXT_STORE_COLUMNS]
+TEXT_STORE_DIR = os.environ.get("CRM_TEXT_STORE_DIR", os.path.join(".crm_cache", "texts"))
+
+@st.cache_resource
+def get_text_store(path=TEXT_STORE_DIR):
+    """Process-wide content-addressed store for transcripts and call summaries
+    
+    Each distinct text is zlib-compressed and appended once to a blob file; the
+    in-memory index only maps its content hash to an offset and length.
+    """
+    store = {'lock': threading.Lock(), 'index': {}, 'blobs': None}
+    
+    try:
+        os.makedirs(path, exist_ok=True)
+        blob_path = os.path.join(path, "blobs.bin")
+        index_path = os.path.join(path, "index.txt")
+        blob_size = os.path.getsize(blob_path) if os.path.exists(blob_path) else 0
+        
+        if os.path.exists(index_path):
+            with open(index_path) as index_file:
+                for line in index_file:
+                    parts = line.split()
+                    # Skip entries whose blob never made it to disk
+                    if len(parts) == 3 and int(parts[1]) + int(parts[2]) <= blob_size:
+                        store['index'][parts[0]] = (int(parts[1]), int(parts[2]))
+        
+        store['blob_file'] = open(blob_path, "a+b")
+        store['index_file'] = open(index_path, "a")
+    except OSError:
+        # No writable disk: keep the compressed blobs in memory instead
+        store['blobs'] = {}
+    
+    return store
+
+def text_key(text):
+    """Content hash used as the key of a stored text"""
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=12).hexdigest()
+
+def put_texts(values):
+    """Store a Series of texts and return their keys as a categorical (None for missing)"""
+    store = get_text_store()
+    codes, uniques = pd.factorize(values)
+    keys = []
+    
+    with store['lock']:
+        for text in uniques:
+            text = str(text)
+            key = text_key(text)
+            keys.append(key)
+            
+            if store['blobs'] is not None:
+                store['blobs'].setdefault(key, zlib.compress(text.encode('utf-8')))
+            elif key not in store['index']:
+                blob = zlib.compress(text.encode('utf-8'))
+                offset = store['blob_file'].seek(0, os.SEEK_END)
+                store['blob_file'].write(blob)
+                store['blob_file'].flush()
+                # The index line is written after the blob so a crash never leaves a dangling key
+                store['index_file'].write(f"{key} {offset} {len(blob)}\n")
+                store['index_file'].flush()
+                store['index'][key] = (offset, len(blob))
+    
+    # Missing values have code -1, which picks the trailing None
+    return pd.Categorical(np.array(keys + [None], dtype=object)[codes])
+
+@functools.lru_cache(maxsize=512)
+def _inflate_text(key):
+    store = get_text_store()
+    if store['blobs'] is not None:
+        blob = store['blobs'].get(key)
+    elif key in store['index']:
+        offset, length = store['index'][key]
+        blob = os.pread(store['blob_file'].fileno(), length, offset)
+    else:
+        blob = None
+    return zlib.decompress(blob).decode('utf-8') if blob is not None else None
+
+def get_text(key):
+    """Fetch a stored text by key, or None"""
+    if key is None or pd.isna(key):
+        return None
+    return _inflate_text(key)
+
+def extract_text_columns(df):
+    """Replace long text columns with keys into the transcript store"""
+    for col in TEXT_STORE_COLUMNS:
+        if col in df.columns:
+            df = df.assign(**{col: put_texts(df[col])}).rename(columns={col: f"{col}_key"})
+    return df
+
+def hydrate_text_columns(df, columns=None):
+    """Swap transcript store keys back for their texts (only call this on the rows you show)"""
+    for col in TEXT_STORE_COLUMNS:
+        key_col = f"{col}_key"
+        if key_col in df.columns and (columns is None or col in columns):
+            keys = df[key_col].astype(object)
+            # Inflate each distinct text once
+            texts = {key: get_text(key) for key in pd.unique(keys.dropna())}
+            df = df.assign(**{key_col: keys.map(texts)}).rename(columns={key_col: col})
+    return df
+
+def crm_frame_to_sheet_format(df):
+    """Convert a compact CRM frame back to the sheet's layout (texts inline, Yes/No flags)"""
+    df = hydrate_text_columns(df)
+    flags = {col: np.where(df[col], "Yes", "No") for col in CRM_BOOLEAN_COLUMNS if col in df.columns}
+    return df.assign(**flags)
+
+def crm_column_names(df):
+    """Column names as users see them, with store keys shown as their text fields"""
+    return [col[:-len("_key")] if col in TEXT_KEY_COLUMNS else col for col in df.columns]
+
+def select_crm_columns(df, columns):
+    """Select user-facing columns, loading stored texts only for the selected rows"""
+    source_columns = [f"{col}_key" if f"{col}_key" in df.columns else col for col in columns]
+    return hydrate_text_columns(df[source_columns], columns)
+
+# Full-text search index
+CRM_SEARCH_COLUMNS = ['transcript', 'call_summary', 'keyword_tags', 'pain_points']
+SEARCH_TOKEN_PATTERN = re.compile(r"\w+")
+# Clauses of the search language: optional '-', optional 'field:', then a "quoted phrase" or a bare word
+SEARCH_CLAUSE_PATTERN = re.compile(r'(-?)(?:(\w+):)?(?:"([^"]*)"?|(\S+))')
+# BM25 parameters (term frequency saturation and length normalisation)
+BM25_K1 = 1.2
+BM25_B = 0.75
+# Frames whose column codes are kept around (one per data version in use)
+SEARCH_FRAME_CACHE_SIZE = 4
+
+def tokenize_text(text):
+    """Lower-cased word tokens of a text (empty for missing values)"""
+    if text is None or (not isinstance(text, str) and pd.isna(text)):
+        return []
+    return SEARCH_TOKEN_PATTERN.findall(str(text).lower())
+
+@st.cache_resource
+def get_search_index():
+    """Process-wide inverted index over the distinct values of the searchable columns
+    
+    Postings map a term to the values (text store keys for transcripts and
+    summaries, the strings themselves otherwise) it occurs in, per column, with
+    its frequency there. Each distinct value is tokenized once, so the index
+    only grows with new texts.
+    """
+    return {
+        'lock': threading.Lock(),
+        'postings': {},
+        'lengths': {col: {} for col in CRM_SEARCH_COLUMNS},
+        # Sorted vocabulary for prefix lookups, rebuilt lazily after new terms arrive
+        'sorted_terms': [],
+        'terms_dirty': False,
+        # Column codes of recently searched frames, keyed by the caller's frame key
+        'frames': OrderedDict()
+    }
+
+def search_value_column(df, col):
+    """Column holding a searchable field's values (the text key column for stored texts)"""
+    key_col = f"{col}_key"
+    if key_col in df.columns:
+        return key_col
+    return col if col in df.columns else None
+
+def search_value_text(col, value):
+    """Text of a distinct search value (inflated from the transcript store for stored columns)"""
+    return get_text(value) if col in TEXT_STORE_COLUMNS else value
+
+def index_search_values(col, values):
+    """Add any not-yet-indexed distinct values of a search column to the inverted index"""
+    index = get_search_index()
+    with index['lock']:
+        new_values = [value for value in pd.unique(pd.Series(values).dropna()) if value not in index['lengths'][col]]
+    
+    # Tokenize outside the lock; stored texts are inflated once here
+    tokenized = []
+    for value in new_values:
+        tokens = tokenize_text(search_value_text(col, value))
+        tokenized.append((value, len(tokens), pd.Series(tokens, dtype=object).value_counts().to_dict() if tokens else {}))
+    
+    with index['lock']:
+        for value, length, frequencies in tokenized:
+            index['lengths'][col][value] = length
+            for term, frequency in frequencies.items():
+                by_column = index['postings'].get(term)
+                if by_column is None:
+                    by_column = index['postings'][term] = {}
+                    index['terms_dirty'] = True
+                by_column.setdefault(col, {})[value] = frequency
+
+def search_frame_codes(df, frame_key, col):
+    """(codes, distinct values) of a column for a frame, computed once per frame key
+    
+    Search columns also get the row count and token length of each distinct
+    value, which is what BM25 needs, and are indexed on first use.
+    """
+    index = get_search_index()
+    with index['lock']:
+        frame = index['frames'].get(frame_key)
+        if frame is None or frame['rows'] != len(df):
+            frame = {'rows': len(df), 'columns': {}}
+            index['frames'][frame_key] = frame
+            while len(index['frames']) > SEARCH_FRAME_CACHE_SIZE:
+                index['frames'].popitem(last=False)
+        index['frames'].move_to_end(frame_key)
+        if col in frame['columns']:
+            return frame['columns'][col]
+    
+    value_col = search_value_column(df, col) if col in CRM_SEARCH_COLUMNS else col
+    values = df[value_col]
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        codes, uniques = values.cat.codes.to_numpy(), values.cat.categories
+    else:
+        codes, uniques = pd.factorize(values)
+        uniques = pd.Index(uniques)
+    entry = {'codes': codes, 'uniques': uniques}
+    
+    if col in CRM_SEARCH_COLUMNS:
+        index_search_values(col, uniques)
+        with index['lock']:
+            lengths = index['lengths'][col]
+            entry['lengths'] = np.array([lengths.get(value, 0) for value in uniques], dtype=np.float64)
+        entry['counts'] = np.bincount(codes[codes >= 0], minlength=len(uniques))
+        entry['avg_length'] = max((entry['lengths'] * entry['counts']).sum() / max(len(df), 1), 1.0)
+    
+    with index['lock']:
+        frame['columns'][col] = entry
+    return entry
+
+def lookup_search_term(term, prefix=False):
+    """{column: {value: frequency}} for a term (or, with prefix, every term starting with it)"""
+    index = get_search_index()
+    with index['lock']:
+        if not prefix:
+            return {col: dict(values) for col, values in index['postings'].get(term, {}).items()}
+        
+        if index['terms_dirty']:
+            index['sorted_terms'] = sorted(index['postings'])
+            index['terms_dirty'] = False
+        terms = index['sorted_terms']
+        
+        matches = {}
+        position = bisect.bisect_left(terms, term)
+        while position < len(terms) and terms[position].startswith(term):
+            for col, values in index['postings'][terms[position]].items():
+                merged = matches.setdefault(col, {})
+                for value, frequency in values.items():
+                    merged[value] = merged.get(value, 0) + frequency
+            position += 1
+        return matches
+
+def parse_search_query(query):
+    """Parse the search language into AND-ed groups of OR-ed clauses
+    
+    Supports bare words (matched as word prefixes), "quoted phrases",
+    field:value and field:"phrase" scoping, -clause / NOT clause exclusion and
+    the AND / OR operators; OR binds tighter than the implicit AND.
+    """
+    groups, negate_next, join_next = [], False, False
+    for match in SEARCH_CLAUSE_PATTERN.finditer(query or ""):
+        minus, field, phrase, word = match.groups()
+        if field is None and not minus and word in ("AND", "OR", "NOT"):
+            if word == "NOT":
+                negate_next = True
+            join_next = word == "OR"
+            continue
+        
+        text = phrase if phrase is not None else word
+        clause = {
+            'negate': bool(minus) or negate_next,
+            'field': field,
+            'phrase': phrase is not None,
+            'text': text,
+            'words': tokenize_text(text)
+        }
+        negate_next = False
+        if not clause['words'] and field is None:
+            continue
+        
+        if join_next and groups:
+            groups[-1].append(clause)
+        else:
+            groups.append([clause])
+        join_next = False
+    return groups
+
+def _phrase_pattern(words):
+    return re.compile(r"\b" + r"\W+".join(re.escape(word) for word in words) + r"\b", re.IGNORECASE)
+
+def _score_text_clause(df, frame_key, clause, columns):
+    """Row mask and summed per-field BM25 scores of a word or phrase clause"""
+    mask = np.zeros(len(df), dtype=bool)
+    scores = np.zeros(len(df), dtype=np.float64)
+    for col in columns:
+        if search_value_column(df, col) is None:
+            continue
+        entry = search_frame_codes(df, frame_key, col)
+        codes, uniques = entry['codes'], entry['uniques']
+        valid = codes >= 0
+        field_hits = np.ones(len(uniques), dtype=bool)
+        field_scores = np.zeros(len(uniques), dtype=np.float64)
+        
+        for position, word in enumerate(clause['words']):
+            # Bare words match as prefixes (search-as-you-type); phrase words match exactly
+            postings = lookup_search_term(word, prefix=not clause['phrase'] and position == len(clause['words']) - 1)
+            values = postings.get(col, {})
+            locations = uniques.get_indexer(list(values))
+            found = locations >= 0
+            locations = locations[found]
+            frequencies = np.fromiter(values.values(), dtype=np.float64, count=len(values))[found]
+            
+            word_hits = np.zeros(len(uniques), dtype=bool)
+            word_hits[locations] = True
+            field_hits &= word_hits
+            
+            documents = entry['counts'][locations].sum()
+            idf = np.log(1 + (len(df) - documents + 0.5) / (documents + 0.5))
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * entry['lengths'][locations] / entry['avg_length'])
+            field_scores[locations] += idf * frequencies * (BM25_K1 + 1) / (frequencies + norm)
+        
+        if clause['phrase'] and len(clause['words']) > 1:
+            # Word hits are only candidates; confirm the words appear in order
+            pattern = _phrase_pattern(clause['words'])
+            for location in np.flatnonzero(field_hits):
+                if not pattern.search(search_value_text(col, uniques[location]) or ""):
+                    field_hits[location] = False
+        
+        field_scores[~field_hits] = 0.0
+        mask |= valid & field_hits[codes]
+        scores += np.where(valid, field_scores[codes], 0.0)
+    return mask, scores
+
+def _match_field_clause(df, frame_key, clause):
+    """Row mask of a field:value clause on a non-search column (case-insensitive containment)"""
+    entry = search_frame_codes(df, frame_key, clause['field'])
+    codes, uniques = entry['codes'], entry['uniques']
+    if pd.api.types.is_bool_dtype(uniques):
+        hits = np.asarray(uniques == to_flag(clause['text']))
+    else:
+        hits = np.asarray(uniques.astype(str).str.lower().str.contains(clause['text'].lower(), regex=False), dtype=bool)
+    return (codes >= 0) & hits[codes]
+
+def evaluate_search_query(df, query, frame_key):
+    """Row mask and BM25 relevance scores of a search query over a CRM frame
+    
+    frame_key identifies the frame (e.g. its data version) so column codes are
+    computed once per frame rather than once per query.
+    """
+    mask = np.ones(len(df), dtype=bool)
+    scores = np.zeros(len(df), dtype=np.float64)
+    for group in parse_search_query(query):
+        group_mask = np.zeros(len(df), dtype=bool)
+        for clause in group:
+            field = clause['field']
+            if field in CRM_SEARCH_COLUMNS:
+                clause_mask, clause_scores = _score_text_clause(df, frame_key, clause, [field])
+            elif field is not None and field in df.columns:
+                clause_mask, clause_scores = _match_field_clause(df, frame_key, clause), 0.0
+            else:
+                clause_mask, clause_scores = _score_text_clause(df, frame_key, clause, CRM_SEARCH_COLUMNS)
+            
+            if clause['negate']:
+                group_mask |= ~clause_mask
+            else:
+                group_mask |= clause_mask
+                scores += clause_scores
+        mask &= group_mask
+    return mask, np.where(mask, scores, 0.0)
+
+def search_crm_mask(df, query, frame_key):
+    """Boolean row mask of a CRM frame matching a search query"""
+    return evaluate_search_query(df, query, frame_key)[0]
+
+def top_k_positions(scores, k):
+    """Positions of the k highest scores in descending order, without sorting every score"""
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.array([], dtype=np.int64)
+    # Everything above the k-th best score, then the earliest rows tied with it,
+    # so equal scores keep their original order and pages never overlap
+    kth = -np.partition(-scores, k - 1)[k - 1]
+    above = np.flatnonzero(scores > kth)
+    ties = np.flatnonzero(scores == kth)[:k - len(above)]
+    top = np.concatenate([above, ties])
+    return top[np.lexsort((top, -scores[top]))]
+
+def search_snippet(text, query, width=220):
+    """HTML-escaped excerpt around the first query match with the matched words highlighted
+    
+    With width=None the whole text is returned highlighted.
+    """
+    if not text:
+        return ""
+    words = [word for group in parse_search_query(query) for clause in group if not clause['negate'] for word in clause['words']]
+    if not words:
+        return html.escape(text[:width] if width is not None else text)
+    pattern = re.compile(r"\b(" + "|".join(re.escape(word) for word in sorted(set(words), key=len, reverse=True)) + r")\w*", re.IGNORECASE)
+    
+    if width is None:
+        start, width = 0, len(text)
+    else:
+        first = pattern.search(text)
+        start = max((first.start() if first else 0) - width // 3, 0)
+    excerpt = text[start:start + width]
+    snippet = pattern.sub(lambda match: f"\x00{match.group(0)}\x01", excerpt)
+    snippet = html.escape(snippet).replace("\x00", "<mark>").replace("\x01", "</mark>")
+    return ("…" if start > 0 else "") + snippet + ("…" if start + width < len(text) else "")
+
+# Columnar snapshot cache
+CRM_SNAPSHOT_PATH = os.environ.get("CRM_SNAPSHOT_PATH", os.path.join(".crm_cache", "crm_snapshot.arrow"))
+
+def write_crm_snapshot(df, path=CRM_SNAPSHOT_PATH, source=None):
+    """Persist the CRM frame as an uncompressed Arrow (Feather v2) file that can be memory-mapped
+    
+    The source it was loaded from (the sheet URL) is recorded in the file's metadata.
+    """
+    if feather is None:
+        return False
+    
+    try:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        table = pa.Table.from_pandas(df.reset_index(drop=True), preserve_index=False)
+        if source is not None:
+            table = table.replace_schema_metadata({**(table.schema.metadata or {}), b'crm_source': source.encode()})
+        feather.write_feather(table, tmp_path, compression="uncompressed")
+        # Readers only ever see a complete file
+        os.replace(tmp_path, path)
+        return True
+    except Exception:
+        # A missing snapshot only costs the next cold start a network fetch
+        return False
+
+def read_crm_snapshot(path=CRM_SNAPSHOT_PATH, source=None):
+    """Memory-map the last CRM snapshot, or return None if there is none
+    
+    Given a source, a snapshot recorded from any other source is ignored.
+    """
+    if feather is None or not os.path.exists(path):
+        return None
+    
+    try:
+        table = feather.read_table(path, memory_map=True)
+        if source is not None and (table.schema.metadata or {}).get(b'crm_source') != source.encode():
+            return None
+        return table.to_pandas(split_blocks=True, self_destruct=True)
+    except Exception:
+        return None
+
+def load_crm_data_for_startup():
+    """Serve the on-disk snapshot of the configured sheet immediately and refresh it from the sheet in the background"""
+    sheets_url = load_auth_config().get("google_sheets", {}).get("url", "")
+    snapshot = read_crm_snapshot(source=sheets_url) if sheets_url else None
+    if snapshot is None:
+        return load_data_from_google_sheets()
+    
+    # Runs once the snapshot is in the store (the store lock is held while we load)
+    threading.Thread(
+        target=refresh_shared_dataset,
+        args=('crm', get_shared_data_store()),
+        daemon=True
+    ).start()
+    
+    return snapshot
+
+SAMPLE_TRANSCRIPTS = [
+    """Agent: Hello! Thank you for calling TechCorp. My name is AI Agent Emma. How can I assist you today?
 Customer: Hi Emma! I'm Sarah Johnson from Marketing Solutions Inc. I've been hearing great things about your new enterprise software suite, and I'm really interested in learning more about how it could help streamline our marketing operations.
 Agent: That's wonderful to hear, Sarah! I'd be happy to tell you more about our enterprise marketing suite. It's designed specifically for companies like yours that need to manage complex marketing campaigns across multiple channels. Can you tell me a bit about your current challenges?
 Customer: Well, we're currently using three different platforms for email marketing, social media management, and analytics reporting. It's becoming really difficult to get a unified view of our campaign performance, and our team is spending way too much time switching between systems.
@@ -384,8 +1365,8 @@ Customer: Tuesday at 2 PM works perfectly! This is so exciting - I think this co
 Agent: Excellent! I'll send you a calendar invitation and some preparatory materials. Is there anything else I can help you with today?
 Customer: No, that covers everything. Thank you so much, Emma!
 Agent: You're very welcome, Sarah! Have a great day and we look forward to showing you our platform next Tuesday!""",
-        
-        """Agent: Good morning! This is AI Agent Alex from TechCorp Support. I see you're calling about a login issue. Can I get your account information?
+    
+    """Agent: Good morning! This is AI Agent Alex from TechCorp Support. I see you're calling about a login issue. Can I get your account information?
 Customer: Hi Alex, yes I'm Mike Chen. I can't seem to access my account - it keeps saying my password is incorrect, but I'm sure I'm entering it right.
 Agent: I understand how frustrating that can be, Mike. Let me pull up your account. I can see your last successful login was yesterday at 3:47 PM. It looks like there might have been a recent password reset requirement due to our security update. 
 Customer: Oh, I didn't get any email about that.
@@ -398,8 +1379,8 @@ Customer: Okay, I've reset it and... yes! I'm able to log in now. Thank you so m
 Agent: You're very welcome, Mike! Is there anything else I can help you with today?
 Customer: No, that was it. You've been incredibly helpful!
 Agent: Perfect! Have a great day, and don't hesitate to reach out if you need any other assistance.""",
-        
-        """Agent: Hello! This is AI Agent Sophia from TechCorp Billing. I see you have a question about your recent charges?
+    
+    """Agent: Hello! This is AI Agent Sophia from TechCorp Billing. I see you have a question about your recent charges?
 Customer: Hi Sophia. Yes, I'm Emma Davis, and I noticed an unexpected charge on my account for a premium upgrade, but I don't remember authorizing that.
 Agent: I completely understand your concern, Emma. Let me look into that right away. I can see the charge you're referring to - it's for $89.99 on January 10th for our Premium Analytics package. 
 Customer: Right, but I never signed up for that.
@@ -410,100 +1391,166 @@ Customer: That would be great, thank you.
 Agent: Done! You should see the credit on your account within 2-3 business days. I've also enabled email and SMS alerts for usage thresholds. Is there anything else I can help clarify about your billing?
 Customer: No, that covers it. Thank you for resolving this so quickly.
 Agent: You're very welcome, Emma! We appreciate your business and want to make sure you have the best experience possible."""
-    ]
-    
-    # Generate comprehensive sample data
-    data = []
-    for i in range(50):  # Generate 50 sample records
-        call_id = f"CALL_{str(i+1).zfill(3)}"
-        customers = ["Sarah Johnson", "Mike Chen", "Emma Davis", "John Smith", "Lisa Wang", "David Brown", "Maria Garcia", "James Wilson", "Anna Lee", "Robert Taylor"]
-        agents = ["AI Agent Emma", "AI Agent Alex", "AI Agent Sophia", "AI Agent Marcus", "AI Agent Luna"]
-        categories = ["Sales", "Support", "Billing", "Technical", "Follow-up"]
-        outcomes = ["Demo_Scheduled", "Issue_Resolved", "Follow_up_Required", "Sale_Closed", "Escalated"]
-        tiers = ["Premium", "Standard", "Basic"]
-        
-        customer_name = np.random.choice(customers)
-        agent_name = np.random.choice(agents)
-        category = np.random.choice(categories)
-        outcome = np.random.choice(outcomes)
-        tier = np.random.choice(tiers)
-        
-        # Generate realistic metrics based on category
-        if category == "Sales":
-            satisfaction = np.random.uniform(7.5, 9.5)
-            revenue = np.random.uniform(1000, 50000) if outcome == "Sale_Closed" else np.random.uniform(0, 5000)
-            duration = np.random.randint(120, 600)
-        elif category == "Support":
-            satisfaction = np.random.uniform(8.0, 9.8)
-            revenue = 0
-            duration = np.random.randint(60, 300)
-        else:
-            satisfaction = np.random.uniform(6.5, 9.0)
-            revenue = np.random.uniform(0, 1000)
-            duration = np.random.randint(30, 180)
-        
-        record = {
-            "call_id": call_id,
-            "customer_name": customer_name,
-            "voice_agent_name": agent_name,
-            "call_date": (datetime.now() - timedelta(days=np.random.randint(0, 30))).strftime('%Y-%m-%d'),
-            "call_start_time": f"{np.random.randint(9, 17):02d}:{np.random.randint(0, 59):02d}:00",
-            "call_end_time": f"{np.random.randint(9, 17):02d}:{np.random.randint(0, 59):02d}:00",
-            "call_duration_seconds": duration,
-            "call_duration_hms": f"00:{duration//60:02d}:{duration%60:02d}",
-            "cost": round(duration * 0.05, 2),
-            "call_success": np.random.choice(["Yes", "No"], p=[0.85, 0.15]),
-            "appointment_scheduled": np.random.choice(["Yes", "No"], p=[0.3, 0.7]),
-            "intent_detected": f"{category}_Inquiry",
-            "sentiment_score": np.random.uniform(0.6, 0.95),
-            "confidence_score": np.random.uniform(0.8, 0.98),
-            "keyword_tags": f"{category.lower()}, customer service, resolution, support",
-            "summary_word_count": np.random.randint(20, 50),
-            "customer_satisfaction": round(satisfaction, 1),
-            "resolution_time_seconds": np.random.randint(30, duration),
-            "escalation_required": np.random.choice(["Yes", "No"], p=[0.1, 0.9]),
-            "language_detected": "English",
-            "emotion_detected": np.random.choice(["Satisfied", "Neutral", "Frustrated", "Excited"]),
-            "speech_rate_wpm": np.random.randint(120, 180),
-            "silence_percentage": np.random.uniform(5, 20),
-            "interruption_count": np.random.randint(0, 5),
-            "ai_accuracy_score": np.random.uniform(0.85, 0.98),
-            "follow_up_required": np.random.choice(["Yes", "No"], p=[0.4, 0.6]),
-            "customer_tier": tier,
-            "call_complexity": np.random.choice(["Low", "Medium", "High"], p=[0.5, 0.3, 0.2]),
-            "agent_performance_score": np.random.uniform(8.0, 9.5),
-            "call_outcome": outcome,
-            "revenue_impact": round(revenue, 2),
-            "lead_quality_score": np.random.uniform(6.0, 9.5),
-            "conversion_probability": np.random.uniform(0.1, 0.9),
-            "next_best_action": np.random.choice(["Follow_up", "Send_Materials", "Schedule_Demo", "Close_Deal"]),
-            "customer_lifetime_value": np.random.randint(5000, 100000),
-            "call_category": category,
-            "transcript": sample_transcripts[i % len(sample_transcripts)],
-            "call_summary": f"Customer {customer_name} contacted regarding {category.lower()} matter. {outcome.replace('_', ' ').lower()} with satisfaction score of {satisfaction:.1f}.",
-            "customer_phone": f"+1-555-{np.random.randint(1000, 9999)}",
-            "customer_email": f"{customer_name.lower().replace(' ', '.')}@email.com",
-            "call_recording_url": f"https://recordings.techcorp.com/{call_id.lower()}.mp3",
-            "follow_up_date": (datetime.now() + timedelta(days=np.random.randint(1, 14))).strftime('%Y-%m-%d') if np.random.choice([True, False]) else None,
-            "assigned_rep": np.random.choice(["Jessica Martinez", "Tom Anderson", "Sarah Kim", "Mike Johnson"]),
-            "deal_size_estimate": np.random.randint(1000, 100000) if category == "Sales" else 0,
-            "competitor_mentioned": np.random.choice(["None", "CompetitorA", "CompetitorB", "CompetitorC"], p=[0.7, 0.1, 0.1, 0.1]),
-            "pain_points": f"Current challenges with {category.lower()} processes and system integration",
-            "budget_mentioned": f"${np.random.randint(10, 200)}k annual" if category == "Sales" else "N/A",
-            "decision_timeline": np.random.choice(["Q1 2024", "Q2 2024", "Q3 2024", "Immediate", "N/A"]),
-            "technical_requirements": f"{category} automation, reporting, integration capabilities"
-        }
-        
-        data.append(record)
-    
-    df = pd.DataFrame(data)
-    df['call_date'] = pd.to_datetime(df['call_date'])
-    df['follow_up_date'] = pd.to_datetime(df['follow_up_date'])
-    
-    return df
+]
+
+SAMPLE_CUSTOMERS = ["Sarah Johnson", "Mike Chen", "Emma Davis", "John Smith", "Lisa Wang", "David Brown", "Maria Garcia", "James Wilson", "Anna Lee", "Robert Taylor"]
+SAMPLE_AGENTS = ["AI Agent Emma", "AI Agent Alex", "AI Agent Sophia", "AI Agent Marcus", "AI Agent Luna"]
+SAMPLE_CATEGORIES = ["Sales", "Support", "Billing", "Technical", "Follow-up"]
+SAMPLE_OUTCOMES = ["Demo_Scheduled", "Issue_Resolved", "Follow_up_Required", "Sale_Closed", "Escalated"]
+SAMPLE_TIERS = ["Premium", "Standard", "Basic"]
+
+def _sample_labels(rng, labels, n, p=None):
+    """Draw n categorical labels in one vectorized call"""
+    codes = rng.choice(len(labels), size=n, p=p)
+    return pd.Categorical.from_codes(codes, categories=labels)
+
+def _sample_clock_labels(hours, minutes):
+    """Categorical HH:MM:00 labels built from a small lookup table instead of per-row formatting"""
+    labels = [f"{h:02d}:{m:02d}:00" for h in range(24) for m in range(60)]
+    return pd.Categorical.from_codes(hours * 60 + minutes, categories=labels)
+
+def _sample_numbered_labels(prefix, numbers, suffix=""):
+    """prefix + number (zero-padded to 3 digits) + suffix for every number, built
+    with string kernels instead of per-row formatting"""
+    if pc is not None:
+        digits = pc.utf8_lpad(pa.array(numbers).cast(pa.string()), 3, "0")
+        return pc.binary_join_element_wise(prefix, digits, suffix, "").to_pandas()
+    return pd.Series(np.char.add(np.char.add(prefix, np.char.zfill(numbers.astype(str), 3)), suffix))
+
+def generate_sample_chunk(rng, start, n_records):
+    """Generate n_records compact CRM rows numbered from start, fully vectorized
+    
+    Follows the same per-category distributions as the original per-row
+    generator, but draws every field for the whole chunk in one call.
+    """
+    n = n_records
+    now = datetime.now()
+    today = pd.Timestamp(now.date())
+    
+    customer_codes = rng.integers(0, len(SAMPLE_CUSTOMERS), n)
+    category_codes = rng.integers(0, len(SAMPLE_CATEGORIES), n)
+    outcome_codes = rng.integers(0, len(SAMPLE_OUTCOMES), n)
+    category = np.array(SAMPLE_CATEGORIES)[category_codes]
+    is_sales = category == "Sales"
+    is_support = category == "Support"
+    sale_closed = np.array(SAMPLE_OUTCOMES)[outcome_codes] == "Sale_Closed"
+    
+    # Category-conditional metrics
+    satisfaction_low = np.select([is_sales, is_support], [7.5, 8.0], 6.5)
+    satisfaction_high = np.select([is_sales, is_support], [9.5, 9.8], 9.0)
+    satisfaction = np.round(satisfaction_low + (satisfaction_high - satisfaction_low) * rng.random(n), 1)
+    
+    revenue_high = np.select([is_sales & sale_closed, is_sales, is_support], [50000, 5000, 0], 1000)
+    revenue_low = np.where(is_sales & sale_closed, 1000, 0)
+    revenue = np.round(revenue_low + (revenue_high - revenue_low) * rng.random(n), 2)
+    
+    duration = rng.integers(
+        np.select([is_sales, is_support], [120, 60], 30),
+        np.select([is_sales, is_support], [600, 300], 180)
+    ).astype(np.int32)
+    
+    call_numbers = np.arange(start + 1, start + n + 1)
+    call_id = _sample_numbered_labels("CALL_", call_numbers)
+    recording_url = _sample_numbered_labels("https://recordings.techcorp.com/call_", call_numbers, ".mp3")
+    
+    follow_up_days = rng.integers(1, 14, n)
+    follow_up_date = (today + pd.to_timedelta(follow_up_days, unit="D")).where(rng.random(n) < 0.5)
+    
+    # Summaries only vary with customer, category, outcome and rounded satisfaction,
+    # so each distinct combination is formatted and stored once
+    n_categories, n_outcomes = len(SAMPLE_CATEGORIES), len(SAMPLE_OUTCOMES)
+    combo_codes = ((customer_codes * n_categories + category_codes) * n_outcomes + outcome_codes) * 1000 + np.rint(satisfaction * 10).astype(np.int64)
+    summary_index, summary_combos = pd.factorize(combo_codes)
+    summary_texts = pd.Series([
+        f"Customer {SAMPLE_CUSTOMERS[code // 1000 // n_outcomes // n_categories]} contacted regarding "
+        f"{SAMPLE_CATEGORIES[code // 1000 // n_outcomes % n_categories].lower()} matter. "
+        f"{SAMPLE_OUTCOMES[code // 1000 % n_outcomes].replace('_', ' ').lower()} with satisfaction score of {code % 1000 / 10:.1f}."
+        for code in summary_combos
+    ])
+    summary_keys = put_texts(summary_texts)
+    transcript_keys = put_texts(pd.Series(SAMPLE_TRANSCRIPTS))
+    
+    budget_k = rng.integers(10, 200, n)
+    budget_labels = [f"${k}k annual" for k in range(10, 200)] + ["N/A"]
+    phone_numbers = rng.integers(1000, 9999, n)
+    
+    df = pd.DataFrame({
+        "call_id": call_id,
+        "customer_name": pd.Categorical.from_codes(customer_codes, categories=SAMPLE_CUSTOMERS),
+        "voice_agent_name": _sample_labels(rng, SAMPLE_AGENTS, n),
+        "call_date": today - pd.to_timedelta(rng.integers(0, 30, n), unit="D"),
+        "call_start_time": _sample_clock_labels(rng.integers(9, 17, n), rng.integers(0, 59, n)),
+        "call_end_time": _sample_clock_labels(rng.integers(9, 17, n), rng.integers(0, 59, n)),
+        "call_duration_seconds": duration,
+        "call_duration_hms": pd.Categorical.from_codes(duration, categories=[f"00:{d // 60:02d}:{d % 60:02d}" for d in range(600)]),
+        "cost": np.round(duration * 0.05, 2),
+        "call_success": rng.random(n) < 0.85,
+        "appointment_scheduled": rng.random(n) < 0.3,
+        "intent_detected": pd.Categorical.from_codes(category_codes, categories=[f"{c}_Inquiry" for c in SAMPLE_CATEGORIES]),
+        "sentiment_score": rng.uniform(0.6, 0.95, n).astype(np.float32),
+        "confidence_score": rng.uniform(0.8, 0.98, n).astype(np.float32),
+        "keyword_tags": pd.Categorical.from_codes(category_codes, categories=[f"{c.lower()}, customer service, resolution, support" for c in SAMPLE_CATEGORIES]),
+        "summary_word_count": rng.integers(20, 50, n).astype(np.int32),
+        "customer_satisfaction": satisfaction.astype(np.float32),
+        "resolution_time_seconds": rng.integers(30, np.maximum(duration, 31)).astype(np.int32),
+        "escalation_required": rng.random(n) < 0.1,
+        "language_detected": pd.Categorical.from_codes(np.zeros(n, dtype=np.int8), categories=["English"]),
+        "emotion_detected": _sample_labels(rng, ["Satisfied", "Neutral", "Frustrated", "Excited"], n),
+        "speech_rate_wpm": rng.integers(120, 180, n).astype(np.int32),
+        "silence_percentage": rng.uniform(5, 20, n).astype(np.float32),
+        "interruption_count": rng.integers(0, 5, n).astype(np.int32),
+        "ai_accuracy_score": rng.uniform(0.85, 0.98, n).astype(np.float32),
+        "follow_up_required": rng.random(n) < 0.4,
+        "customer_tier": _sample_labels(rng, SAMPLE_TIERS, n),
+        "call_complexity": _sample_labels(rng, ["Low", "Medium", "High"], n, p=[0.5, 0.3, 0.2]),
+        "agent_performance_score": rng.uniform(8.0, 9.5, n).astype(np.float32),
+        "call_outcome": pd.Categorical.from_codes(outcome_codes, categories=SAMPLE_OUTCOMES),
+        "revenue_impact": revenue,
+        "lead_quality_score": rng.uniform(6.0, 9.5, n).astype(np.float32),
+        "conversion_probability": rng.uniform(0.1, 0.9, n).astype(np.float32),
+        "next_best_action": _sample_labels(rng, ["Follow_up", "Send_Materials", "Schedule_Demo", "Close_Deal"], n),
+        "customer_lifetime_value": rng.integers(5000, 100000, n),
+        "call_category": pd.Categorical.from_codes(category_codes, categories=SAMPLE_CATEGORIES),
+        "transcript_key": transcript_keys[(call_numbers - 1) % len(SAMPLE_TRANSCRIPTS)],
+        "call_summary_key": summary_keys[summary_index],
+        "customer_phone": pd.Categorical.from_codes(phone_numbers - 1000, categories=[f"+1-555-{k}" for k in range(1000, 9999)]),
+        "customer_email": pd.Categorical.from_codes(customer_codes, categories=[f"{c.lower().replace(' ', '.')}@email.com" for c in SAMPLE_CUSTOMERS]),
+        "call_recording_url": recording_url,
+        "follow_up_date": follow_up_date,
+        "assigned_rep": _sample_labels(rng, ["Jessica Martinez", "Tom Anderson", "Sarah Kim", "Mike Johnson"], n),
+        "deal_size_estimate": np.where(is_sales, rng.integers(1000, 100000, n), 0),
+        "competitor_mentioned": _sample_labels(rng, ["None", "CompetitorA", "CompetitorB", "CompetitorC"], n, p=[0.7, 0.1, 0.1, 0.1]),
+        "pain_points": pd.Categorical.from_codes(category_codes, categories=[f"Current challenges with {c.lower()} processes and system integration" for c in SAMPLE_CATEGORIES]),
+        "budget_mentioned": pd.Categorical.from_codes(np.where(is_sales, budget_k - 10, len(budget_labels) - 1), categories=budget_labels),
+        "decision_timeline": _sample_labels(rng, ["Q1 2024", "Q2 2024", "Q3 2024", "Immediate", "N/A"], n),
+        "technical_requirements": pd.Categorical.from_codes(category_codes, categories=[f"{c} automation, reporting, integration capabilities" for c in SAMPLE_CATEGORIES])
+    })
+    
+    return compact_crm_frame(df)
+
+def iter_sample_data_chunks(n_records, chunk_size=1_000_000, seed=None):
+    """Yield seeded synthetic CRM data in chunks of at most chunk_size rows"""
+    rng = np.random.default_rng(seed)
+    for start in range(0, n_records, chunk_size):
+        yield generate_sample_chunk(rng, start, min(chunk_size, n_records - start))
+
+def create_comprehensive_sample_data(n_records=50, seed=None):
+    """Create comprehensive sample data with all features
+    
+    Vectorized and seeded, so it doubles as the load fixture for profiling:
+    create_comprehensive_sample_data(1_000_000, seed=7) is reproducible.
+    """
+    chunks = list(iter_sample_data_chunks(n_records, seed=seed))
+    return chunks[0] if len(chunks) == 1 else concat_crm_frames(chunks)
+
+def write_sample_data(path, n_records, chunk_size=1_000_000, seed=None):
+    """Stream synthetic CRM data to a CSV in the sheet's format, one chunk at a time"""
+    for i, chunk in enumerate(iter_sample_data_chunks(n_records, chunk_size, seed)):
+        crm_frame_to_sheet_format(chunk).to_csv(path, mode="w" if i == 0 else "a", header=i == 0, index=False)
+    return path
 
 # Calendar data functions
-@st.cache_data(ttl=300)
+@region_cache('calendar')
 def load_calendar_events():
     """Load calendar events from Google Sheets or create sample data"""
     try:
@@ -511,7 +1558,7 @@ def load_calendar_events():
         calendar_url = auth_config.get("google_sheets", {}).get("calendar_sheet", "")
         
         if calendar_url:
-            df = pd.read_csv(calendar_url)
+            df = fetch_calendar_events(calendar_url)
         else:
             # Sample calendar data
             events = []
@@ -545,77 +1592,2115 @@ def load_calendar_events():
         
         return df
     except Exception as e:
-        st.error(f"Error loading calendar events: {e}")
+        report_load_error(f"Error loading calendar events: {e}")
         return pd.DataFrame()
 
+def fetch_calendar_events(calendar_url):
+    """Download the calendar sheet (no Streamlit calls, safe off the UI thread)"""
+    return pd.read_csv(calendar_url)
+
+def get_calendar_events():
+    """Return the shared calendar events frame (read-only)"""
+    calendar_url = load_auth_config().get("google_sheets", {}).get("calendar_sheet", "")
+    refresh = functools.partial(fetch_calendar_events, calendar_url) if calendar_url else None
+    return get_shared_dataset('calendar', load_calendar_events, refresh)[1]
+
 def save_calendar_event(event_data):
     """Save calendar event (in real app, this would update Google Sheets)"""
-    if 'calendar_events' not in st.session_state:
-        st.session_state.calendar_events = load_calendar_events()
-    
-    # Add new event to session state
+    # Add new event to the shared store
     new_event = pd.DataFrame([event_data])
-    st.session_state.calendar_events = pd.concat([st.session_state.calendar_events, new_event], ignore_index=True)
+    update_shared_dataset(
+        'calendar',
+        lambda events: pd.concat([events, new_event], ignore_index=True),
+        load_calendar_events
+    )
     
     return True
 
 def update_calendar_event(event_id, updated_data):
     """Update existing calendar event"""
-    if 'calendar_events' not in st.session_state:
-        st.session_state.calendar_events = load_calendar_events()
+    def apply_update(events):
+        events = events.copy()
+        mask = events['id'] == event_id
+        for key, value in updated_data.items():
+            events.loc[mask, key] = value
+        return events
     
-    # Update event in session state
-    mask = st.session_state.calendar_events['id'] == event_id
-    for key, value in updated_data.items():
-        st.session_state.calendar_events.loc[mask, key] = value
+    # Update event in the shared store
+    update_shared_dataset('calendar', apply_update, load_calendar_events)
     
     return True
 
 def delete_calendar_event(event_id):
     """Delete calendar event"""
-    if 'calendar_events' not in st.session_state:
-        st.session_state.calendar_events = load_calendar_events()
+    # Remove event from the shared store
+    update_shared_dataset(
+        'calendar',
+        lambda events: events[events['id'] != event_id],
+        load_calendar_events
+    )
+    
+    return True
+
+# Shared data store
+# Datasets are considered expired this long after they were last loaded from their source
+SHARED_DATASET_TTL_SECONDS = 300
+# Reload once this fraction of the TTL has passed, so readers never wait on an expired copy
+SHARED_REFRESH_AHEAD = 0.8
+SHARED_REFRESH_RETRY_SECONDS = 30
+# Writes remembered per dataset in its change journal
+SHARED_JOURNAL_MAX_ENTRIES = 200
+SHARED_REFRESH_POLL_SECONDS = 5
+
+@st.cache_resource
+def get_shared_data_store():
+    """Process-wide, versioned store holding one copy of each dataset for all sessions"""
+    store = {'lock': threading.RLock(), 'datasets': {}}
+    threading.Thread(target=run_shared_refresher, args=(store,), daemon=True, name="shared-data-refresher").start()
+    return store
+
+def run_shared_refresher(store):
+    """Background loop that reloads datasets ahead of expiry"""
+    while True:
+        time.sleep(SHARED_REFRESH_POLL_SECONDS)
+        for name, entry in list(store['datasets'].items()):
+            if time.time() >= entry['meta']['next_refresh_at']:
+                refresh_shared_dataset(name, store)
+
+def refresh_shared_dataset(name, store=None, force=False):
+    """Reload a dataset from its source and swap the new version in atomically
+    
+    Readers keep being served the current frame while the fetch runs, and
+    concurrent refreshes of the same dataset share one fetch. Edits made in the
+    app that the source does not have are replayed onto the fresh copy (see
+    unsaved_shared_edits), unless force is set, which discards them.
+    """
+    store = store if store is not None else get_shared_data_store()
+    return run_single_flight(('refresh', name), lambda: _refresh_shared_dataset(name, store, force))
+
+def _refresh_shared_dataset(name, store, force):
+    with store['lock']:
+        entry = store['datasets'].get(name)
+        if entry is None or entry['meta']['refresh'] is None:
+            return False
+        meta = entry['meta']
+        unsaved = [] if force else unsaved_shared_edits(meta)
+        if unsaved is None:
+            # Edits are on their way to the source; a download now could predate them
+            meta['status'] = "waiting for write-back"
+            meta['next_refresh_at'] = time.time() + SHARED_REFRESH_RETRY_SECONDS
+            return False
+        fetched_version = entry['version']
+        meta['refreshing'] = True
+    
+    started = time.perf_counter()
+    try:
+        df = meta['refresh']()
+        # The source does not have these edits: redo them on its fresh copy
+        for edit in unsaved:
+            df = edit['replay'](df)
+        error = None
+    except Exception as e:
+        df, error = None, e
+    
+    with store['lock']:
+        meta['refreshing'] = False
+        meta['last_refresh_seconds'] = time.perf_counter() - started
+        meta['last_refresh_at'] = time.time()
+        if error is not None:
+            # Keep serving the last good copy and try again soon
+            meta['errors'] += 1
+            meta['status'] = f"failed: {error}"
+            meta['next_refresh_at'] = time.time() + SHARED_REFRESH_RETRY_SECONDS
+            return False
+        
+        meta['refreshes'] += 1
+        meta['next_refresh_at'] = time.time() + SHARED_DATASET_TTL_SECONDS * SHARED_REFRESH_AHEAD
+        current = store['datasets'][name]
+        if not force and current['version'] != fetched_version:
+            # Written to during the fetch: the replayed edits miss that write, try again soon
+            meta['status'] = "kept in-app edits"
+            meta['next_refresh_at'] = time.time() + SHARED_REFRESH_RETRY_SECONDS
+            return True
+        if force:
+            meta['unsaved'] = []
+        if df is current['df']:
+            # Source unchanged: the copy is fresh again but caches keyed on the version stay valid
+            store['datasets'][name] = dict(current, loaded_at=time.time())
+            meta['status'] = "unchanged"
+        else:
+            publish_shared_dataset(name, df, dirty=False, store=store)
+            meta['status'] = "updated, in-app edits replayed" if unsaved else "updated"
+    return True
+
+def unsaved_shared_edits(meta):
+    """Edits made to a shared dataset in the app that its source does not have
+    
+    Edits written back to the source the dataset is refreshed from count as
+    saved once the write-back pipeline has flushed them and are forgotten.
+    The rest (edits written back elsewhere, or kept only in memory like the
+    calendar's) are returned for replay. None while a write to the source is
+    still queued.
+    """
+    if any(edit['write_seq'] is not None for edit in meta['unsaved']):
+        flushed_seq = get_write_back_pipeline()['flushed_seq']
+        meta['unsaved'] = [edit for edit in meta['unsaved'] if edit['write_seq'] is None or edit['write_seq'] > flushed_seq]
+        if any(edit['write_seq'] is not None for edit in meta['unsaved']):
+            return None
+    return list(meta['unsaved'])
+
+def get_shared_dataset(name, loader, refresh=None):
+    """Return (version, frame) for a shared dataset, loading it on first use
+    
+    Frames handed out by the store are shared between sessions and must be
+    treated as read-only; edits go through update_shared_dataset. If a refresh
+    function is given, the background refresher reloads the dataset with it.
+    
+    The load runs outside the store lock (concurrent first readers share one
+    load), so a slow source never holds up the other datasets.
+    """
+    store = get_shared_data_store()
+    entry = store['datasets'].get(name)
+    if entry is None:
+        df = run_single_flight(('load', name), loader)
+        with store['lock']:
+            entry = store['datasets'].get(name)
+            if entry is None:
+                entry = store['datasets'][name] = new_shared_entry(df, refresh)
+    if refresh is not None:
+        entry['meta']['refresh'] = refresh
+    return entry['version'], entry['df']
+
+def new_shared_entry(df, refresh=None):
+    """Store entry holding the first version of a dataset"""
+    return {
+        'version': 1,
+        'df': df,
+        'loaded_at': time.time(),
+        'meta': {
+            'refresh': refresh,
+            'refreshing': False,
+            'next_refresh_at': time.time() + SHARED_DATASET_TTL_SECONDS * SHARED_REFRESH_AHEAD,
+            'last_refresh_at': None,
+            'last_refresh_seconds': None,
+            'refreshes': 0,
+            'errors': 0,
+            'journal': deque(maxlen=SHARED_JOURNAL_MAX_ENTRIES),
+            # In-app edits the source does not have yet: {'replay': frame -> frame, 'write_seq': ...}
+            'unsaved': [],
+            'status': "loaded"
+        }
+    }
+
+def shared_dataset_stats():
+    """Freshness metrics for every dataset in the shared store"""
+    rows = []
+    for name, entry in list(get_shared_data_store()['datasets'].items()):
+        meta = entry['meta']
+        rows.append({
+            'Dataset': name,
+            'Version': entry['version'],
+            'Records': len(entry['df']) if entry['df'] is not None else 0,
+            'Age (s)': round(time.time() - entry['loaded_at'], 1),
+            'Last Refresh (s)': round(meta['last_refresh_seconds'], 2) if meta['last_refresh_seconds'] is not None else None,
+            'Refreshes': meta['refreshes'],
+            'Errors': meta['errors'],
+            'Background Refresh': "on" if meta['refresh'] is not None else "off",
+            'Unsaved Edits': len(meta['unsaved']),
+            'Status': "refreshing" if meta['refreshing'] else meta['status']
+        })
+    return pd.DataFrame(rows)
+
+def drop_shared_dataset(name):
+    """Unload a shared dataset; the next reader loads it again"""
+    store = get_shared_data_store()
+    with store['lock']:
+        store['datasets'].pop(name, None)
+
+def peek_shared_dataset(name):
+    """Return the shared frame if it has been loaded, without triggering a load"""
+    entry = get_shared_data_store()['datasets'].get(name)
+    return entry['df'] if entry is not None else None
+
+def publish_shared_dataset(name, df, dirty=True, store=None, replay=None):
+    """Replace a shared dataset with a new frame and bump its version
+    
+    A dirty frame holds an edit its source does not have. replay redoes the
+    edit on another copy of the data; without one the frame replaces any copy.
+    """
+    store = store if store is not None else get_shared_data_store()
+    with store['lock']:
+        entry = store['datasets'].get(name)
+        if entry is None:
+            store['datasets'][name] = new_shared_entry(df)
+            return 1
+        version = entry['version'] + 1
+        store['datasets'][name] = dict(entry, version=version, df=df, loaded_at=time.time())
+        if dirty:
+            if replay is None:
+                # Earlier edits are already part of the frame
+                entry['meta']['unsaved'] = []
+                replay = lambda fresh: df
+            entry['meta']['unsaved'].append({'replay': replay, 'write_seq': None})
+    return version
+
+def update_shared_dataset(name, update, loader):
+    """Copy-on-write edit: build a new frame from the current one and publish it atomically"""
+    store = get_shared_data_store()
+    while True:
+        # Load outside the lock; if the dataset is dropped before the lock is taken, load it again
+        get_shared_dataset(name, loader)
+        with store['lock']:
+            entry = store['datasets'].get(name)
+            if entry is not None:
+                return publish_shared_dataset(name, update(entry['df']), replay=update)
+
+def peek_shared_version(name):
+    """Current version of a shared dataset (0 if it was never loaded or published)"""
+    entry = get_shared_data_store()['datasets'].get(name)
+    return entry['version'] if entry is not None else 0
+
+def record_shared_change(name, version, change):
+    """Journal what a write that produced a version of a shared dataset changed"""
+    entry = get_shared_data_store()['datasets'].get(name)
+    if entry is not None:
+        entry['meta']['journal'].append(dict(change, version=version, at=time.time()))
+
+def record_shared_write(name, write_seq):
+    """Note the write-back log entry that saves the latest edit of a shared dataset to its source"""
+    entry = get_shared_data_store()['datasets'].get(name)
+    if entry is not None and entry['meta']['unsaved']:
+        entry['meta']['unsaved'][-1]['write_seq'] = write_seq
+
+def shared_changes_since(name, version):
+    """Journal entries for every version after the given one, oldest first
+    
+    Returns None when some later version is not in the journal (a reload from
+    the source, a wholesale publish, or an entry that aged out), since what
+    changed is then unknown.
+    """
+    entry = get_shared_data_store()['datasets'].get(name)
+    if entry is None:
+        return None
+    changes = sorted((change for change in list(entry['meta']['journal']) if change['version'] > version), key=lambda change: change['version'])
+    if [change['version'] for change in changes] != list(range(version + 1, entry['version'] + 1)):
+        return None
+    return changes
+
+def get_crm_data():
+    """Return the shared CRM frame (read-only), loading it on first use"""
+    version, df = get_shared_dataset('crm', crm_data_loader(), crm_data_refresher())
+    if st.session_state.get('crm_version') != version:
+        st.session_state.crm_version = version
+    return df
+
+def get_crm_record_count():
+    """Number of records in the shared CRM store, without loading it"""
+    source = get_crm_source()
+    if source['kind'] == 'sql':
+        return query_crm_count(source['url'], {}, crm_source_version())
+    df = peek_shared_dataset('crm')
+    return len(df) if df is not None else 0
+
+def set_crm_filter_result(df, positions):
+    """Remember which rows (positions or a slice) of the shared CRM frame the session's filters selected"""
+    if isinstance(positions, slice) and positions.indices(len(df)) == (0, len(df), 1):
+        positions = None
+    st.session_state.crm_filter_positions = positions
+    st.session_state.crm_filter_version = st.session_state.get('crm_version')
+
+def get_filtered_crm_data():
+    """Return the session's filtered view of the shared CRM frame"""
+    source = get_crm_source()
+    if source['kind'] == 'sql' and st.session_state.get('crm_filters') is not None:
+        # Filters run in the database; only the matching rows are fetched
+        return query_crm_rows(source['url'], st.session_state.crm_filters, crm_source_version())
+    
+    df = get_crm_data()
+    
+    # A view computed against an older version no longer lines up with the rows
+    if st.session_state.get('crm_filter_version') != st.session_state.get('crm_version'):
+        return df
     
-    # Remove event from session state
-    st.session_state.calendar_events = st.session_state.calendar_events[
-        st.session_state.calendar_events['id'] != event_id
+    positions = st.session_state.get('crm_filter_positions')
+    if positions is None:
+        return df
+    return df.iloc[positions]
+
+# Date ordering
+# The shared CRM frame is kept sorted by call_date (missing dates last), so a
+# date range is a contiguous block of rows found by binary search
+def is_sorted_by_date(df):
+    """True if call_date is ascending with any missing dates at the end"""
+    dates = df['call_date']
+    dated = int(dates.notna().sum())
+    return dates.iloc[:dated].is_monotonic_increasing and not dates.iloc[dated:].notna().any()
+
+def sort_crm_by_date(df):
+    """Stable-sort a CRM frame by call_date; an already sorted frame is returned as is"""
+    if df is None or 'call_date' not in df.columns or is_sorted_by_date(df):
+        return df
+    return df.sort_values('call_date', kind='stable', na_position='last').reset_index(drop=True)
+
+def crm_frame_sorted_by_date(df, version):
+    """Whether a version of the CRM frame is sorted by call_date (checked once per version)"""
+    return cached_in_region('indexes', ('sorted_by_date', version, len(df)), lambda: is_sorted_by_date(df))
+
+def crm_date_rows(df, date_start, date_end):
+    """Row range [start, stop) of calls dated date_start..date_end in a frame sorted by call_date"""
+    dates = df['call_date'].to_numpy()
+    # Bounds take the column's unit so the search does not convert the whole array
+    lower = pd.Timestamp(date_start).to_datetime64().astype(dates.dtype)
+    upper = (pd.Timestamp(date_end) + pd.Timedelta(days=1)).to_datetime64().astype(dates.dtype)
+    return int(np.searchsorted(dates, lower, side='left')), int(np.searchsorted(dates, upper, side='left'))
+
+# Bitmap indexes
+# Smart Filter multiselects and the low-cardinality columns they select from
+CRM_DIMENSION_FILTERS = {
+    'categories': 'call_category',
+    'tiers': 'customer_tier',
+    'outcomes': 'call_outcome',
+    'agents': 'voice_agent_name',
+    'reps': 'assigned_rep'
+}
+
+def build_crm_bitmaps(df):
+    """Packed (np.packbits) row bitmap for every value of each dimension column"""
+    bitmaps = {}
+    for col in CRM_DIMENSION_FILTERS.values():
+        if col not in df.columns:
+            continue
+        values = df[col].astype('category')
+        codes = values.cat.codes.to_numpy()
+        bitmaps[col] = {value: np.packbits(codes == code) for code, value in enumerate(values.cat.categories)}
+    return bitmaps
+
+def get_crm_bitmaps(df, version):
+    """Bitmaps for a version of the CRM frame, built on first use"""
+    return cached_in_region('indexes', ('bitmaps', version, len(df)), lambda: build_crm_bitmaps(df))
+
+def union_bitmaps(bitmaps, values, count):
+    """Rows holding any of the given values, as a packed bitmap over count rows"""
+    selected = [bitmaps[value] for value in values if value in bitmaps]
+    if not selected:
+        return np.zeros((count + 7) // 8, dtype=np.uint8)
+    return np.bitwise_or.reduce(selected)
+
+def append_bitmap_rows(bitmap, count, bits):
+    """Extend a packed bitmap over count rows with the bits of rows appended after them"""
+    full = count // 8
+    partial = np.unpackbits(bitmap[full:], count=count - full * 8)
+    return np.concatenate([bitmap[:full], np.packbits(np.concatenate([partial, bits]))])
+
+def set_bitmap_rows(bitmap, positions, value):
+    """Copy of a packed bitmap with the bits at the given row positions set or cleared"""
+    bitmap = bitmap.copy()
+    masks = (0x80 >> (positions & 7)).astype(np.uint8)
+    if value:
+        np.bitwise_or.at(bitmap, positions >> 3, masks)
+    else:
+        np.bitwise_and.at(bitmap, positions >> 3, ~masks)
+    return bitmap
+
+def update_crm_bitmaps(old_df, new_df, version, change):
+    """Derive a new version's bitmaps from the previous version's using its journal entry
+    
+    Appends extend the packed tail, deletes compress out the removed rows and
+    cell edits move only the edited rows between value bitmaps. Only valid when
+    the surviving rows keep their order. Without bitmaps for the previous
+    version nothing is done and the next filter builds them from scratch.
+    """
+    previous = peek_region_cache('indexes', ('bitmaps', version - 1, len(old_df)))
+    if previous is None:
+        return
+    
+    if change['deleted']:
+        keep = ~old_df['call_id'].isin(change['deleted']).to_numpy()
+        if int(keep.sum()) != len(new_df):
+            return
+        bitmaps = {
+            col: {value: np.packbits(np.unpackbits(bitmap, count=len(old_df))[keep]) for value, bitmap in values.items()}
+            for col, values in previous.items()
+        }
+    elif change['added']:
+        tail = new_df.iloc[len(old_df):]
+        empty = np.zeros((len(old_df) + 7) // 8, dtype=np.uint8)
+        bitmaps = {}
+        for col, values in previous.items():
+            column = tail[col]
+            new_values = [value for value in column.dropna().unique() if value not in values]
+            bitmaps[col] = {
+                value: append_bitmap_rows(values.get(value, empty), len(old_df), np.asarray(column == value, dtype=bool))
+                for value in list(values) + new_values
+            }
+    else:
+        edited_columns = {col for columns in change['edited'].values() for col in columns}
+        index = get_crm_id_index(old_df, ('crm', version - 1))
+        positions = np.array(sorted(index[call_id] for call_id in change['edited'] if call_id in index), dtype=np.int64)
+        bitmaps = dict(previous)
+        for col in [col for col in previous if col in edited_columns]:
+            values = {
+                value: set_bitmap_rows(bitmap, positions, False) if (bitmap[positions >> 3] & (0x80 >> (positions & 7))).any() else bitmap
+                for value, bitmap in previous[col].items()
+            }
+            new_values = new_df[col].iloc[positions]
+            for value in new_values.dropna().unique():
+                rows = positions[np.asarray(new_values == value, dtype=bool)]
+                values[value] = set_bitmap_rows(values.get(value, np.zeros((len(new_df) + 7) // 8, dtype=np.uint8)), rows, True)
+            bitmaps[col] = values
+    
+    cached_in_region('indexes', ('bitmaps', version, len(new_df)), lambda: bitmaps)
+
+# Record lookup
+def get_crm_id_index(df, frame_key=None):
+    """call_id -> row position hash index of a frame (the first of duplicated ids wins), cached per frame_key"""
+    def compute():
+        ids = df['call_id'].tolist()
+        return dict(zip(reversed(ids), range(len(ids) - 1, -1, -1)))
+    
+    if frame_key is None:
+        return compute()
+    return cached_in_region('indexes', ('id_index', frame_key, len(df)), compute)
+
+def update_crm_id_index(old_df, new_df, version, change):
+    """Extend the previous version's id index with appended rows
+    
+    Deletes shift every later position, so after one the index is rebuilt on
+    its next use instead. Cell edits that leave call_id alone keep the index
+    as it is.
+    """
+    previous = peek_region_cache('indexes', ('id_index', ('crm', version - 1), len(old_df)))
+    if previous is None or change['deleted']:
+        return
+    if change['edited']:
+        if not any('call_id' in columns for columns in change['edited'].values()):
+            cached_in_region('indexes', ('id_index', ('crm', version), len(new_df)), lambda: previous)
+        return
+    
+    index = dict(previous)
+    for position, call_id in enumerate(new_df['call_id'].iloc[len(old_df):].tolist(), start=len(old_df)):
+        index.setdefault(call_id, position)
+    cached_in_region('indexes', ('id_index', ('crm', version), len(new_df)), lambda: index)
+
+def crm_record_source(df):
+    """Frame and id index used to fetch single records shown in a CRM view"""
+    if get_crm_source()['kind'] == 'sql':
+        # Only the fetched rows are in memory; index them for this render
+        return df, get_crm_id_index(df)
+    corpus = get_crm_data()
+    return corpus, get_crm_id_index(corpus, ('crm', st.session_state.get('crm_version')))
+
+def get_crm_records(df, call_ids):
+    """Records by call_id, in the order given (unknown ids are skipped)"""
+    corpus, index = crm_record_source(df)
+    return corpus.iloc[[index[call_id] for call_id in call_ids if call_id in index]]
+
+def crm_record_labeler(df):
+    """format_func for call_id pickers: "CALL_001 - Customer (Category)" via the id index"""
+    corpus, index = crm_record_source(df)
+    names, categories = corpus['customer_name'].to_numpy(), corpus['call_category'].to_numpy()
+    
+    def label(call_id):
+        position = index.get(call_id)
+        if position is None:
+            return str(call_id)
+        return f"{call_id} - {names[position]} ({categories[position]})"
+    return label
+
+# Record picker
+# Fields the typeahead picker matches, in ranking order, and whether each word
+# of a value (and a phone's digits) can start a match or only the whole value
+CRM_PICKER_FIELDS = {'call_id': False, 'customer_name': True, 'customer_phone': True, 'customer_email': True}
+RECORD_PICKER_LIMIT = 20
+
+def build_crm_prefix_index(df):
+    """Sorted lower-cased keys per picker field, each pointing at the rows holding its value
+    
+    Keys are built per distinct value and rows are grouped by value
+    (order/offsets), so a prefix lookup is a binary search plus the rows it
+    actually returns.
+    """
+    index = {}
+    for col, by_word in CRM_PICKER_FIELDS.items():
+        if col not in df.columns:
+            continue
+        codes, uniques = pd.factorize(df[col])
+        values = pd.Series(uniques, dtype=object).astype(str).str.lower()
+        keys = [values]
+        if by_word:
+            keys.append(values.str.findall(SEARCH_TOKEN_PATTERN).explode().dropna())
+            digits = values.str.replace(r"\D", "", regex=True)
+            keys.append(digits[digits != ""])
+        # (key, value code) pairs; the Series index is the value code
+        pairs = pd.concat(keys).rename('key').rename_axis('code').reset_index().drop_duplicates()
+        key_text = pairs['key'].to_numpy(dtype=str)
+        key_order = np.argsort(key_text, kind='stable')
+        row_order = np.argsort(codes, kind='stable')
+        index[col] = {
+            'keys': key_text[key_order],
+            'codes': pairs['code'].to_numpy()[key_order],
+            'rows': row_order,
+            'offsets': np.searchsorted(codes[row_order], np.arange(len(uniques) + 1))
+        }
+    return index
+
+def get_crm_prefix_index(df, frame_key=None):
+    """Picker prefix index of a frame, cached per frame_key"""
+    if frame_key is None:
+        return build_crm_prefix_index(df)
+    return cached_in_region('indexes', ('prefix_index', frame_key, len(df)), lambda: build_crm_prefix_index(df))
+
+def search_crm_records(df, query, limit=RECORD_PICKER_LIMIT):
+    """call_ids of up to limit records in a CRM view matching a typed prefix
+    
+    Matches are ranked by field (call ID, then name, phone, email), then by
+    key, newest calls first within a value. A query typed with phone
+    punctuation, like "(555) 01", also matches by its digits. An empty query
+    returns the view's most recent calls.
+    """
+    corpus, positions, frame_key = crm_view_corpus(df)
+    query = query.strip().lower()
+    if not query:
+        return df['call_id'].iloc[::-1][:limit].tolist()
+    
+    # Phone values are also keyed by their digits alone
+    digits = re.sub(r"\D", "", query)
+    prefixes = [query, digits] if digits and digits != query else [query]
+    
+    in_view = np.zeros(len(corpus), dtype=bool)
+    in_view[positions] = True
+    call_ids = corpus['call_id'].to_numpy()
+    
+    matches, seen = [], set()
+    for field in get_crm_prefix_index(corpus, frame_key).values():
+        keys = field['keys']
+        for prefix in prefixes:
+            start = np.searchsorted(keys, prefix, side='left')
+            stop = np.searchsorted(keys, prefix + '\uffff', side='left')
+            for code in field['codes'][start:stop]:
+                rows = field['rows'][field['offsets'][code]:field['offsets'][code + 1]]
+                for row in rows[::-1]:
+                    if in_view[row] and row not in seen:
+                        seen.add(row)
+                        matches.append(call_ids[row])
+                        if len(matches) >= limit:
+                            return matches
+    return matches
+
+def crm_record_picker(label, df, key, multiple=False):
+    """Search-as-you-type record picker: only the top matches are sent to the browser"""
+    query = st.text_input(
+        f"🔎 {label}", key=f"{key}_query",
+        placeholder="Type a call ID, customer name, phone or email"
+    )
+    options = search_crm_records(df, query)
+    labeler = crm_record_labeler(df)
+    
+    if multiple:
+        # Keep earlier picks selectable while the query changes
+        selected = [call_id for call_id in st.session_state.get(key, []) if call_id not in options]
+        return st.multiselect(label, selected + options, key=key, format_func=labeler)
+    if not options:
+        st.caption("No matching calls")
+        return None
+    return st.selectbox(label, options, key=key, format_func=labeler)
+
+
+# Row predicates behind the Smart Filters: (frame, parameter, data version) -> boolean mask
+CRM_FILTER_PREDICATES = {
+    'date_range': lambda df, value, version: df['call_date'].dt.date.between(*value),
+    'categories': lambda df, value, version: df['call_category'].isin(value),
+    'tiers': lambda df, value, version: df['customer_tier'].isin(value),
+    'outcomes': lambda df, value, version: df['call_outcome'].isin(value),
+    'agents': lambda df, value, version: df['voice_agent_name'].isin(value),
+    'reps': lambda df, value, version: df['assigned_rep'].isin(value),
+    'satisfaction_range': lambda df, value, version: df['customer_satisfaction'].between(*value),
+    'revenue_range': lambda df, value, version: df['revenue_impact'].between(*value),
+    'search': lambda df, value, version: search_crm_mask(df, value, ('crm', version) if version is not None else object())
+}
+
+# Columns each Smart Filter predicate reads
+CRM_PREDICATE_COLUMNS = {
+    'date_range': ['call_date'],
+    'satisfaction_range': ['customer_satisfaction'],
+    'revenue_range': ['revenue_impact'],
+    'search': CRM_SEARCH_COLUMNS,
+    **{name: [col] for name, col in CRM_DIMENSION_FILTERS.items()}
+}
+
+def crm_predicate_mask(df, name, value, version=None):
+    """Packed bitmask (np.packbits) of one Smart Filter predicate
+    
+    Masks are cached per predicate, parameter and data version, so moving one
+    widget only recomputes that widget's predicate. Multiselects are unions of
+    the per-value bitmaps.
+    """
+    col = CRM_DIMENSION_FILTERS.get(name)
+    if col is not None and version is not None and col in df.columns:
+        return union_bitmaps(get_crm_bitmaps(df, version)[col], value, len(df))
+    
+    def compute():
+        return np.packbits(np.asarray(CRM_FILTER_PREDICATES[name](df, value, version), dtype=bool))
+    
+    if version is None:
+        return compute()
+    return cached_in_region('filters', (name, freeze_cache_key(value), version, len(df)), compute)
+
+def filter_crm_positions(df, filters, version=None):
+    """Rows of a CRM frame matching the sidebar Smart Filters, as a slice or an array of positions
+    
+    In a frame sorted by call_date the date range is a contiguous block found by
+    binary search; the other predicates' cached bitmasks are AND-ed and only
+    consulted inside that block.
+    """
+    start, stop = 0, len(df)
+    date_range = filters.get('date_range')
+    if date_range is not None and version is not None and crm_frame_sorted_by_date(df, version):
+        start, stop = crm_date_rows(df, *date_range)
+    
+    masks = [
+        crm_predicate_mask(df, name, value, version)
+        for name, value in filters.items()
+        if name in CRM_FILTER_PREDICATES and (name != 'search' or value)
+        and (name != 'date_range' or (start, stop) == (0, len(df)))
     ]
+    if not masks:
+        return slice(start, stop)
     
-    return True
+    mask = np.unpackbits(np.bitwise_and.reduce(masks), count=len(df))[start:stop].astype(bool)
+    if mask.all():
+        return slice(start, stop)
+    return start + np.flatnonzero(mask)
 
-# Data editing functions
-def save_data_changes(df):
-    """Save changes to the CRM data"""
-    st.session_state.crm_data = df
-    # In a real application, this would also update the Google Sheets
+def apply_crm_filters(df, filters, version=None):
+    """Evaluate the sidebar Smart Filters over a CRM frame"""
+    return df.iloc[filter_crm_positions(df, filters, version)]
+
+def crm_cache_entry_columns(key, version):
+    """Columns read by an indexes- or filters-region entry built from a CRM store version, and where the version sits in its key
+    
+    Returns None for entries that are not tracked per column (they are simply
+    rebuilt for the next version).
+    """
+    if key[0] in CRM_PREDICATE_COLUMNS and len(key) == 4 and key[2] == version:
+        return CRM_PREDICATE_COLUMNS[key[0]], 2
+    if key[0] == 'sorted_by_date' and key[1] == version:
+        return ['call_date'], 1
+    if key[0] in ('prefix_index', 'table_order', 'table_filter') and key[1] == ('crm', version):
+        return (list(CRM_PICKER_FIELDS) if key[0] == 'prefix_index' else [key[2]]), 1
+    return None
+
+def carry_crm_filter_entries(version, new_version, count, changed_columns):
+    """Re-key the previous version's masks, orders and indexes that do not read any changed column"""
+    regions = get_cache_regions()
+    with regions['lock']:
+        for entries in (regions['entries']['indexes'], regions['entries']['filters']):
+            for key, value in list(entries.items()):
+                tracked = crm_cache_entry_columns(key, version)
+                if tracked is None or key[-1] != count or set(tracked[0]) & changed_columns:
+                    continue
+                position = tracked[1]
+                new_part = new_version if position == 2 or key[0] == 'sorted_by_date' else ('crm', new_version)
+                entries.setdefault(key[:position] + (new_part,) + key[position + 1:], value)
+
+def carry_crm_caches(old_df, new_df, version, reordered=False):
+    """Carry the previous version's derived caches over to a new version, as far as its journal entry allows
+    
+    The customer profile table only rebuilds the customers a write touched
+    and the agent accumulator and KPI day partitions only take out and put
+    back the calls it touched; none of them depend on row positions, so this
+    holds even when the write re-sorted the frame (reordered).
+    A write that keeps the row order and only appends, only deletes or only
+    edits cells patches the bitmaps and id index; after a cell edit every
+    mask, sort order or index that reads none of the edited columns is kept
+    as is. Anything else is rebuilt on its next use.
+    """
+    changes = shared_changes_since('crm', version - 1)
+    if not changes or len(changes) != 1 or changes[0]['replaced']:
+        return
+    change = changes[0]
+    update_crm_customer_profiles(old_df, new_df, version, change)
+    update_crm_agent_accumulator(old_df, new_df, version, change)
+    update_crm_kpi_partitions(old_df, new_df, version, change)
+    if reordered or sum(bool(change[kind]) for kind in ('edited', 'added', 'deleted')) != 1:
+        return
+    
+    update_crm_bitmaps(old_df, new_df, version, change)
+    update_crm_id_index(old_df, new_df, version, change)
+    if change['edited']:
+        changed = {col for columns in change['edited'].values() for col in columns}
+        carry_crm_filter_entries(version - 1, version, len(new_df), changed | {f"{col}_key" for col in changed})
+
+def crm_filter_options(df):
+    """Choices and bounds for the sidebar filters, computed from a CRM frame"""
+    options = {
+        name: list(df[col].dropna().unique())
+        for name, col in CRM_DIMENSION_FILTERS.items()
+        if col in df.columns
+    }
+    return {
+        **options,
+        'date_min': df['call_date'].min(),
+        'date_max': df['call_date'].max(),
+        'satisfaction_min': float(df['customer_satisfaction'].min()),
+        'satisfaction_max': float(df['customer_satisfaction'].max()),
+        'revenue_min': float(df['revenue_impact'].min()),
+        'revenue_max': float(df['revenue_impact'].max())
+    }
+
+# Aggregate cube
+# Every dashboard chart and KPI is a rollup of one cube per filtered view: sums
+# and counts of the measures for each combination of these dimensions
+CRM_CUBE_DIMENSIONS = ['call_category', 'customer_tier', 'voice_agent_name', 'call_outcome', 'call_day']
+# Measures taken straight from a column (flags count as 0/1)
+CRM_CUBE_COLUMNS = [
+    'revenue_impact', 'customer_satisfaction', 'call_success', 'call_duration_seconds',
+    'agent_performance_score', 'ai_accuracy_score', 'resolution_time_seconds',
+    'escalation_required', 'appointment_scheduled', 'follow_up_required'
+]
+# Derived measures: the columns they read, and their value for a frame and for a SQL table
+CRM_CUBE_DERIVED = {
+    'high_satisfaction': (
+        ['customer_satisfaction'],
+        lambda df: df['customer_satisfaction'] >= 9,
+        lambda c: sa.case((c.customer_satisfaction >= 9, 1.0), else_=0.0)
+    ),
+    'converting': (
+        ['conversion_probability'],
+        lambda df: df['conversion_probability'] > 0.5,
+        lambda c: sa.case((c.conversion_probability > 0.5, 1.0), else_=0.0)
+    ),
+    # Revenue of closed deals only, so its count is the number of deals
+    'deal_revenue': (
+        ['revenue_impact'],
+        lambda df: df['revenue_impact'].where(df['revenue_impact'] > 0),
+        lambda c: sa.case((c.revenue_impact > 0, c.revenue_impact))
+    ),
+    'pipeline_value': (
+        ['customer_lifetime_value', 'conversion_probability'],
+        lambda df: df['customer_lifetime_value'] * df['conversion_probability'],
+        lambda c: c.customer_lifetime_value * c.conversion_probability
+    )
+}
+
+def crm_cube_measure_values(df, names=None):
+    """Each cube measure (or each of names) available in df as a float array (NaN where missing)"""
+    values = {col: df[col] for col in CRM_CUBE_COLUMNS if col in df.columns and (names is None or col in names)}
+    for name, (columns, frame_measure, _) in CRM_CUBE_DERIVED.items():
+        if all(col in df.columns for col in columns) and (names is None or name in names):
+            values[name] = frame_measure(df)
+    return {name: pd.to_numeric(value, errors='coerce').to_numpy(dtype=float, na_value=np.nan) for name, value in values.items()}
+
+def build_crm_cube(df):
+    """One row per combination of dimension values present in df, with its calls
+    and the sum and non-missing count of every measure"""
+    dimensions, cells = [], np.zeros(len(df), dtype=np.int64)
+    for dim in CRM_CUBE_DIMENSIONS:
+        if dim == 'call_day':
+            values = df['call_date'].dt.normalize()
+        elif dim in df.columns:
+            values = df[dim]
+        else:
+            continue
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            codes, labels = values.cat.codes.to_numpy(), values.cat.categories
+        else:
+            codes, labels = pd.factorize(values, sort=True)
+        # Missing values get the slot after the last label
+        size = len(labels) + 1
+        cells = cells * size + np.where(codes < 0, size - 1, codes)
+        dimensions.append((dim, labels, size))
+    
+    cells, cell_of_row = np.unique(cells, return_inverse=True)
+    cell_of_row = cell_of_row.ravel()
+    cube = {}
+    for dim, labels, size in reversed(dimensions):
+        cells, codes = np.divmod(cells, size)
+        codes = np.where(codes == size - 1, -1, codes)
+        if dim == 'call_day':
+            cube[dim] = labels.take(codes, allow_fill=True, fill_value=pd.NaT)
+        else:
+            cube[dim] = pd.Categorical.from_codes(codes, categories=labels)
+    cube = {dim: cube[dim] for dim, _, _ in dimensions}
+    
+    count = len(cube[dimensions[0][0]]) if dimensions else int(len(df) > 0)
+    cube['calls'] = np.bincount(cell_of_row, minlength=count)
+    for name, values in crm_cube_measure_values(df).items():
+        present = ~np.isnan(values)
+        cube[f"{name}_sum"] = np.bincount(cell_of_row, weights=np.where(present, values, 0.0), minlength=count)
+        cube[f"{name}_count"] = np.bincount(cell_of_row, weights=present, minlength=count).astype(np.int64)
+    return pd.DataFrame(cube)
+
+def crm_cube_rollup(cube, by=()):
+    """Collapse a cube onto some of its dimensions (none gives a one-row total)
+    
+    Besides each measure's sum and count the result holds its mean under the
+    measure's own name.
+    """
+    measures = [col for col in cube.columns if col not in CRM_CUBE_DIMENSIONS]
+    if by:
+        rollup = cube.groupby(list(by), observed=True)[measures].sum().reset_index()
+    else:
+        rollup = cube[measures].sum().to_frame().T
+    names = [col[:-len("_count")] for col in measures if col.endswith("_count")]
+    # Measures with no values in a group get a NaN mean
+    with np.errstate(divide='ignore', invalid='ignore'):
+        means = {name: rollup[f"{name}_sum"].to_numpy() / rollup[f"{name}_count"].to_numpy() for name in names}
+    return pd.concat([rollup, pd.DataFrame(means, index=rollup.index)], axis=1)
+
+def crm_view_key(df):
+    """Cache key identifying the session's filtered view df: where it comes from, the data version and the filters"""
+    source = get_crm_source()
+    if source['kind'] == 'sql' and st.session_state.get('crm_filters') is not None:
+        return ('sql', crm_source_version(), freeze_cache_key(st.session_state.crm_filters))
+    filtered = (
+        st.session_state.get('crm_filter_positions') is not None
+        and st.session_state.get('crm_filter_version') == st.session_state.get('crm_version')
+    )
+    filters = freeze_cache_key(st.session_state.get('crm_filters')) if filtered else None
+    return ('crm', st.session_state.get('crm_version'), filters, len(df))
+
+def get_crm_cube(df):
+    """The aggregate cube of the session's filtered view, built once per data version and filters
+    
+    With a database the cube is one GROUP BY query; df is then not needed.
+    """
+    source = get_crm_source()
+    if source['kind'] == 'sql' and st.session_state.get('crm_filters') is not None:
+        return query_crm_cube(source['url'], st.session_state.crm_filters, crm_source_version())
+    return cached_in_region('aggregates', ('crm_cube', crm_view_key(df)), lambda: build_crm_cube(df))
+
+def get_crm_rollup(df, by=()):
+    """crm_cube_rollup() of the session's cube, cached alongside it"""
+    return cached_in_region('aggregates', ('crm_rollup', crm_view_key(df), tuple(by)), lambda: crm_cube_rollup(get_crm_cube(df), by))
+
+def crm_change_rows(old_df, new_df, change, columns):
+    """Masks of the rows of old_df and new_df whose values in columns a journaled write changed
+    
+    These are the deleted and added calls and the calls with one of columns edited.
+    """
+    edited = [
+        call_id for call_id, edited_columns in change['edited'].items()
+        if columns & {col[:-len("_key")] if col.endswith("_key") else col for col in edited_columns}
+    ]
+    old_rows = old_df['call_id'].isin(edited + list(change['deleted'])).to_numpy()
+    new_rows = new_df['call_id'].isin(edited + list(change['added'])).to_numpy()
+    return old_rows, new_rows
+
+# Customer profiles
+# Columns of the customer profile table: the call column each is computed from,
+# how a customer's calls are combined, and the value used when the column is missing
+CUSTOMER_PROFILE_COLUMNS = {
+    'Total_Calls': ('call_id', 'count', 0),
+    'Avg_Satisfaction': ('customer_satisfaction', 'mean', np.nan),
+    'Lifetime_Value': ('customer_lifetime_value', 'first', 0),
+    'Tier': ('customer_tier', 'first', 'Standard'),
+    'Revenue_Impact': ('revenue_impact', 'sum', 0.0),
+    'Conversion_Probability': ('conversion_probability', 'mean', 0),
+    'Categories': ('call_category', 'distinct', ''),
+    'Outcomes': ('call_outcome', 'distinct', ''),
+    'Next_Action': ('next_best_action', 'last', 'Follow_up'),
+    'Pain_Points': ('pain_points', 'last', 'General inquiry')
+}
+# call_date orders each customer's calls for the first, last and distinct columns
+CUSTOMER_PROFILE_SOURCE_COLUMNS = {'customer_name', 'call_date'} | {col for col, _, _ in CUSTOMER_PROFILE_COLUMNS.values()}
+
+def group_edge_rows(groups, count, valid, last=False):
+    """Position of the first (or last) valid row of each group, -1 for groups without one"""
+    rows = np.flatnonzero(valid)
+    if last:
+        edge = np.full(count, -1, dtype=np.int64)
+        np.maximum.at(edge, groups[rows], rows)
+    else:
+        edge = np.full(count, len(groups), dtype=np.int64)
+        np.minimum.at(edge, groups[rows], rows)
+        edge[edge == len(groups)] = -1
+    return edge
+
+def group_distinct_labels(groups, count, values):
+    """Distinct non-missing values of each group joined with ', ', in order of first appearance
+    
+    Each group's ordered value codes become one row of a small matrix, so only
+    the distinct combinations are joined as strings.
+    """
+    codes, labels = pd.factorize(values)
+    rows = np.flatnonzero(codes >= 0)
+    pairs, pair_of_row = np.unique(groups[rows] * len(labels) + codes[rows], return_inverse=True)
+    pair_first = np.full(len(pairs), len(groups), dtype=np.int64)
+    np.minimum.at(pair_first, pair_of_row.ravel(), rows)
+    pair_first = pair_first[np.lexsort((pair_first, groups[pair_first]))] if len(pairs) else pair_first
+    pair_groups = groups[pair_first]
+    ranks = np.arange(len(pair_first)) - np.searchsorted(pair_groups, pair_groups)
+    
+    matrix = np.full((count, int(ranks.max()) + 1 if len(ranks) else 1), -1, dtype=np.int64)
+    matrix[pair_groups, ranks] = codes[pair_first]
+    combinations, combination_of_group = np.unique(matrix, axis=0, return_inverse=True)
+    labels = np.asarray(labels, dtype=object)
+    joined = np.array([", ".join(str(label) for label in labels[row[row >= 0]]) for row in combinations], dtype=object)
+    return joined[combination_of_group.ravel()]
+
+def build_customer_profiles(df):
+    """One row per customer (sorted by name) summarising their calls in df"""
+    # Sorted by the names themselves, not a categorical's category order, so
+    # profiles rebuilt by update_customer_profiles line up with a full build
+    names = df['customer_name']
+    groups, customers = pd.factorize(names.astype(str).where(names.notna()), sort=True)
+    valid = groups >= 0
+    groups, count = groups[valid], len(customers)
+    profiles = {'Customer': np.asarray(customers, dtype=object)}
+    
+    for name, (col, how, missing) in CUSTOMER_PROFILE_COLUMNS.items():
+        if how == 'count':
+            profiles[name] = np.bincount(groups, minlength=count)
+            continue
+        if col not in df.columns:
+            profiles[name] = np.full(count, missing, dtype=object if isinstance(missing, str) else float)
+            continue
+        
+        column = df[col][valid]
+        if how in ('sum', 'mean'):
+            values = pd.to_numeric(column, errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+            present = ~np.isnan(values)
+            total = np.bincount(groups, weights=np.where(present, values, 0.0), minlength=count)
+            if how == 'sum':
+                profiles[name] = total
+            else:
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    profiles[name] = total / np.bincount(groups, weights=present, minlength=count)
+        elif how in ('first', 'last'):
+            edge = group_edge_rows(groups, count, column.notna().to_numpy(), last=how == 'last')
+            picked = column.take(np.maximum(edge, 0))
+            if pd.api.types.is_numeric_dtype(picked) and not pd.api.types.is_bool_dtype(picked):
+                profiles[name] = np.where(edge >= 0, picked.to_numpy(dtype=float, na_value=np.nan), np.nan)
+            else:
+                picked = np.asarray(picked, dtype=object)
+                picked[edge < 0] = None
+                profiles[name] = picked
+        else:
+            profiles[name] = group_distinct_labels(groups, count, column)
+    return pd.DataFrame(profiles)
+
+def update_customer_profiles(profiles, df, customers):
+    """A profile table with the given customers' rows rebuilt from df (dropped if they have no calls left)"""
+    customers = [customer for customer in customers if pd.notna(customer)]
+    if not customers:
+        return profiles
+    rebuilt = build_customer_profiles(df[df['customer_name'].isin(customers)])
+    kept = profiles[~profiles['Customer'].isin(customers)]
+    return pd.concat([kept, rebuilt], ignore_index=True).sort_values('Customer', kind='stable', ignore_index=True)
+
+def update_crm_customer_profiles(old_df, new_df, version, change):
+    """Carry the unfiltered customer profile table over a journaled write
+    
+    Only the customers whose calls were added, deleted or had profile columns
+    edited are recomputed. Without a table for the previous version nothing is
+    done and the next reader builds one from scratch.
+    """
+    previous = peek_region_cache('aggregates', ('customer_profiles', ('crm', version - 1, None, len(old_df))))
+    if previous is None or 'customer_name' not in new_df.columns:
+        return
+    
+    old_rows, new_rows = crm_change_rows(old_df, new_df, change, CUSTOMER_PROFILE_SOURCE_COLUMNS)
+    customers = set(old_df['customer_name'][old_rows]) | set(new_df['customer_name'][new_rows])
+    profiles = update_customer_profiles(previous, new_df, customers)
+    cached_in_region('aggregates', ('customer_profiles', ('crm', version, None, len(new_df))), lambda: profiles)
+
+def get_customer_profiles(df):
+    """Customer profile table of the session's filtered view, built once per data version and filters"""
+    return cached_in_region('aggregates', ('customer_profiles', crm_view_key(df)), lambda: build_customer_profiles(df))
+
+# Agent accumulators
+# Measures the agent page reports; each agent keeps their non-missing count, sum
+# and sum of squares, so means and spreads are read without a pass over the calls
+AGENT_ACCUMULATOR_COLUMNS = [
+    'agent_performance_score', 'customer_satisfaction', 'call_success', 'ai_accuracy_score',
+    'call_duration_seconds', 'resolution_time_seconds', 'escalation_required', 'revenue_impact'
+]
+
+def build_agent_accumulator(df):
+    """Calls per agent and the count, sum and sum of squares of each accumulator measure, indexed by agent name"""
+    groups, agents = pd.factorize(df['voice_agent_name'], sort=True)
+    valid = groups >= 0
+    groups, count = groups[valid], len(agents)
+    accumulator = {'calls': np.bincount(groups, minlength=count)}
+    for col in AGENT_ACCUMULATOR_COLUMNS:
+        if col not in df.columns:
+            continue
+        values = pd.to_numeric(df[col][valid], errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+        present = ~np.isnan(values)
+        values = np.where(present, values, 0.0)
+        accumulator[f"{col}_count"] = np.bincount(groups, weights=present, minlength=count).astype(np.int64)
+        accumulator[f"{col}_sum"] = np.bincount(groups, weights=values, minlength=count)
+        accumulator[f"{col}_sumsq"] = np.bincount(groups, weights=values * values, minlength=count)
+    return pd.DataFrame(accumulator, index=pd.Index(np.asarray(agents, dtype=object), name='voice_agent_name')).sort_index()
+
+def update_group_partials(partials, removed, added):
+    """Per-group partial aggregates (calls plus each measure's _count, _sum and
+    _sumsq, indexed by group) with the removed partials taken out and the added
+    ones put in; groups left without calls are dropped"""
+    updated = partials.sub(removed, fill_value=0).add(added, fill_value=0)
+    updated = updated[updated['calls'] > 0].sort_index()
+    for col in updated.columns:
+        if col == 'calls' or col.endswith("_count"):
+            updated[col] = updated[col].round().astype(np.int64)
+    # A measure whose last value was taken out keeps no rounding residue
+    for col in [col for col in updated.columns if col.endswith("_count")]:
+        name = col[:-len("_count")]
+        sums = [f"{name}_{kind}" for kind in ('sum', 'sumsq') if f"{name}_{kind}" in updated.columns]
+        updated.loc[updated[col] == 0, sums] = 0.0
+    return updated
+
+def update_crm_agent_accumulator(old_df, new_df, version, change):
+    """Carry the unfiltered agent accumulator over a journaled write
+    
+    Only the calls the write added, deleted or edited a measure of are
+    subtracted and re-added, so the cost follows the size of the write.
+    """
+    previous = peek_region_cache('aggregates', ('agent_accumulator', ('crm', version - 1, None, len(old_df))))
+    if previous is None or 'voice_agent_name' not in new_df.columns:
+        return
+    
+    old_rows, new_rows = crm_change_rows(old_df, new_df, change, {'voice_agent_name', *AGENT_ACCUMULATOR_COLUMNS})
+    accumulator = update_group_partials(previous, build_agent_accumulator(old_df[old_rows]), build_agent_accumulator(new_df[new_rows]))
+    cached_in_region('aggregates', ('agent_accumulator', ('crm', version, None, len(new_df))), lambda: accumulator)
+
+def get_agent_accumulator(df):
+    """Agent accumulator of the session's filtered view, built once per data version and filters
+    
+    With a database it is one GROUP BY query; df is then not needed.
+    """
+    source = get_crm_source()
+    if source['kind'] == 'sql' and st.session_state.get('crm_filters') is not None:
+        return query_crm_agent_accumulator(source['url'], st.session_state.crm_filters, crm_source_version())
+    return cached_in_region('aggregates', ('agent_accumulator', crm_view_key(df)), lambda: build_agent_accumulator(df))
+
+def agent_accumulator_stats(accumulator):
+    """One row per agent with their calls and each measure's mean, standard deviation and total"""
+    stats = {'voice_agent_name': accumulator.index.to_numpy(), 'calls': accumulator['calls'].to_numpy()}
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for col in AGENT_ACCUMULATOR_COLUMNS:
+            if f"{col}_count" not in accumulator.columns:
+                continue
+            count = accumulator[f"{col}_count"].to_numpy(dtype=float)
+            total = accumulator[f"{col}_sum"].to_numpy()
+            mean = total / count
+            variance = (accumulator[f"{col}_sumsq"].to_numpy() - total * mean) / (count - 1)
+            stats[col] = mean
+            stats[f"{col}_std"] = np.where(count > 1, np.sqrt(np.maximum(variance, 0.0)), np.nan)
+            stats[f"{col}_sum"] = total
+    return pd.DataFrame(stats)
+
+# KPI accumulators
+# Measures behind the dashboard's KPI cards and quick stats. The store keeps their
+# calls, counts and sums per call day, carried across writes; any view's totals
+# are then a sum of day partials plus the rows of the days it only partly holds
+CRM_KPI_MEASURES = [
+    'call_success', 'customer_satisfaction', 'revenue_impact', 'call_duration_seconds',
+    'follow_up_required', 'high_satisfaction'
+]
+
+def build_crm_kpi_partitions(df):
+    """Calls and the count and sum of each KPI measure per call day, indexed by day"""
+    codes, days = pd.factorize(df['call_date'].dt.normalize(), sort=True, use_na_sentinel=False)
+    count = len(days)
+    partitions = {'calls': np.bincount(codes, minlength=count)}
+    for name, values in crm_cube_measure_values(df, CRM_KPI_MEASURES).items():
+        present = ~np.isnan(values)
+        partitions[f"{name}_count"] = np.bincount(codes, weights=present, minlength=count).astype(np.int64)
+        partitions[f"{name}_sum"] = np.bincount(codes, weights=np.where(present, values, 0.0), minlength=count)
+    return pd.DataFrame(partitions, index=pd.DatetimeIndex(days, name='call_day')).sort_index()
+
+def update_crm_kpi_partitions(old_df, new_df, version, change):
+    """Carry the store's KPI day partitions over a journaled write, re-aggregating only the calls it touched"""
+    previous = peek_region_cache('aggregates', ('crm_kpi_partitions', ('crm', version - 1, None, len(old_df))))
+    if previous is None:
+        return
+    
+    columns = {'call_date'} | {col for name in CRM_KPI_MEASURES for col in CRM_CUBE_DERIVED.get(name, ([name],))[0]}
+    old_rows, new_rows = crm_change_rows(old_df, new_df, change, columns)
+    partitions = update_group_partials(previous, build_crm_kpi_partitions(old_df[old_rows]), build_crm_kpi_partitions(new_df[new_rows]))
+    cached_in_region('aggregates', ('crm_kpi_partitions', ('crm', version, None, len(new_df))), lambda: partitions)
+
+def get_crm_kpi_partitions():
+    """KPI day partitions of the whole shared CRM frame, built once and then kept up to date by writes"""
+    df = get_crm_data()
+    key = ('crm_kpi_partitions', ('crm', st.session_state.get('crm_version'), None, len(df)))
+    return cached_in_region('aggregates', key, lambda: build_crm_kpi_partitions(df))
+
+def combine_crm_kpi_partials(df, positions, partitions):
+    """KPI totals of the rows of df at positions (a slice or an array), from the
+    partitions of df: days held in full are read from their partial, the rest
+    of the rows are aggregated directly"""
+    days = df['call_date']
+    if isinstance(positions, slice):
+        start, stop, _ = positions.indices(len(df))
+        # A block of a date-sorted frame that starts and ends on day boundaries holds whole days
+        if (
+            start < stop and crm_frame_sorted_by_date(df, st.session_state.get('crm_version'))
+            and days.iloc[[start, stop - 1]].notna().all()
+            and (start == 0 or days.iloc[start - 1].normalize() != days.iloc[start].normalize())
+            and (stop == len(df) or days.iloc[stop].normalize() != days.iloc[stop - 1].normalize())
+        ):
+            first, last = partitions.index.searchsorted([days.iloc[start].normalize(), days.iloc[stop - 1].normalize()])
+            return partitions.iloc[first:last + 1].sum()
+        positions = np.arange(len(df))[positions]
+    
+    slots = partitions.index.get_indexer(days.iloc[positions].dt.normalize())
+    whole = np.bincount(slots, minlength=len(partitions)) == partitions['calls'].to_numpy()
+    rest = build_crm_kpi_partitions(df.iloc[positions[~whole[slots]]]).sum()
+    return partitions[whole].sum().add(rest, fill_value=0)
+
+def get_crm_kpi_totals(df):
+    """Calls and each KPI measure's count and sum for the session's filtered view, kept per data version and filters
+    
+    With a database the totals come from the filtered view's aggregate cube.
+    """
+    source = get_crm_source()
+    if source['kind'] == 'sql' and st.session_state.get('crm_filters') is not None:
+        return get_crm_rollup(df).iloc[0]
+    
+    view_key = crm_view_key(df)
+    def compute():
+        partitions = get_crm_kpi_partitions()
+        if view_key[2] is None:
+            return partitions.sum()
+        return combine_crm_kpi_partials(get_crm_data(), st.session_state.crm_filter_positions, partitions)
+    return cached_in_region('aggregates', ('crm_kpis', view_key), compute)
+
+# CRM data sources
+CRM_SQL_TABLE = "crm_calls"
+# Columns the Smart Filters and record lookups hit; each gets a B-tree index
+CRM_SQL_INDEXED_COLUMNS = [
+    'call_id', 'call_date', 'call_category', 'customer_tier', 'call_outcome',
+    'customer_satisfaction', 'revenue_impact', 'voice_agent_name'
+]
+
+def get_crm_source():
+    """Where CRM records live: a SQL database when one is configured, the in-memory store otherwise"""
+    url = load_auth_config().get("database", {}).get("url", "")
+    if url and sa is not None:
+        return {'kind': 'sql', 'url': url}
+    return {'kind': 'pandas'}
+
+def crm_data_refresher():
+    """Function the background refresher uses to reload CRM data (None for sample data)"""
+    source = get_crm_source()
+    if source['kind'] == 'sql':
+        return lambda: sort_crm_by_date(load_crm_data_from_sql(source['url']))
+    sheets_url = load_auth_config().get("google_sheets", {}).get("url", "")
+    return functools.partial(fetch_crm_from_sheets, sheets_url) if sheets_url else None
+
+def crm_data_loader():
+    """Loader used to fill the shared CRM store from the configured source"""
+    source = get_crm_source()
+    if source['kind'] == 'sql':
+        return lambda: sort_crm_by_date(load_crm_data_from_sql(source['url']))
+    return lambda: sort_crm_by_date(load_crm_data_for_startup())
+
+@st.cache_resource
+def get_crm_sql_database(url):
+    """Process-wide engine and reflected CRM table for a database URL"""
+    return {'engine': sa.create_engine(url), 'table': None, 'lock': threading.Lock()}
+
+def write_crm_sql_table(url, df):
+    """Replace the CRM table with a frame and (re)create its indexes"""
+    database = get_crm_sql_database(url)
+    with database['lock']:
+        hydrate_text_columns(df).to_sql(CRM_SQL_TABLE, database['engine'], if_exists='replace', index=False, chunksize=10_000)
+        table = sa.Table(CRM_SQL_TABLE, sa.MetaData(), autoload_with=database['engine'])
+        for col in CRM_SQL_INDEXED_COLUMNS:
+            if col in table.c:
+                sa.Index(f"ix_{CRM_SQL_TABLE}_{col}", table.c[col]).create(database['engine'], checkfirst=True)
+        database['table'] = table
+    return table
+
+def get_crm_sql_table(url):
+    """Return (engine, table) for the CRM database, seeding an empty database from the default loader"""
+    database = get_crm_sql_database(url)
+    if database['table'] is None:
+        if sa.inspect(database['engine']).has_table(CRM_SQL_TABLE):
+            database['table'] = sa.Table(CRM_SQL_TABLE, sa.MetaData(), autoload_with=database['engine'])
+        else:
+            write_crm_sql_table(url, load_crm_data_for_startup())
+    return database['engine'], database['table']
+
+def crm_sql_range_condition(table, col, bounds):
+    """BETWEEN over a column, comparing like the in-memory frame does
+    
+    float32 columns are stored widened (8.3 becomes 8.3000002) while pandas
+    compares them in float32, so their bounds are rounded to float32 too.
+    """
+    low, high = bounds
+    if col in CRM_FLOAT32_COLUMNS:
+        low, high = float(np.float32(low)), float(np.float32(high))
+    return table.c[col].between(low, high)
+
+def crm_sql_conditions(table, filters):
+    """Translate the Smart Filters into a SQL WHERE clause (an empty dict matches everything)"""
+    conditions = []
+    if 'date_range' in filters:
+        # Half-open day range so the call_date index can be used directly
+        date_start, date_end = filters['date_range']
+        conditions.append(table.c.call_date >= pd.Timestamp(date_start).to_pydatetime())
+        conditions.append(table.c.call_date < (pd.Timestamp(date_end) + pd.Timedelta(days=1)).to_pydatetime())
+    for key, col in CRM_DIMENSION_FILTERS.items():
+        if key in filters and col in table.c:
+            conditions.append(table.c[col].in_([str(value) for value in filters[key]]))
+    if 'satisfaction_range' in filters:
+        conditions.append(crm_sql_range_condition(table, 'customer_satisfaction', filters['satisfaction_range']))
+    if 'revenue_range' in filters:
+        conditions.append(crm_sql_range_condition(table, 'revenue_impact', filters['revenue_range']))
+    if filters.get('search'):
+        conditions.append(crm_sql_search_condition(table, filters['search']))
+    return sa.and_(sa.true(), *conditions)
+
+def crm_sql_search_condition(table, query):
+    """Translate a parsed search query into SQL (words and phrases become case-insensitive containment)"""
+    def clause_condition(clause):
+        if clause['field'] is not None and clause['field'] in table.c:
+            columns = [table.c[clause['field']]]
+        else:
+            columns = [table.c[col] for col in CRM_SEARCH_COLUMNS if col in table.c]
+        terms = [clause['text']] if clause['phrase'] or clause['field'] is not None else clause['words']
+        condition = sa.and_(*[
+            sa.or_(*[sa.cast(column, sa.String).icontains(term, autoescape=True) for column in columns])
+            for term in terms
+        ])
+        return sa.not_(condition) if clause['negate'] else condition
+    
+    return sa.and_(sa.true(), *[
+        sa.or_(*[clause_condition(clause) for clause in group])
+        for group in parse_search_query(query)
+    ])
+
+def load_crm_data_from_sql(url):
+    """Read the whole CRM table (used by views that need every record, e.g. editing)"""
+    engine, table = get_crm_sql_table(url)
+    with engine.connect() as conn:
+        return prepare_crm_frame(pd.read_sql(sa.select(table).order_by(table.c.call_date), conn))
+
+# Pushed-down queries are keyed by crm_source_version(), so any write makes them miss
+@region_cache('crm')
+def query_crm_rows(url, filters, version):
+    """Fetch only the rows matching the Smart Filters"""
+    engine, table = get_crm_sql_table(url)
+    with engine.connect() as conn:
+        query = sa.select(table).where(crm_sql_conditions(table, filters)).order_by(table.c.call_date)
+        return prepare_crm_frame(pd.read_sql(query, conn))
+
+@region_cache('aggregates')
+def query_crm_count(url, filters, version):
+    """Number of records matching the Smart Filters, counted by the database"""
+    engine, table = get_crm_sql_table(url)
+    with engine.connect() as conn:
+        return conn.execute(sa.select(sa.func.count()).select_from(table).where(crm_sql_conditions(table, filters))).scalar_one()
+
+def crm_sql_measure(table, col):
+    """A column as a numeric SQL expression (flags count as 0/1)"""
+    if col in CRM_BOOLEAN_COLUMNS:
+        return sa.case((table.c[col] == sa.true(), 1.0), (table.c[col] == sa.false(), 0.0))
+    return table.c[col]
+
+@region_cache('aggregates')
+def query_crm_cube(url, filters, version):
+    """build_crm_cube() computed by the database"""
+    engine, table = get_crm_sql_table(url)
+    dimensions = [
+        sa.func.date(table.c.call_date).label(dim) if dim == 'call_day' else table.c[dim]
+        for dim in CRM_CUBE_DIMENSIONS
+        if dim == 'call_day' or dim in table.c
+    ]
+    measures = {col: crm_sql_measure(table, col) for col in CRM_CUBE_COLUMNS if col in table.c}
+    for name, (columns, _, sql_measure) in CRM_CUBE_DERIVED.items():
+        if all(col in table.c for col in columns):
+            measures[name] = sql_measure(table.c)
+    stmt = sa.select(
+        *dimensions,
+        sa.func.count().label('calls'),
+        *[aggregate for name, value in measures.items() for aggregate in (
+            sa.func.sum(value).label(f"{name}_sum"), sa.func.count(value).label(f"{name}_count")
+        )]
+    ).where(crm_sql_conditions(table, filters)).group_by(*dimensions)
+    with engine.connect() as conn:
+        cube = pd.read_sql(stmt, conn)
+    
+    for col in cube.columns:
+        if col == 'call_day':
+            cube[col] = pd.to_datetime(cube[col])
+        elif col in CRM_CUBE_DIMENSIONS:
+            cube[col] = cube[col].astype('category')
+        elif col.endswith("_sum"):
+            cube[col] = cube[col].astype(float).fillna(0.0)
+        else:
+            cube[col] = cube[col].astype(np.int64)
+    return cube
+
+@region_cache('aggregates')
+def query_crm_agent_accumulator(url, filters, version):
+    """build_agent_accumulator() computed by the database"""
+    engine, table = get_crm_sql_table(url)
+    agent = table.c.voice_agent_name
+    measures = {col: crm_sql_measure(table, col) for col in AGENT_ACCUMULATOR_COLUMNS if col in table.c}
+    stmt = sa.select(
+        agent,
+        sa.func.count().label('calls'),
+        *[aggregate for col, value in measures.items() for aggregate in (
+            sa.func.count(value).label(f"{col}_count"),
+            sa.func.sum(value).label(f"{col}_sum"),
+            sa.func.sum(value * value).label(f"{col}_sumsq")
+        )]
+    ).where(crm_sql_conditions(table, filters), agent.is_not(None)).group_by(agent).order_by(agent)
+    with engine.connect() as conn:
+        accumulator = pd.read_sql(stmt, conn).set_index('voice_agent_name')
+    
+    for col in accumulator.columns:
+        if col == 'calls' or col.endswith("_count"):
+            accumulator[col] = accumulator[col].astype(np.int64)
+        else:
+            accumulator[col] = accumulator[col].astype(float).fillna(0.0)
+    return accumulator
+
+@region_cache('aggregates')
+def query_crm_filter_options(url, version):
+    """crm_filter_options() computed by the database"""
+    engine, table = get_crm_sql_table(url)
+    with engine.connect() as conn:
+        bounds = conn.execute(sa.select(
+            sa.func.min(table.c.call_date).label('date_min'),
+            sa.func.max(table.c.call_date).label('date_max'),
+            sa.func.min(table.c.customer_satisfaction).label('satisfaction_min'),
+            sa.func.max(table.c.customer_satisfaction).label('satisfaction_max'),
+            sa.func.min(table.c.revenue_impact).label('revenue_min'),
+            sa.func.max(table.c.revenue_impact).label('revenue_max')
+        )).mappings().one()
+        distinct = lambda col: [value for (value,) in conn.execute(
+            sa.select(table.c[col]).where(table.c[col].is_not(None)).distinct().order_by(table.c[col])
+        )]
+        options = {name: distinct(col) for name, col in CRM_DIMENSION_FILTERS.items() if col in table.c}
+    
+    options.update({
+        'date_min': pd.Timestamp(bounds['date_min']),
+        'date_max': pd.Timestamp(bounds['date_max']),
+        'satisfaction_min': float(bounds['satisfaction_min'] or 0),
+        'satisfaction_max': float(bounds['satisfaction_max'] or 0),
+        'revenue_min': float(bounds['revenue_min'] or 0),
+        'revenue_max': float(bounds['revenue_max'] or 0)
+    })
+    return options
+
+def get_crm_filter_options():
+    """Sidebar filter choices from the configured source"""
+    source = get_crm_source()
+    if source['kind'] == 'sql':
+        return query_crm_filter_options(source['url'], crm_source_version())
+    df = get_crm_data()
+    return crm_filter_options(df) if not df.empty else None
+
+def get_filtered_crm_kpis(df):
+    """Headline metrics for the session's filtered view, read from its KPI totals"""
+    total = get_crm_kpi_totals(df)
+    present = lambda name: f"{name}_count" in total.index and total[f"{name}_count"] > 0
+    mean = lambda name, default=float('nan'): float(total[f"{name}_sum"] / total[f"{name}_count"]) if present(name) else default
+    summed = lambda name: float(total[f"{name}_sum"]) if present(name) else 0.0
+    return {
+        'total_calls': int(total['calls']),
+        'success_rate': mean('call_success', 0.0),
+        'avg_satisfaction': mean('customer_satisfaction'),
+        'total_revenue': summed('revenue_impact'),
+        'avg_duration_seconds': mean('call_duration_seconds'),
+        'high_satisfaction': int(summed('high_satisfaction')),
+        'follow_ups': int(summed('follow_up_required'))
+    }
+
+def get_filtered_crm_aggregates(df, by):
+    """Calls, revenue and averages per value of a cube dimension for the session's filtered view"""
+    rollup = get_crm_rollup(df, (by,))
+    return pd.DataFrame({
+        by: rollup[by],
+        'calls': rollup['calls'],
+        'revenue_impact': rollup['revenue_impact_sum'],
+        'customer_satisfaction': rollup['customer_satisfaction'],
+        'call_success': rollup['call_success'],
+        'call_duration_seconds': rollup['call_duration_seconds']
+    })
+
+def get_top_crm_value(df, by):
+    """Most frequent value of a cube dimension in the session's filtered view ("N/A" if there is none)"""
+    groups = get_filtered_crm_aggregates(df, by)
+    return str(groups.loc[groups['calls'].idxmax(), by]) if not groups.empty else "N/A"
+
+def crm_view_corpus(df):
+    """The frame a CRM view was cut from, the view's row positions in it, and a cache key for it"""
+    source = get_crm_source()
+    if source['kind'] == 'sql':
+        # Only the filtered rows are in memory; they are their own corpus
+        frame_key = ('sql', crm_source_version(), freeze_cache_key(st.session_state.get('crm_filters')))
+        return df, np.arange(len(df)), frame_key
+    corpus = get_crm_data()
+    return corpus, corpus.index.get_indexer(df.index), ('crm', st.session_state.get('crm_version'))
+
+def rank_crm_search(df, query, page=0, page_size=10):
+    """One page of the records in df ranked by BM25 relevance to a search query
+    
+    Scores are computed over the whole dataset (so term statistics do not depend
+    on the other filters) and only the top (page + 1) * page_size are ordered.
+    Returns the page's rows in rank order and their scores.
+    """
+    corpus, positions, frame_key = crm_view_corpus(df)
+    mask, scores = evaluate_search_query(corpus, query, frame_key)
+    positions = positions[mask[positions]]
+    ranked = top_k_positions(scores[positions], (page + 1) * page_size)[page * page_size:]
+    return corpus.iloc[positions[ranked]], scores[positions[ranked]]
+
+def publish_crm_data(df, dirty=True):
+    """Publish a new CRM frame and log it for write-back to the backing store"""
+    df = sort_crm_by_date(df)
+    with get_shared_data_store()['lock']:
+        version = publish_shared_dataset('crm', df, dirty=dirty)
+        write_seq = log_crm_write({'edited': {}, 'added': [], 'deleted': []}, frame=df)
+        if crm_write_back_reaches_source():
+            record_shared_write('crm', write_seq)
+    return version
+
+def update_crm_data(update, added=None, deleted_ids=None, edited=None):
+    """Copy-on-write edit of the CRM store, logged for write-back to the backing store
+    
+    Appends, deletes and cell edits ({call_id: {column: value}}) are logged as
+    records and flushed as targeted INSERT/DELETE/UPDATE statements; any other
+    edit is logged as a replacement of the whole frame. Every write is
+    journaled against the version it produced.
+    """
+    frames = {}
+    def apply_update(df):
+        updated = update(df)
+        frames.update(old=df, new=sort_crm_by_date(updated))
+        frames['reordered'] = frames['new'] is not updated
+        return frames['new']
+    
+    replaced = added is None and deleted_ids is None and edited is None
+    # Loaded before taking the store lock, which is then held across the log append so the log is in version order
+    get_shared_dataset('crm', crm_data_loader())
+    with get_shared_data_store()['lock']:
+        version = update_shared_dataset('crm', apply_update, crm_data_loader())
+        record_shared_change('crm', version, {
+            'edited': {call_id: sorted(values) for call_id, values in (edited or {}).items()},
+            'added': added['call_id'].tolist() if added is not None else [],
+            'deleted': list(deleted_ids) if deleted_ids is not None else [],
+            'replaced': replaced,
+            'user': (st.session_state.get('user') or {}).get('name')
+        })
+        write_seq = log_crm_write({
+            'edited': edited or {},
+            'added': crm_wal_records(added) if added is not None else [],
+            'deleted': list(deleted_ids) if deleted_ids is not None else []
+        }, frame=frames['new'] if replaced else None)
+        if crm_write_back_reaches_source():
+            # Otherwise the refresher keeps replaying the edit onto what it downloads
+            record_shared_write('crm', write_seq)
+    carry_crm_caches(frames['old'], frames['new'], version, reordered=frames['reordered'])
+    return version
+
+def crm_sql_row(values):
+    """Plain Python values for one record's columns, coerced like the in-memory schema"""
+    row = pd.DataFrame([values])
+    if 'call_date' in row.columns:
+        row['call_date'] = pd.to_datetime(row['call_date'])
+    row = normalize_crm_dtypes(row).astype(object).iloc[0]
+    return {
+        col: None if pd.isna(value) else value.to_pydatetime() if isinstance(value, pd.Timestamp)
+        else value.item() if isinstance(value, np.generic) else value
+        for col, value in row.items()
+    }
+
+# Write-back pipeline
+# Every CRM write is appended to a local write-ahead log before the click
+# returns; a background thread flushes the log to the backing store in batches
+CRM_WAL_PATH = os.environ.get("CRM_WAL_PATH", os.path.join(".crm_cache", "crm_wal.jsonl"))
+# Local stand-in for the sheet: flushed batches are appended here when no database is configured
+CRM_OUTBOX_PATH = os.environ.get("CRM_OUTBOX_PATH", os.path.join(".crm_cache", "crm_outbox.jsonl"))
+# How long the flusher waits for more writes to join a batch
+WRITE_BACK_DELAY_SECONDS = 1.0
+WRITE_BACK_MAX_BATCH = 500
+# Failed flushes are retried after 2, 4, 8, ... seconds, up to the maximum
+WRITE_BACK_RETRY_SECONDS = 2
+WRITE_BACK_MAX_RETRY_SECONDS = 300
+
+@st.cache_resource
+def get_write_back_pipeline(path=CRM_WAL_PATH):
+    """Process-wide write-ahead log for CRM writes and the thread that flushes it
+
+    Entries a previous run logged but never flushed (the checkpoint file holds
+    the last flushed sequence number) are queued again on startup.
+    """
+    pipeline = {
+        'lock': threading.Lock(), 'wake': threading.Event(), 'path': path, 'log_file': None,
+        'sink': crm_write_back_sink(), 'pending': deque(), 'seq': 0, 'flushed_seq': 0,
+        'batches': 0, 'entries': 0, 'failures': 0, 'last_error': None, 'retry_at': None, 'last_flush_at': None
+    }
+
+    try:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        if os.path.exists(f"{path}.checkpoint"):
+            with open(f"{path}.checkpoint") as checkpoint_file:
+                pipeline['flushed_seq'] = pipeline['seq'] = int(checkpoint_file.read().strip() or 0)
+        if os.path.exists(path):
+            logged_bytes = 0
+            with open(path, "rb") as log_file:
+                for line in log_file:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # A write torn by a crash; it was never acknowledged
+                        break
+                    logged_bytes += len(line)
+                    pipeline['seq'] = max(pipeline['seq'], entry['seq'])
+                    if entry['seq'] > pipeline['flushed_seq']:
+                        pipeline['pending'].append(entry)
+            os.truncate(path, logged_bytes)
+        pipeline['log_file'] = open(path, "a", encoding='utf-8')
+    except OSError:
+        # No writable disk: writes are still flushed, but do not survive a restart
+        pass
+
+    threading.Thread(target=run_write_back_flusher, args=(pipeline,), daemon=True, name="crm-write-back").start()
+    if pipeline['pending']:
+        pipeline['wake'].set()
+    return pipeline
+
+def crm_write_back_sink():
+    """Function that writes a coalesced batch to the configured backing store"""
+    source = get_crm_source()
+    if source['kind'] == 'sql':
+        return functools.partial(write_back_to_sql, source['url'])
+    return functools.partial(write_back_to_outbox, CRM_OUTBOX_PATH)
+
+def crm_write_back_reaches_source():
+    """Whether flushed writes land where the CRM refresher reads from
+    
+    Only a database does; the outbox is a local record the sheet never sees.
+    """
+    return get_crm_source()['kind'] == 'sql'
+
+def wal_json_value(value):
+    """JSON fallback for the timestamps and numpy scalars in CRM records"""
+    if isinstance(value, np.generic):
+        return value.item()
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+def crm_wal_records(df):
+    """Records of a CRM frame as plain JSON values, texts inlined"""
+    return json.loads(hydrate_text_columns(normalize_crm_dtypes(df.copy())).to_json(orient='records', date_format='iso'))
+
+def log_crm_write(change, frame=None):
+    """Append a CRM write to the write-ahead log and wake the flusher
+
+    change holds the 'edited', 'added' and 'deleted' records; a write that
+    replaced the whole frame is logged with the frame, saved as a snapshot
+    next to the log, or inlined in the log as records when no snapshot can
+    be written.
+    """
+    pipeline = get_write_back_pipeline()
+    with pipeline['lock']:
+        pipeline['seq'] += 1
+        entry = dict(change, seq=pipeline['seq'], at=time.time(), frame=None)
+        if frame is not None:
+            frame_path = f"{pipeline['path']}.{entry['seq']}.arrow"
+            entry['frame'] = frame_path if write_crm_snapshot(frame, frame_path) else frame
+        if pipeline['log_file'] is not None:
+            logged = dict(entry, frame=entry['frame'] if frame is None or isinstance(entry['frame'], str) else crm_wal_records(frame))
+            pipeline['log_file'].write(json.dumps(logged, default=wal_json_value) + "\n")
+            pipeline['log_file'].flush()
+            os.fsync(pipeline['log_file'].fileno())
+        pipeline['pending'].append(entry)
+    pipeline['wake'].set()
+    return entry['seq']
+
+def coalesce_wal_entries(entries):
+    """Fold log entries into one batch: the last frame replacement, then the
+    edits, deletes and inserts made after it, with each record's edits merged
+    and records deleted in the batch dropping their edits and inserts"""
+    batch = {'frame': None, 'edited': {}, 'added': {}, 'deleted': {}}
+    for entry in entries:
+        if entry.get('frame') is not None:
+            # The frame already holds the effect of every earlier write
+            batch = {'frame': entry['frame'], 'edited': {}, 'added': {}, 'deleted': {}}
+        for call_id, values in entry['edited'].items():
+            if call_id in batch['added']:
+                batch['added'][call_id].update(values)
+            else:
+                batch['edited'].setdefault(call_id, {}).update(values)
+        for call_id in entry['deleted']:
+            batch['edited'].pop(call_id, None)
+            batch['added'].pop(call_id, None)
+            batch['deleted'][call_id] = None
+        for record in entry['added']:
+            batch['added'][record['call_id']] = dict(record)
+    batch['deleted'] = list(batch['deleted'])
+    return batch
+
+def wal_frame(frame):
+    """A logged frame replacement, loading it from its snapshot or records if needed"""
+    if isinstance(frame, list):
+        return prepare_crm_frame(pd.DataFrame(frame))
+    if isinstance(frame, str):
+        df = read_crm_snapshot(frame)
+        if df is None:
+            raise OSError(f"snapshot {frame} is missing")
+        return df
+    return frame
+
+def write_back_to_sql(url, batch):
+    """Apply a batch to the CRM table in one transaction
+
+    Inserted records are deleted first, so replaying a batch that was written
+    but not checkpointed before a crash leaves the table as it was.
+    """
+    if batch['frame'] is not None:
+        write_crm_sql_table(url, wal_frame(batch['frame']))
+    engine, table = get_crm_sql_table(url)
+    with engine.begin() as conn:
+        stale = batch['deleted'] + list(batch['added'])
+        if stale:
+            conn.execute(table.delete().where(table.c.call_id.in_(stale)))
+        # Records editing the same columns share one executemany UPDATE
+        updates = {}
+        for call_id, values in batch['edited'].items():
+            row = {col: value for col, value in crm_sql_row(values).items() if col in table.c and col != 'call_id'}
+            if row:
+                updates.setdefault(tuple(sorted(row)), []).append({f"b_{col}": value for col, value in dict(row, call_id=call_id).items()})
+        for columns, params in updates.items():
+            stmt = table.update().where(table.c.call_id == sa.bindparam('b_call_id')).values(
+                {col: sa.bindparam(f"b_{col}") for col in columns}
+            )
+            conn.execute(stmt, params)
+        if batch['added']:
+            rows = pd.DataFrame(list(batch['added'].values()))
+            rows['call_date'] = pd.to_datetime(rows['call_date'])
+            rows = normalize_crm_dtypes(rows)
+            rows[[col for col in rows.columns if col in table.c]].to_sql(CRM_SQL_TABLE, conn, if_exists='append', index=False)
+
+def write_back_to_outbox(path, batch):
+    """Append a batch to the local outbox file as one JSON line"""
+    record = {
+        'at': time.time(),
+        'replaced': len(wal_frame(batch['frame'])) if batch['frame'] is not None else None,
+        'edited': batch['edited'],
+        'added': list(batch['added'].values()),
+        'deleted': batch['deleted']
+    }
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "a", encoding='utf-8') as outbox:
+        outbox.write(json.dumps(record, default=wal_json_value) + "\n")
+        outbox.flush()
+        os.fsync(outbox.fileno())
+
+def flush_write_back(pipeline):
+    """Write the oldest pending log entries to the sink as one batch; False if the sink failed"""
+    with pipeline['lock']:
+        entries = list(pipeline['pending'])[:WRITE_BACK_MAX_BATCH]
+    if not entries:
+        return True
+
+    try:
+        pipeline['sink'](coalesce_wal_entries(entries))
+    except Exception as e:
+        with pipeline['lock']:
+            pipeline['failures'] += 1
+            pipeline['last_error'] = f"{type(e).__name__}: {e}"
+        return False
+
+    with pipeline['lock']:
+        for _ in entries:
+            pipeline['pending'].popleft()
+        pipeline['flushed_seq'] = entries[-1]['seq']
+        pipeline.update(
+            batches=pipeline['batches'] + 1, entries=pipeline['entries'] + len(entries),
+            failures=0, last_error=None, retry_at=None, last_flush_at=time.time()
+        )
+        try:
+            tmp_path = f"{pipeline['path']}.checkpoint.tmp"
+            with open(tmp_path, "w") as checkpoint_file:
+                checkpoint_file.write(str(pipeline['flushed_seq']))
+            os.replace(tmp_path, f"{pipeline['path']}.checkpoint")
+            # Once everything logged has been flushed the log can start over
+            if not pipeline['pending'] and pipeline['log_file'] is not None:
+                pipeline['log_file'].truncate(0)
+        except OSError:
+            pass
+    for entry in entries:
+        if isinstance(entry.get('frame'), str) and os.path.exists(entry['frame']):
+            os.remove(entry['frame'])
     return True
 
+def run_write_back_flusher(pipeline):
+    """Background loop that drains the write-ahead log, backing off while the sink fails"""
+    while True:
+        pipeline['wake'].wait()
+        # Let writes made right after this one join its batch
+        time.sleep(WRITE_BACK_DELAY_SECONDS)
+        pipeline['wake'].clear()
+        while pipeline['pending']:
+            if not flush_write_back(pipeline):
+                delay = min(WRITE_BACK_RETRY_SECONDS * 2 ** (pipeline['failures'] - 1), WRITE_BACK_MAX_RETRY_SECONDS)
+                pipeline['retry_at'] = time.time() + delay
+                # Setting the wake event (Flush Now) retries straight away
+                pipeline['wake'].wait(delay)
+                pipeline['wake'].clear()
+
+def write_back_stats():
+    """Queue depth and flush history of the write-back pipeline"""
+    pipeline = get_write_back_pipeline()
+    with pipeline['lock']:
+        return {
+            'pending': len(pipeline['pending']),
+            'batches': pipeline['batches'],
+            'entries': pipeline['entries'],
+            'failures': pipeline['failures'],
+            'last_error': pipeline['last_error'],
+            'retry_at': pipeline['retry_at'],
+            'last_flush_at': pipeline['last_flush_at']
+        }
+
+def crm_source_version():
+    """Cache key for what the CRM source serves
+
+    With a database this also counts flushed writes, since the database only
+    reflects an edit once the write-back pipeline has flushed it.
+    """
+    if get_crm_source()['kind'] == 'sql':
+        return (peek_shared_version('crm'), get_write_back_pipeline()['flushed_seq'])
+    return peek_shared_version('crm')
+
+# Change sets
+# Data editor edits are captured as {'edited': {call_id: {column: value}},
+# 'added': [record, ...], 'deleted': [call_id, ...]} and applied in one write
+def editor_change_set(delta, rows):
+    """Translate a data_editor delta (row positions into the displayed rows) into a change set"""
+    call_ids = rows['call_id'].tolist()
+    return {
+        'edited': {call_ids[int(row)]: dict(values) for row, values in delta.get('edited_rows', {}).items()},
+        'added': [dict(values) for values in delta.get('added_rows', []) if values],
+        'deleted': [call_ids[int(row)] for row in delta.get('deleted_rows', [])]
+    }
+
+def merge_change_sets(change_sets):
+    """Combine change sets in order; later edits of a cell win and deleted records drop their edits"""
+    merged = {'edited': {}, 'added': [], 'deleted': []}
+    for change_set in change_sets:
+        for call_id, values in change_set['edited'].items():
+            merged['edited'].setdefault(call_id, {}).update(values)
+        merged['added'].extend(change_set['added'])
+        merged['deleted'].extend(call_id for call_id in change_set['deleted'] if call_id not in merged['deleted'])
+    for call_id in merged['deleted']:
+        merged['edited'].pop(call_id, None)
+    return merged
+
+def count_changes(change_set):
+    """Number of edited, added and deleted records in a change set"""
+    return len(change_set['edited']) + len(change_set['added']) + len(change_set['deleted'])
+
+def changed_record_values(record, values):
+    """The values of an edit form that differ from the record it was filled from
+    
+    Texts are compared with the stored text and Yes/No fields as flags.
+    """
+    changed = {}
+    for col, value in values.items():
+        current = get_text(record.get(f"{col}_key")) or '' if col in TEXT_STORE_COLUMNS else record.get(col)
+        if col in CRM_BOOLEAN_COLUMNS:
+            unchanged = to_flag(value) == to_flag(current)
+        else:
+            unchanged = not pd.isna(current) and value == current
+        if not unchanged:
+            changed[col] = value
+    return changed
+
+def apply_crm_change_set(df, change_set, index):
+    """New CRM frame with a change set's cell edits applied
+    
+    Edited rows are found through the call_id index and only the edited
+    columns are copied; the rest of the frame is shared with the old version.
+    """
+    updates = {}
+    for call_id, values in change_set['edited'].items():
+        position = index.get(call_id)
+        if position is None:
+            continue
+        for col, value in values.items():
+            updates.setdefault(col, {})[df.index[position]] = value
+    
+    df = df.copy(deep=False)
+    for col, values in updates.items():
+        target = f"{col}_key" if col in TEXT_STORE_COLUMNS and f"{col}_key" in df.columns else col
+        values = pd.Series(values, dtype=object)
+        if target in df.columns:
+            df[target] = df[target].copy()
+            if pd.api.types.is_datetime64_any_dtype(df[target]):
+                values = pd.to_datetime(values)
+            elif pd.api.types.is_numeric_dtype(df[target]) and not pd.api.types.is_bool_dtype(df[target]):
+                values = pd.to_numeric(values, errors='coerce')
+        set_crm_values(df, values.index, {col: values})
+    return df
+
+def commit_crm_change_set(change_set):
+    """Write a change set to the CRM store (and database) as one journaled version"""
+    added = None
+    if change_set['added']:
+        added = pd.DataFrame(change_set['added'])
+        if 'call_id' not in added.columns:
+            added['call_id'] = None
+        missing = added['call_id'].isna() | (added['call_id'].astype(str).str.strip() == "")
+        added.loc[missing, 'call_id'] = [f"CALL_{uuid.uuid4().hex[:8].upper()}" for _ in range(int(missing.sum()))]
+        added = prepare_crm_frame(added)
+    deleted = change_set['deleted'] or None
+    
+    def apply_changes(df):
+        if change_set['edited']:
+            # A refresh replays the change set onto a freshly downloaded frame, which has no cached index
+            frame_key = ('crm', peek_shared_version('crm')) if df is peek_shared_dataset('crm') else None
+            df = apply_crm_change_set(df, change_set, get_crm_id_index(df, frame_key))
+        if deleted:
+            df = df[~df['call_id'].isin(deleted)]
+        if added is not None:
+            df = concat_crm_frames([df, added])
+        return df
+    
+    return update_crm_data(apply_changes, added=added, deleted_ids=deleted, edited=change_set['edited'] or None)
+
+# Data editing functions
 def add_new_record(new_record):
     """Add a new record to the CRM data"""
-    if 'crm_data' not in st.session_state:
-        st.session_state.crm_data = load_data_from_google_sheets()
-    
     # Add new record
     new_df = pd.DataFrame([new_record])
-    st.session_state.crm_data = pd.concat([st.session_state.crm_data, new_df], ignore_index=True)
+    new_df['call_date'] = pd.to_datetime(new_df['call_date'])
+    update_crm_data(lambda df: concat_crm_frames([df, new_df]), added=new_df)
     
     return True
 
 def delete_records(record_ids):
     """Delete records from CRM data"""
-    if 'crm_data' not in st.session_state:
+    if peek_shared_dataset('crm') is None and get_crm_source()['kind'] != 'sql':
         return False
     
     # Remove records
-    st.session_state.crm_data = st.session_state.crm_data[
-        ~st.session_state.crm_data['call_id'].isin(record_ids)
-    ]
+    update_crm_data(lambda df: df[~df['call_id'].isin(record_ids)], deleted_ids=record_ids)
     
     return True
 
+def clean_crm_data():
+    """Remove duplicate records and fill missing numeric values with the column median"""
+    def clean(df):
+        df = df.drop_duplicates()
+        numeric_columns = df.select_dtypes(include=[np.number]).columns
+        return df.assign(**{col: df[col].fillna(df[col].median()) for col in numeric_columns})
+    
+    update_crm_data(clean)
+    return get_crm_data()
+
+def editor_column_config(values):
+    """Pick a data editor column type that matches the compact dtype of a column"""
+    label = values.name.replace("_", " ").title()
+    
+    if pd.api.types.is_bool_dtype(values):
+        return st.column_config.CheckboxColumn(label, width="small")
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        return st.column_config.SelectboxColumn(label, options=list(values.cat.categories), width="medium")
+    if pd.api.types.is_numeric_dtype(values):
+        return st.column_config.NumberColumn(label, width="medium")
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return st.column_config.DatetimeColumn(label, width="medium")
+    return st.column_config.TextColumn(
+        label,
+        width="medium" if values.name not in ['transcript', 'call_summary'] else "large"
+    )
+
+# Server-side table paging
+TABLE_PAGE_SIZES = [25, 50, 100, 250, 500]
+# Grid column filters: an optional comparison, then a value
+TABLE_FILTER_PATTERN = re.compile(r"^\s*(>=|<=|!=|>|<|=)?\s*(.*?)\s*$")
+TABLE_FILTER_OPERATORS = {
+    '>=': operator.ge, '<=': operator.le, '>': operator.gt,
+    '<': operator.lt, '=': operator.eq, '!=': operator.ne
+}
+
+def table_sort_order(df, column, descending=False, frame_key=None):
+    """Row positions of a frame ordered by one column (stable, missing values last)"""
+    def compute():
+        values = df[column].reset_index(drop=True)
+        return values.sort_values(ascending=not descending, kind='stable', na_position='last').index.to_numpy()
+    
+    if frame_key is None:
+        return compute()
+    return cached_in_region('filters', ('table_order', frame_key, column, descending, len(df)), compute)
+
+def table_column_mask(df, column, expression, frame_key=None):
+    """Rows matching a grid column filter
+    
+    Numbers and dates take a comparison ("> 8", "<= 2024-06-30", a bare value
+    means equal; dates compare by day); other columns match case-insensitive
+    containment, evaluated once per category for categoricals.
+    """
+    def compute():
+        values = df[column]
+        op, operand = TABLE_FILTER_PATTERN.match(expression).groups()
+        compare = TABLE_FILTER_OPERATORS[op or '=']
+        
+        if pd.api.types.is_bool_dtype(values):
+            return np.asarray(compare(values, to_flag(pd.Series([operand])).iloc[0]), dtype=bool)
+        if pd.api.types.is_datetime64_any_dtype(values):
+            try:
+                target = pd.Timestamp(operand).normalize()
+            except ValueError:
+                return np.zeros(len(df), dtype=bool)
+            return np.asarray(compare(values.dt.normalize(), target), dtype=bool)
+        if pd.api.types.is_numeric_dtype(values):
+            try:
+                target = float(operand)
+            except ValueError:
+                return np.zeros(len(df), dtype=bool)
+            return np.asarray(compare(values, target), dtype=bool)
+        
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            hits = np.asarray(values.cat.categories.astype(str).str.contains(operand, case=False, regex=False), dtype=bool)
+            codes = values.cat.codes.to_numpy()
+            matches = np.append(hits, False)[codes]
+        else:
+            matches = values.astype('string').str.contains(operand, case=False, regex=False).fillna(False).to_numpy(dtype=bool)
+        return ~matches if op == '!=' else matches
+    
+    if frame_key is None:
+        return compute()
+    return cached_in_region('filters', ('table_filter', frame_key, column, expression, len(df)), compute)
+
+def table_row_positions(df, sort_column=None, descending=False, column_filters=None, store_view=False):
+    """Positions in df of the rows a grid shows, in display order (None for every row in table order)
+    
+    With store_view, df is a view of the shared CRM data: the sort order and
+    column filter masks are computed once per data version over the whole store,
+    shared between sessions, and the view only picks its own rows out of them.
+    """
+    column_filters = {column: expression for column, expression in (column_filters or {}).items() if expression.strip()}
+    if sort_column is None and not column_filters:
+        return None
+    
+    if store_view:
+        corpus, positions, frame_key = crm_view_corpus(df)
+    else:
+        corpus, positions, frame_key = df, None, None
+    
+    order = table_sort_order(corpus, sort_column, descending, frame_key) if sort_column is not None else np.arange(len(corpus))
+    if positions is not None:
+        in_view = np.zeros(len(corpus), dtype=bool)
+        in_view[positions] = True
+        order = order[in_view[order]]
+    for column, expression in column_filters.items():
+        order = order[table_column_mask(corpus, column, expression, frame_key)[order]]
+    
+    if positions is not None:
+        # Map store positions back to positions in the view
+        view_positions = np.empty(len(corpus), dtype=np.int64)
+        view_positions[positions] = np.arange(len(positions))
+        order = view_positions[order]
+    return order
+
+# HTML table rendering
+# Long text columns: (cell CSS class, characters kept when truncating)
+HTML_TEXT_COLUMNS = {
+    'transcript': ('transcript-cell', 200),
+    'call_summary': ('transcript-cell', 200),
+    'pain_points': ('long-text-cell', 100),
+    'technical_requirements': ('long-text-cell', 100),
+    'keyword_tags': ('long-text-cell', 100)
+}
+HTML_STATUS_COLUMNS = ['call_success', 'appointment_scheduled']
+HTML_CURRENCY_COLUMNS = ['cost', 'revenue_impact', 'customer_lifetime_value', 'deal_size_estimate']
+HTML_PERCENT_COLUMNS = ['sentiment_score', 'confidence_score', 'ai_accuracy_score', 'conversion_probability']
+HTML_MISSING_CELL = '<em style="color: #6c757d;">N/A</em>'
+
+def escape_html_values(values):
+    """HTML-escape a column of strings (quotes included, so results are safe in attributes)"""
+    return (
+        values.str.replace('&', '&amp;', regex=False)
+        .str.replace('<', '&lt;', regex=False)
+        .str.replace('>', '&gt;', regex=False)
+        .str.replace('"', '&quot;', regex=False)
+        .str.replace("'", '&#x27;', regex=False)
+    )
+
+def format_html_column(values, truncate=True):
+    """Cell HTML for a whole column, formatted in one pass with its column's rule"""
+    name = values.name
+    missing = values.isna().to_numpy()
+    
+    if name in HTML_TEXT_COLUMNS:
+        css_class, limit = HTML_TEXT_COLUMNS[name]
+        text = values.astype(str)
+        if truncate:
+            long = (text.str.len() > limit).to_numpy()
+            shown = escape_html_values(text.str.slice(0, limit)) + np.where(long, "...", "")
+            title = np.where(long, ' title="' + escape_html_values(text) + '"', "")
+        else:
+            shown, title = escape_html_values(text), ""
+        cells = f'<div class="{css_class}"' + title + '>' + shown + '</div>'
+    elif name in HTML_STATUS_COLUMNS:
+        text = values.astype(str)
+        flags = text.str.lower()
+        cells = np.select(
+            [flags.isin(['true', 'yes']).to_numpy(), flags.isin(['false', 'no']).to_numpy()],
+            ['<span class="status-success">Yes</span>', '<span class="status-danger">No</span>'],
+            escape_html_values(text)
+        )
+    elif name == 'customer_satisfaction':
+        scores = pd.to_numeric(values, errors='coerce').astype(float).round(2)
+        badge = np.select([scores >= 9, scores >= 7], ['status-success', 'status-warning'], 'status-danger')
+        cells = '<span class="' + badge + '">' + scores.astype(str) + '</span>'
+    elif name in HTML_CURRENCY_COLUMNS:
+        amounts = pd.to_numeric(values, errors='coerce').astype(float)
+        cells = np.where(
+            amounts.fillna(0).to_numpy() != 0,
+            '<span style="color: #28a745; font-weight: bold;">' + amounts.map('${:,.2f}'.format) + '</span>',
+            '<span style="color: #6c757d;">$0.00</span>'
+        )
+    elif name in HTML_PERCENT_COLUMNS:
+        ratios = pd.to_numeric(values, errors='coerce').astype(float)
+        cells = '<span style="color: #007bff; font-weight: bold;">' + pd.Series(np.char.mod('%.1f%%', ratios.to_numpy() * 100), index=values.index) + '</span>'
+    else:
+        cells = '<span style="color: #212529;">' + escape_html_values(values.astype(str)) + '</span>'
+    
+    cells = np.asarray(cells, dtype=object)
+    return np.where(missing, HTML_MISSING_CELL, cells)
+
+def render_enhanced_html_table(df, truncate=True, show_index=False, enable_selection=False):
+    """Render a frame as the styled enhanced-table HTML, one vectorized formatter per column"""
+    headers = ['<th>Index</th>'] * show_index + ['<th>Select</th>'] * enable_selection + [
+        f'<th>{html.escape(str(col).replace("_", " ").title())}</th>' for col in df.columns
+    ]
+    
+    index = escape_html_values(pd.Series(df.index.astype(str), dtype=object)).to_numpy()
+    rows = np.full(len(df), '<tr>', dtype=object)
+    if show_index:
+        rows = rows + '<td>' + index + '</td>'
+    if enable_selection:
+        rows = rows + '<td><input type="checkbox" id="row_' + index + '"></td>'
+    for col in df.columns:
+        rows = rows + '<td>' + format_html_column(df[col], truncate) + '</td>'
+    
+    return (
+        '<div class="dataframe-container"><table class="enhanced-table"><thead><tr>'
+        + ''.join(headers) + '</tr></thead><tbody>'
+        + ''.join(rows + '</tr>') + '</tbody></table></div>'
+    )
+
 # Enhanced data display function with editing capabilities
-def display_enhanced_dataframe_with_editing(df, title="Data Table", key_prefix="table", allow_editing=True):
-    """Display dataframe with enhanced styling and editing capabilities"""
+def display_enhanced_dataframe_with_editing(df, title="Data Table", key_prefix="table", allow_editing=True, store_view=False):
+    """Display dataframe with enhanced styling and editing capabilities
+    
+    Sorting, column filters and paging run server-side and only the visible page
+    is sent to the browser. Pass store_view=True when df is a view of the shared
+    CRM data so sort orders and filter masks are shared per data version.
+    """
     if df.empty:
         st.warning("No data to display")
         return df
@@ -640,8 +3725,16 @@ def display_enhanced_dataframe_with_editing(df, title="Data Table", key_prefix="
         
         with col4:
             if st.button(f"💾 Save Changes", key=f"{key_prefix}_save"):
-                save_data_changes(df)
-                st.success("✅ Changes saved successfully!")
+                # Pending change sets, one per editor window the user touched
+                pending = st.session_state.pop(f'{key_prefix}_pending_changes', {})
+                change_set = merge_change_sets(pending.values())
+                if count_changes(change_set):
+                    commit_crm_change_set(change_set)
+                    for editor_key in pending:
+                        st.session_state.pop(editor_key, None)
+                    st.success(f"✅ Saved changes to {count_changes(change_set)} records!")
+                else:
+                    st.info("No changes to save")
     
     # Column selection for display
     with st.expander("🔧 Customize Table Display", expanded=False):
@@ -649,7 +3742,7 @@ def display_enhanced_dataframe_with_editing(df, title="Data Table", key_prefix="
         
         with col1:
             st.write("**Select Columns to Display:**")
-            all_columns = list(df.columns)
+            all_columns = crm_column_names(df)
             
             # Default high-priority columns
             default_cols = [col for col in ['call_id', 'customer_name', 'call_date', 'call_category', 
@@ -665,7 +3758,7 @@ def display_enhanced_dataframe_with_editing(df, title="Data Table", key_prefix="
         
         with col2:
             st.write("**Display Options:**")
-            max_rows = st.number_input("Max rows to display", min_value=10, max_value=1000, value=50, key=f"{key_prefix}_rows")
+            page_size = st.selectbox("Rows per page", TABLE_PAGE_SIZES, index=1, key=f"{key_prefix}_rows")
             truncate_text = st.checkbox("Truncate long text", value=True, key=f"{key_prefix}_truncate")
             show_index = st.checkbox("Show row index", value=False, key=f"{key_prefix}_index")
             enable_selection = st.checkbox("Enable row selection", value=allow_editing, key=f"{key_prefix}_select")
@@ -674,129 +3767,95 @@ def display_enhanced_dataframe_with_editing(df, title="Data Table", key_prefix="
         st.warning("Please select at least one column to display")
         return df
     
-    # Filter dataframe
-    display_df = df[selected_columns].head(max_rows)
+    # Sort and filter over the whole frame, then send only the requested page
+    grid_columns = [col for col in df.columns if col not in TEXT_KEY_COLUMNS]
+    col1, col2, col3, col4 = st.columns([2, 1, 2, 2])
+    with col1:
+        sort_column = st.selectbox("Sort by", ["(table order)"] + grid_columns, key=f"{key_prefix}_sort")
+    with col2:
+        descending = st.checkbox("Descending", key=f"{key_prefix}_desc")
+    with col3:
+        filter_column = st.selectbox("Filter column", ["(none)"] + grid_columns, key=f"{key_prefix}_filter_col")
+    with col4:
+        filter_expression = st.text_input(
+            "Filter value", key=f"{key_prefix}_filter_value",
+            placeholder="text, or > 8, <= 2024-06-30", disabled=filter_column == "(none)"
+        )
+    
+    positions = table_row_positions(
+        df,
+        sort_column=None if sort_column == "(table order)" else sort_column,
+        descending=descending,
+        column_filters={filter_column: filter_expression} if filter_column != "(none)" else None,
+        store_view=store_view
+    )
+    matching_count = len(df) if positions is None else len(positions)
+    page_count = max((matching_count + page_size - 1) // page_size, 1)
+    # Keep the page number valid when filters shrink the result
+    if st.session_state.get(f"{key_prefix}_page", 1) > page_count:
+        st.session_state[f"{key_prefix}_page"] = page_count
+    page = st.number_input(f"Page (of {page_count})", min_value=1, max_value=page_count, key=f"{key_prefix}_page")
+    
+    window = slice((page - 1) * page_size, page * page_size)
+    page_rows = df.iloc[window] if positions is None else df.iloc[positions[window]]
+    display_df = select_crm_columns(page_rows, selected_columns)
     
     # Data editor for editing capabilities
     if allow_editing and check_permission("write") and enable_selection:
         st.markdown("#### 📝 Interactive Data Editor")
         
-        edited_df = st.data_editor(
+        # Edits are tracked by row position, so each page window (and data version) gets its own editor
+        editor_key = (
+            f"{key_prefix}_editor_{sort_column}_{descending}_{filter_column}_{filter_expression}"
+            f"_{page}_{page_size}_{peek_shared_version('crm')}"
+        )
+        st.data_editor(
             display_df,
             use_container_width=True,
             num_rows="dynamic",
-            key=f"{key_prefix}_editor",
-            column_config={
-                col: st.column_config.TextColumn(
-                    col.replace("_", " ").title(),
-                    width="medium" if col not in ['transcript', 'call_summary'] else "large"
-                ) for col in selected_columns
-            }
+            key=editor_key,
+            column_config={col: editor_column_config(display_df[col]) for col in selected_columns}
         )
         
-        # Update the original dataframe with changes
-        if not edited_df.equals(display_df):
-            # Update the main dataframe
-            for col in selected_columns:
-                if col in df.columns:
-                    df.loc[display_df.index, col] = edited_df[col]
+        # Keep only the editor's row-level delta; the shared frame is read-only
+        if 'call_id' in page_rows.columns:
+            pending = st.session_state.setdefault(f'{key_prefix}_pending_changes', {})
+            change_set = editor_change_set(st.session_state.get(editor_key, {}), page_rows)
+            if count_changes(change_set):
+                pending[editor_key] = change_set
+            else:
+                pending.pop(editor_key, None)
             
-            st.info("💡 Changes made. Click 'Save Changes' to persist.")
+            changed_records = count_changes(merge_change_sets(pending.values()))
+            if changed_records:
+                st.info(f"💡 {changed_records} records changed. Click 'Save Changes' to persist.")
+        else:
+            st.caption("Edits to this summary view are not saved.")
     
     # Enhanced HTML table generation (fallback display)
     else:
-        def generate_enhanced_html_table(df, truncate=True):
-            html = '<div class="dataframe-container"><table class="enhanced-table">'
-            
-            # Headers
-            html += '<thead><tr>'
-            if show_index:
-                html += '<th>Index</th>'
-            if enable_selection:
-                html += '<th>Select</th>'
-            for col in df.columns:
-                html += f'<th>{col.replace("_", " ").title()}</th>'
-            html += '</tr></thead><tbody>'
-            
-            # Rows
-            for idx, row in df.iterrows():
-                html += '<tr>'
-                if show_index:
-                    html += f'<td>{idx}</td>'
-                if enable_selection:
-                    html += f'<td><input type="checkbox" id="row_{idx}"></td>'
-                
-                for col in df.columns:
-                    value = row[col]
-                    
-                    # Handle different data types and apply appropriate styling
-                    if pd.isna(value):
-                        cell_content = '<em style="color: #6c757d;">N/A</em>'
-                    elif col in ['transcript', 'call_summary']:
-                        # Special handling for long text fields
-                        if truncate and len(str(value)) > 200:
-                            truncated = str(value)[:200] + "..."
-                            cell_content = f'<div class="transcript-cell" title="{str(value).replace('"', '&quot;')}">{truncated}</div>'
-                        else:
-                            cell_content = f'<div class="transcript-cell">{str(value)}</div>'
-                    elif col in ['pain_points', 'technical_requirements', 'keyword_tags']:
-                        # Medium text fields
-                        if truncate and len(str(value)) > 100:
-                            truncated = str(value)[:100] + "..."
-                            cell_content = f'<div class="long-text-cell" title="{str(value).replace('"', '&quot;')}">{truncated}</div>'
-                        else:
-                            cell_content = f'<div class="long-text-cell">{str(value)}</div>'
-                    elif col in ['call_success', 'appointment_scheduled']:
-                        # Status indicators
-                        if str(value).lower() == 'yes':
-                            cell_content = f'<span class="status-success">{value}</span>'
-                        elif str(value).lower() == 'no':
-                            cell_content = f'<span class="status-danger">{value}</span>'
-                        else:
-                            cell_content = str(value)
-                    elif col == 'customer_satisfaction':
-                        # Satisfaction scoring
-                        score = float(value) if pd.notna(value) else 0
-                        if score >= 9:
-                            cell_content = f'<span class="status-success">{score}</span>'
-                        elif score >= 7:
-                            cell_content = f'<span class="status-warning">{score}</span>'
-                        else:
-                            cell_content = f'<span class="status-danger">{score}</span>'
-                    elif col in ['cost', 'revenue_impact', 'customer_lifetime_value', 'deal_size_estimate']:
-                        # Currency formatting
-                        if pd.notna(value) and value != 0:
-                            cell_content = f'<span style="color: #28a745; font-weight: bold;">${float(value):,.2f}</span>'
-                        else:
-                            cell_content = '<span style="color: #6c757d;">$0.00</span>'
-                    elif col in ['sentiment_score', 'confidence_score', 'ai_accuracy_score', 'conversion_probability']:
-                        # Percentage formatting
-                        if pd.notna(value):
-                            cell_content = f'<span style="color: #007bff; font-weight: bold;">{float(value):.1%}</span>'
-                        else:
-                            cell_content = '<span style="color: #6c757d;">N/A</span>'
-                    else:
-                        cell_content = f'<span style="color: #212529;">{str(value)}</span>'
-                    
-                    html += f'<td>{cell_content}</td>'
-                html += '</tr>'
-            
-            html += '</tbody></table></div>'
-            return html
-        
-        # Display the enhanced table
-        html_table = generate_enhanced_html_table(display_df, truncate_text)
+        # Display the enhanced table, rendered once per data version, page window and display options
+        render_key = (
+            'html_table', key_prefix, crm_source_version(), freeze_cache_key(st.session_state.get('crm_filters')),
+            sort_column, descending, filter_column, filter_expression, page, page_size,
+            tuple(selected_columns), truncate_text, show_index, enable_selection
+        )
+        html_table = cached_in_region(
+            'renders', render_key,
+            lambda: render_enhanced_html_table(display_df, truncate_text, show_index, enable_selection)
+        )
         st.markdown(html_table, unsafe_allow_html=True)
     
     # Additional table info and actions
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        st.info(f"📊 Showing {len(display_df)} of {len(df)} records")
+        start_row = (page - 1) * page_size
+        st.info(f"📊 Showing rows {start_row + min(len(display_df), 1)}–{start_row + len(display_df)} of {matching_count} matching records")
     
     with col2:
         if st.button(f"📥 Export CSV", key=f"{key_prefix}_export"):
-            csv = df.to_csv(index=False)
+            csv = hydrate_text_columns(df).to_csv(index=False)
             st.download_button(
                 label="⬇️ Download CSV",
                 data=csv,
@@ -809,7 +3868,7 @@ def display_enhanced_dataframe_with_editing(df, title="Data Table", key_prefix="
         if st.button(f"📊 Export Excel", key=f"{key_prefix}_excel"):
             output = io.BytesIO()
             with pd.ExcelWriter(output, engine='openpyxl') as writer:
-                df.to_excel(writer, sheet_name='CRM_Data', index=False)
+                hydrate_text_columns(df).to_excel(writer, sheet_name='CRM_Data', index=False)
             
             st.download_button(
                 label="⬇️ Download Excel",
@@ -821,7 +3880,7 @@ def display_enhanced_dataframe_with_editing(df, title="Data Table", key_prefix="
     
     with col4:
         if st.button(f"🔄 Refresh Data", key=f"{key_prefix}_refresh"):
-            st.cache_data.clear()
+            refresh_cache_region('crm')
             st.rerun()
     
     # Show add/edit forms if requested
@@ -942,11 +4001,10 @@ def show_edit_record_form(key_prefix, df):
         st.markdown("#### ✏️ Edit Call Record")
         
         # Select record to edit
-        call_ids = df['call_id'].tolist()
-        selected_call_id = st.selectbox("Select Call to Edit", call_ids, key=f"edit_select_{key_prefix}")
+        selected_call_id = crm_record_picker("Select Call to Edit", df, f"edit_select_{key_prefix}")
         
         if selected_call_id:
-            record = df[df['call_id'] == selected_call_id].iloc[0]
+            record = get_crm_records(df, [selected_call_id]).iloc[0]
             
             with st.form(f"edit_record_{key_prefix}"):
                 col1, col2, col3 = st.columns(3)
@@ -973,39 +4031,40 @@ def show_edit_record_form(key_prefix, df):
                 with col3:
                     call_success = st.selectbox("Call Success", 
                         ["Yes", "No"],
-                        index=["Yes", "No"].index(record.get('call_success', 'Yes')) if record.get('call_success') in ["Yes", "No"] else 0
+                        index=0 if to_flag(record.get('call_success', True)) else 1
                     )
                     customer_tier = st.selectbox("Customer Tier", 
                         ["Premium", "Standard", "Basic"],
                         index=["Premium", "Standard", "Basic"].index(record.get('customer_tier', 'Standard')) if record.get('customer_tier') in ["Premium", "Standard", "Basic"] else 1
                     )
                 
-                transcript = st.text_area("Call Transcript", value=record.get('transcript', ''), height=100)
-                call_summary = st.text_area("Call Summary", value=record.get('call_summary', ''), height=60)
+                transcript = st.text_area("Call Transcript", value=get_text(record.get('transcript_key')) or '', height=100)
+                call_summary = st.text_area("Call Summary", value=get_text(record.get('call_summary_key')) or '', height=60)
                 
                 col1, col2 = st.columns(2)
                 
                 with col1:
                     if st.form_submit_button("💾 Save Changes", use_container_width=True):
-                        # Update the record in the dataframe
-                        mask = df['call_id'] == selected_call_id
-                        df.loc[mask, 'customer_name'] = customer_name
-                        df.loc[mask, 'voice_agent_name'] = voice_agent_name
-                        df.loc[mask, 'call_category'] = call_category
-                        df.loc[mask, 'customer_satisfaction'] = customer_satisfaction
-                        df.loc[mask, 'call_outcome'] = call_outcome
-                        df.loc[mask, 'revenue_impact'] = revenue_impact
-                        df.loc[mask, 'call_success'] = call_success
-                        df.loc[mask, 'customer_tier'] = customer_tier
-                        df.loc[mask, 'transcript'] = transcript
-                        df.loc[mask, 'call_summary'] = call_summary
-                        
-                        if save_data_changes(df):
+                        # Only the fields that changed are written, as one journaled change set
+                        changed = changed_record_values(record, {
+                            'customer_name': customer_name,
+                            'voice_agent_name': voice_agent_name,
+                            'call_category': call_category,
+                            'customer_satisfaction': customer_satisfaction,
+                            'call_outcome': call_outcome,
+                            'revenue_impact': revenue_impact,
+                            'call_success': call_success,
+                            'customer_tier': customer_tier,
+                            'transcript': transcript,
+                            'call_summary': call_summary
+                        })
+                        if changed:
+                            commit_crm_change_set({'edited': {selected_call_id: changed}, 'added': [], 'deleted': []})
                             st.success("✅ Record updated successfully!")
-                            st.session_state[f'show_edit_form_{key_prefix}'] = False
-                            st.rerun()
                         else:
-                            st.error("❌ Failed to update record")
+                            st.info("No changes to save")
+                        st.session_state[f'show_edit_form_{key_prefix}'] = False
+                        st.rerun()
                 
                 with col2:
                     if st.form_submit_button("❌ Cancel", use_container_width=True):
@@ -1020,19 +4079,13 @@ def show_delete_records_form(key_prefix, df):
         st.warning("⚠️ This action cannot be undone. Please select records carefully.")
         
         # Multi-select for records to delete
-        call_ids = df['call_id'].tolist()
-        selected_records = st.multiselect(
-            "Select Records to Delete",
-            call_ids,
-            key=f"delete_select_{key_prefix}",
-            format_func=lambda x: f"{x} - {df[df['call_id']==x]['customer_name'].iloc[0]} ({df[df['call_id']==x]['call_category'].iloc[0]})"
-        )
+        selected_records = crm_record_picker("Select Records to Delete", df, f"delete_select_{key_prefix}", multiple=True)
         
         if selected_records:
             st.markdown(f"**Records to be deleted: {len(selected_records)}**")
             
             # Show preview of records to be deleted
-            preview_df = df[df['call_id'].isin(selected_records)][['call_id', 'customer_name', 'call_date', 'call_category']]
+            preview_df = get_crm_records(df, selected_records)[['call_id', 'customer_name', 'call_date', 'call_category']]
             st.dataframe(preview_df, use_container_width=True)
             
             col1, col2 = st.columns(2)
@@ -1126,8 +4179,7 @@ def show_calendar_page():
     st.markdown("## 📅 Live Calendar & Appointment Management")
     
     # Load calendar events
-    if 'calendar_events' not in st.session_state:
-        st.session_state.calendar_events = load_calendar_events()
+    events_df = get_calendar_events()
     
     # Calendar configuration
     calendar_options = {
@@ -1154,7 +4206,7 @@ def show_calendar_page():
     
     # Convert events to calendar format
     calendar_events = []
-    for _, event in st.session_state.calendar_events.iterrows():
+    for _, event in events_df.iterrows():
         color_map = {
             "Demo": "#007bff",
             "Follow-up": "#28a745", 
@@ -1218,53 +4270,39 @@ def show_calendar_page():
         
         st.markdown('</div>', unsafe_allow_html=True)
     
-    with st.expander("➕ Add New Appointment", expanded=False):
-    with st.form("add_appointment"):
-        title = st.text_input("Title*", placeholder="e.g., Demo with Customer")
-        customer = st.text_input("Customer", placeholder="Customer name")
-        agent = st.selectbox("Agent", ["AI Agent Emma", "AI Agent Alex", "AI Agent Sophia", "Jessica Martinez"])
-
-        col1, col2 = st.columns(2)
-        with col1:
-            start_date = st.date_input("Start Date", value=datetime.now().date())
-            start_time = st.time_input("Start Time", value=datetime.now().time())
-        with col2:
-            duration = st.selectbox("Duration", ["30 min", "1 hour", "1.5 hours", "2 hours"])
-            appointment_type = st.selectbox("Type", ["Demo", "Follow-up", "Support", "Sales Call", "Meeting"])
-
-        description = st.text_area("Description", placeholder="Additional details...")
-
-        if st.form_submit_button("📅 Schedule Appointment", use_container_width=True):
-            if title:
-                start_dt = datetime.combine(start_date, start_time)
-                end_dt = start_dt + timedelta(minutes={"30 min": 30, "1 hour": 60, "1.5 hours": 90, "2 hours": 120}[duration])
-                new_event = {
-                    "id": str(uuid.uuid4()),
-                    "title": title,
-                    "start": start_dt.isoformat(),
-                    "end": end_dt.isoformat(),
-                    "description": description,
-                    "customer": customer,
-                    "agent": agent,
-                    "type": appointment_type,
-                    "status": "Scheduled"
-                }
-                st.session_state.calendar_events = pd.concat(
-                    [st.session_state.get("calendar_events", pd.DataFrame()), pd.DataFrame([new_event])],
-                    ignore_index=True
-                )
-                st.success("✅ Appointment scheduled!")
-
-with st.expander("✏️ Edit Appointment", expanded=False):
-    if "calendar_events" in st.session_state and not st.session_state.calendar_events.empty:
-        event_titles = [
-            f"{row['title']} ({pd.to_datetime(row['start']).strftime('%m/%d %H:%M')})"
-            for _, row in st.session_state.calendar_events.iterrows()
-        ]
-        st.selectbox("Select an event to edit", event_titles)
-    else:
-        st.warning("No events to edit.")
-
+    with col2:
+        # Add appointment form
+        with st.expander("➕ Add New Appointment", expanded=False):
+            with st.form("add_appointment"):
+                title = st.text_input("Title*", placeholder="e.g., Demo with Customer")
+                customer = st.text_input("Customer", placeholder="Customer name")
+                agent = st.selectbox("Agent", ["AI Agent Emma", "AI Agent Alex", "AI Agent Sophia", "Jessica Martinez"])
+                
+                col1, col2 = st.columns(2)
+                with col1:
+                    start_date = st.date_input("Start Date", value=datetime.now().date())
+                    start_time = st.time_input("Start Time", value=datetime.now().time())
+                with col2:
+                    duration = st.selectbox("Duration", ["30 min", "1 hour", "1.5 hours", "2 hours"])
+                    appointment_type = st.selectbox("Type", ["Demo", "Follow-up", "Support", "Sales Call", "Meeting"])
+                
+                description = st.text_area("Description", placeholder="Additional details...")
+                
+                if st.form_submit_button("📅 Schedule Appointment", use_container_width=True):
+                    if title:
+                        start_dt = datetime.combine(start_date, start_time)
+                        end_dt = start_dt + timedelta(minutes={"30 min": 30, "1 hour": 60, "1.5 hours": 90, "2 hours": 120}[duration])
+                        new_event = {
+                            "id": str(uuid.uuid4()),
+                            "title": title,
+                            "start": start_dt.isoformat(),
+                            "end": end_dt.isoformat(),
+                            "description": description,
+                            "customer": customer,
+                            "agent": agent,
+                            "type": appointment_type,
+                            "status": "Scheduled"
+                        }
                         
                         # Save event
                         if save_calendar_event(new_event):
@@ -1277,11 +4315,10 @@ with st.expander("✏️ Edit Appointment", expanded=False):
         
         # Edit appointment form
         with st.expander("✏️ Edit Appointment", expanded=False):
-    event_titles = [
-        f"{row['title']} ({pd.to_datetime(row['start']).strftime('%m/%d %H:%M')})"
-        for _, row in st.session_state.calendar_events.iterrows()
-    ]
-
+            event_titles = [
+                f"{row['title']} ({pd.to_datetime(row['start']).strftime('%m/%d %H:%M')})"
+                for _, row in events_df.iterrows()
+            ]
             
             if event_titles:
                 selected_event = st.selectbox("Select Event to Edit", event_titles)
@@ -1289,7 +4326,7 @@ with st.expander("✏️ Edit Appointment", expanded=False):
                 if selected_event:
                     # Extract event ID from selection
                     event_idx = event_titles.index(selected_event)
-                    event_data = st.session_state.calendar_events.iloc[event_idx]
+                    event_data = events_df.iloc[event_idx]
                     
                     with st.form("edit_appointment"):
                         new_title = st.text_input("Title", value=event_data['title'])
@@ -1350,7 +4387,7 @@ with st.expander("✏️ Edit Appointment", expanded=False):
         today = datetime.now().date()
         today_events = []
         
-        for _, event in st.session_state.calendar_events.iterrows():
+        for _, event in events_df.iterrows():
             event_date = pd.to_datetime(event['start']).date()
             if event_date == today:
                 today_events.append(event)
@@ -1381,7 +4418,7 @@ with st.expander("✏️ Edit Appointment", expanded=False):
         week_end = today + timedelta(days=7)
         
         upcoming_events = []
-        for _, event in st.session_state.calendar_events.iterrows():
+        for _, event in events_df.iterrows():
             event_date = pd.to_datetime(event['start']).date()
             if week_start < event_date <= week_end:
                 upcoming_events.append(event)
@@ -1417,7 +4454,7 @@ with st.expander("✏️ Edit Appointment", expanded=False):
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        total_appointments = len(st.session_state.calendar_events)
+        total_appointments = len(events_df)
         st.markdown(f"""
         <div class="metric-card info-metric">
             <h3>📅 Total Appointments</h3>
@@ -1444,7 +4481,7 @@ with st.expander("✏️ Edit Appointment", expanded=False):
         """, unsafe_allow_html=True)
     
     with col4:
-        demo_count = len([e for _, e in st.session_state.calendar_events.iterrows() if e.get('type') == 'Demo'])
+        demo_count = len([e for _, e in events_df.iterrows() if e.get('type') == 'Demo'])
         st.markdown(f"""
         <div class="metric-card danger-metric">
             <h3>🎯 Demos Scheduled</h3>
@@ -1512,12 +4549,9 @@ def main():
         if page == "📊 CRM Dashboard":
             st.markdown("### 🔍 Smart Filters")
             
-            if 'crm_data' not in st.session_state:
-                st.session_state.crm_data = load_data_from_google_sheets()
-            
-            df = st.session_state.crm_data
+            options = get_crm_filter_options()
             
-            if not df.empty:
+            if options is not None:
                 # Date range filter with presets
                 col1, col2 = st.columns(2)
                 with col1:
@@ -1529,9 +4563,9 @@ def main():
                 if date_preset == "Custom":
                     date_range = st.date_input(
                         "Custom Date Range",
-                        value=(df['call_date'].min().date(), df['call_date'].max().date()),
-                        min_value=df['call_date'].min().date(),
-                        max_value=df['call_date'].max().date()
+                        value=(options['date_min'].date(), options['date_max'].date()),
+                        min_value=options['date_min'].date(),
+                        max_value=options['date_max'].date()
                     )
                 else:
                     today = datetime.now().date()
@@ -1544,43 +4578,55 @@ def main():
                     elif date_preset == "This Month":
                         date_range = (today.replace(day=1), today)
                     else:  # All Time
-                        date_range = (df['call_date'].min().date(), df['call_date'].max().date())
+                        date_range = (options['date_min'].date(), options['date_max'].date())
                 
                 # Multi-level filters
                 categories = st.multiselect(
                     "📂 Call Categories",
-                    options=df['call_category'].unique(),
-                    default=df['call_category'].unique()
+                    options=options['categories'],
+                    default=options['categories']
                 )
                 
                 tiers = st.multiselect(
                     "👑 Customer Tiers",
-                    options=df['customer_tier'].unique(),
-                    default=df['customer_tier'].unique()
+                    options=options['tiers'],
+                    default=options['tiers']
                 )
                 
                 outcomes = st.multiselect(
                     "🎯 Call Outcomes",
-                    options=df['call_outcome'].unique(),
-                    default=df['call_outcome'].unique()
+                    options=options['outcomes'],
+                    default=options['outcomes']
+                )
+                
+                agents = st.multiselect(
+                    "🤖 Voice Agents",
+                    options=options.get('agents', []),
+                    default=options.get('agents', [])
+                )
+                
+                reps = st.multiselect(
+                    "🧑‍💼 Assigned Reps",
+                    options=options.get('reps', []),
+                    default=options.get('reps', [])
                 )
                 
                 # Satisfaction range
                 satisfaction_range = st.slider(
                     "⭐ Customer Satisfaction Range",
-                    min_value=float(df['customer_satisfaction'].min()),
-                    max_value=float(df['customer_satisfaction'].max()),
-                    value=(float(df['customer_satisfaction'].min()), float(df['customer_satisfaction'].max())),
+                    min_value=options['satisfaction_min'],
+                    max_value=options['satisfaction_max'],
+                    value=(options['satisfaction_min'], options['satisfaction_max']),
                     step=0.1
                 )
                 
                 # Revenue impact filter
-                if df['revenue_impact'].max() > 0:
+                if options['revenue_max'] > 0:
                     revenue_range = st.slider(
                         "💰 Revenue Impact Range",
-                        min_value=int(df['revenue_impact'].min()),
-                        max_value=int(df['revenue_impact'].max()),
-                        value=(int(df['revenue_impact'].min()), int(df['revenue_impact'].max())),
+                        min_value=int(options['revenue_min']),
+                        max_value=int(options['revenue_max']),
+                        value=(int(options['revenue_min']), int(options['revenue_max'])),
                         step=100
                     )
                 else:
@@ -1589,40 +4635,47 @@ def main():
                 # Text search
                 search_term = st.text_input(
                     "🔍 Search in transcripts/summaries",
-                    placeholder="Enter keywords to search..."
+                    placeholder='Keywords, "phrases", field:value, -exclude',
+                    help='Words match as prefixes and are all required. Use "quoted phrases", OR between alternatives, '
+                         '-word or NOT word to exclude, and field:value to scope, e.g. competitor_mentioned:CompetitorA'
                 )
                 
                 # Apply filters
-                filtered_df = df[
-                    (df['call_date'].dt.date.between(pd.to_datetime(date_range[0]).date(), pd.to_datetime(date_range[1]).date())) &
-                    (df['call_category'].isin(categories)) &
-                    (df['customer_tier'].isin(tiers)) &
-                    (df['call_outcome'].isin(outcomes)) &
-                    (df['customer_satisfaction'].between(satisfaction_range[0], satisfaction_range[1])) &
-                    (df['revenue_impact'].between(revenue_range[0], revenue_range[1]))
-                ]
-                
-                if search_term:
-                    # Search in multiple text columns
-                    text_columns = ['transcript', 'call_summary', 'keyword_tags', 'pain_points']
-                    search_mask = pd.Series([False] * len(filtered_df))
-                    
-                    for col in text_columns:
-                        if col in filtered_df.columns:
-                            search_mask |= filtered_df[col].astype(str).str.contains(search_term, case=False, na=False)
-                    
-                    filtered_df = filtered_df[search_mask]
+                filters = {
+                    'date_range': (pd.to_datetime(date_range[0]).date(), pd.to_datetime(date_range[-1]).date()),
+                    'categories': list(categories),
+                    'tiers': list(tiers),
+                    'outcomes': list(outcomes),
+                    'satisfaction_range': tuple(satisfaction_range),
+                    'revenue_range': tuple(revenue_range),
+                    'search': search_term
+                }
+                # Sources without agent or rep columns offer no choices there; leave those unfiltered
+                for name, selected in [('agents', agents), ('reps', reps)]:
+                    if name in options:
+                        filters[name] = list(selected)
+                st.session_state.crm_filters = filters
                 
-                # Store filtered data
-                st.session_state.filtered_crm_data = filtered_df
+                if get_crm_source()['kind'] == 'sql':
+                    # The database evaluates the filters when the pages ask for rows or aggregates
+                    filtered_count = get_filtered_crm_kpis(None)['total_calls']
+                    total_count = get_crm_record_count()
+                else:
+                    df = get_crm_data()
+                    positions = filter_crm_positions(df, filters, st.session_state.get('crm_version'))
+                    # Store which rows matched; the frame itself stays in the shared store
+                    set_crm_filter_result(df, positions)
+                    total_count = len(df)
+                    filtered_count = len(range(total_count)[positions]) if isinstance(positions, slice) else len(positions)
                 
                 # Filter summary
                 st.markdown("### 📈 Filter Summary")
-                st.info(f"Showing **{len(filtered_df)}** of **{len(df)}** records")
+                st.info(f"Showing **{filtered_count}** of **{total_count}** records")
         
         # Refresh data button
         if st.button("🔄 Refresh All Data", use_container_width=True):
-            st.cache_data.clear()
+            refresh_cache_region('crm')
+            refresh_cache_region('calendar')
             st.success("✅ Data refreshed!")
             st.rerun()
     
@@ -1647,12 +4700,8 @@ def main():
 def show_crm_dashboard():
     """Display the main CRM dashboard"""
     
-    # Load data
-    if 'crm_data' not in st.session_state:
-        st.session_state.crm_data = load_data_from_google_sheets()
-    
-    # Use filtered data if available
-    df = st.session_state.get('filtered_crm_data', st.session_state.crm_data)
+    # Load data (filtered view of the shared store if filters are active)
+    df = get_filtered_crm_data()
     
     # Main dashboard header
     st.markdown("""
@@ -1665,11 +4714,12 @@ def show_crm_dashboard():
     # Enhanced key metrics
     if not df.empty:
         st.markdown("## 📊 Key Performance Indicators")
+        kpis = get_filtered_crm_kpis(df)
         
         col1, col2, col3, col4, col5 = st.columns(5)
         
         with col1:
-            total_calls = len(df)
+            total_calls = kpis['total_calls']
             st.markdown(f"""
             <div class="metric-card info-metric">
                 <h3>📞 Total Calls</h3>
@@ -1678,7 +4728,7 @@ def show_crm_dashboard():
             """, unsafe_allow_html=True)
         
         with col2:
-            success_rate = (df['call_success'] == 'Yes').sum() / len(df) * 100 if len(df) > 0 else 0
+            success_rate = kpis['success_rate'] * 100
             st.markdown(f"""
             <div class="metric-card success-metric">
                 <h3>✅ Success Rate</h3>
@@ -1687,7 +4737,7 @@ def show_crm_dashboard():
             """, unsafe_allow_html=True)
         
         with col3:
-            avg_satisfaction = df['customer_satisfaction'].mean()
+            avg_satisfaction = kpis['avg_satisfaction']
             st.markdown(f"""
             <div class="metric-card warning-metric">
                 <h3>⭐ Avg Satisfaction</h3>
@@ -1696,7 +4746,7 @@ def show_crm_dashboard():
             """, unsafe_allow_html=True)
         
         with col4:
-            total_revenue = df['revenue_impact'].sum()
+            total_revenue = kpis['total_revenue']
             st.markdown(f"""
             <div class="metric-card danger-metric">
                 <h3>💰 Revenue Impact</h3>
@@ -1705,7 +4755,7 @@ def show_crm_dashboard():
             """, unsafe_allow_html=True)
         
         with col5:
-            avg_duration = df['call_duration_seconds'].mean() / 60
+            avg_duration = kpis['avg_duration_seconds'] / 60
             st.markdown(f"""
             <div class="metric-card">
                 <h3>⏱️ Avg Duration</h3>
@@ -1727,34 +4777,69 @@ def show_crm_dashboard():
             col1, col2, col3, col4 = st.columns(4)
             
             with col1:
-                st.metric("🔍 Filtered Records", len(df))
+                st.metric("🔍 Filtered Records", kpis['total_calls'])
             with col2:
-                avg_call_duration = df['call_duration_seconds'].mean()
+                avg_call_duration = kpis['avg_duration_seconds']
                 st.metric("⏱️ Avg Call Time", f"{avg_call_duration/60:.1f} min")
             with col3:
-                high_satisfaction = (df['customer_satisfaction'] >= 9).sum()
+                high_satisfaction = kpis['high_satisfaction']
                 st.metric("😊 High Satisfaction", f"{high_satisfaction} calls")
             with col4:
-                follow_ups_needed = (df['follow_up_required'] == 'Yes').sum()
+                follow_ups_needed = kpis['follow_ups']
                 st.metric("📅 Follow-ups Needed", f"{follow_ups_needed} calls")
             
             st.markdown("---")
             
             # Enhanced data display with editing
-            display_enhanced_dataframe_with_editing(df, "Complete Call Records", "call_records")
+            display_enhanced_dataframe_with_editing(df, "Complete Call Records", "call_records", store_view=True)
+            
+            # Relevance-ranked results for the sidebar search query
+            search_query = (st.session_state.get('crm_filters') or {}).get('search')
+            ranked_ids = None
+            if search_query and len(df) > 0:
+                st.markdown("### 🔎 Ranked Search Results")
+                
+                col1, col2 = st.columns([1, 3])
+                with col1:
+                    page_size = st.selectbox("Results per page", [10, 25, 50], key="search_page_size")
+                total_pages = max(-(-len(df) // page_size), 1)
+                with col2:
+                    page = st.number_input("Page", min_value=1, max_value=total_pages, value=1, key="search_page")
+                
+                results, scores = rank_crm_search(df, search_query, int(page) - 1, page_size)
+                results = hydrate_text_columns(results)
+                st.caption(f"{len(df):,} matches for {search_query!r} · page {int(page)} of {total_pages}")
+                
+                for (_, result), score in zip(results.iterrows(), scores):
+                    texts = [result.get(col) for col in ('transcript', 'call_summary') if isinstance(result.get(col), str)]
+                    snippets = [search_snippet(text, search_query) for text in texts]
+                    snippet = next((text for text in snippets if "<mark>" in text), snippets[0] if snippets else "")
+                    st.markdown(f"""
+                    <div style="background: #ffffff; padding: 0.75rem 1rem; border-radius: 8px; border: 1px solid #dee2e6; margin-bottom: 0.5rem; color: #212529;">
+                        <strong>{html.escape(str(result['call_id']))}</strong> · {html.escape(str(result['customer_name']))} · {html.escape(str(result['call_category']))}
+                        <span style="float: right; color: #6c757d;">relevance {score:.2f}</span>
+                        <div style="font-size: 0.9rem; margin-top: 0.25rem;">{snippet}</div>
+                    </div>
+                    """, unsafe_allow_html=True)
+                ranked_ids = results['call_id'].tolist()
             
             st.markdown("### 🎙️ Detailed Transcript Viewer")
             
             # Transcript detail view
             if len(df) > 0:
-                selected_call = st.selectbox(
-                    "Select call to view full transcript:",
-                    options=df['call_id'].tolist(),
-                    format_func=lambda x: f"{x} - {df[df['call_id']==x]['customer_name'].iloc[0]} ({df[df['call_id']==x]['call_category'].iloc[0]})"
-                )
+                if ranked_ids:
+                    # With an active search the current page of results is offered in rank order
+                    selected_call = st.selectbox(
+                        "Select call to view full transcript:",
+                        options=ranked_ids,
+                        format_func=crm_record_labeler(df)
+                    )
+                else:
+                    selected_call = crm_record_picker("Select call to view full transcript:", df, "transcript_viewer_call")
                 
                 if selected_call:
-                    call_data = df[df['call_id'] == selected_call].iloc[0]
+                    # Only the selected call's texts are loaded from the transcript store
+                    call_data = hydrate_text_columns(get_crm_records(df, [selected_call])).iloc[0]
                     
                     col1, col2 = st.columns([2, 1])
                     
@@ -1765,7 +4850,7 @@ def show_crm_dashboard():
                             <div style="background: #f8f9fa; padding: 1.5rem; border-radius: 10px; 
                                        border-left: 5px solid #007bff; max-height: 400px; overflow-y: auto; color: #212529;">
                                 <pre style="white-space: pre-wrap; font-family: 'Segoe UI', sans-serif; 
-                                           font-size: 14px; line-height: 1.5; color: #212529;">{call_data['transcript']}</pre>
+                                           font-size: 14px; line-height: 1.5; color: #212529;">{search_snippet(call_data['transcript'], search_query, width=None) if search_query else call_data['transcript']}</pre>
                             </div>
                             """, unsafe_allow_html=True)
                         else:
@@ -1800,10 +4885,10 @@ def show_crm_dashboard():
             
             with col1:
                 # Call outcomes distribution
-                outcome_counts = df['call_outcome'].value_counts()
+                outcome_counts = get_filtered_crm_aggregates(df, 'call_outcome')
                 fig_pie = px.pie(
-                    values=outcome_counts.values,
-                    names=outcome_counts.index,
+                    values=outcome_counts['calls'],
+                    names=outcome_counts['call_outcome'],
                     title="📊 Call Outcomes Distribution",
                     color_discrete_sequence=px.colors.qualitative.Set3
                 )
@@ -1820,7 +4905,7 @@ def show_crm_dashboard():
             
             with col2:
                 # Customer satisfaction by category
-                satisfaction_by_category = df.groupby('call_category')['customer_satisfaction'].mean().reset_index()
+                satisfaction_by_category = get_filtered_crm_aggregates(df, 'call_category')
                 fig_bar = px.bar(
                     satisfaction_by_category,
                     x='call_category',
@@ -1843,7 +4928,7 @@ def show_crm_dashboard():
             
             with col1:
                 # Daily call volume
-                daily_calls = df.groupby(df['call_date'].dt.date).size().reset_index()
+                daily_calls = get_filtered_crm_aggregates(df, 'call_day')[['call_day', 'calls']]
                 daily_calls.columns = ['Date', 'Call_Count']
                 
                 fig_line = px.line(
@@ -1864,7 +4949,7 @@ def show_crm_dashboard():
             
             with col2:
                 # Revenue by agent
-                revenue_by_agent = df.groupby('voice_agent_name')['revenue_impact'].sum().reset_index()
+                revenue_by_agent = get_filtered_crm_aggregates(df, 'voice_agent_name')
                 fig_agent_revenue = px.bar(
                     revenue_by_agent,
                     x='voice_agent_name',
@@ -1890,7 +4975,7 @@ def show_crm_dashboard():
                 
                 with col1:
                     st.markdown("### 📊 Data Statistics")
-                    st.info(f"**Total Records:** {len(st.session_state.crm_data):,}")
+                    st.info(f"**Total Records:** {get_crm_record_count():,}")
                     st.info(f"**Filtered Records:** {len(df):,}")
                     st.info(f"**Date Range:** {df['call_date'].min().strftime('%Y-%m-%d')} to {df['call_date'].max().strftime('%Y-%m-%d')}")
                 
@@ -1899,31 +4984,22 @@ def show_crm_dashboard():
                     
                     if st.button("🧹 Clean Data", use_container_width=True):
                         # Remove duplicates and handle missing values
-                        original_count = len(st.session_state.crm_data)
-                        
-                        # Remove duplicates
-                        st.session_state.crm_data = st.session_state.crm_data.drop_duplicates()
-                        
-                        # Fill missing numeric values with median
-                        numeric_columns = st.session_state.crm_data.select_dtypes(include=[np.number]).columns
-                        st.session_state.crm_data[numeric_columns] = st.session_state.crm_data[numeric_columns].fillna(
-                            st.session_state.crm_data[numeric_columns].median()
-                        )
-                        
-                        new_count = len(st.session_state.crm_data)
+                        original_count = len(get_crm_data())
+                        new_count = len(clean_crm_data())
                         st.success(f"✅ Data cleaned! Processed {original_count - new_count} records")
                     
                     if st.button("📊 Generate Report", use_container_width=True):
                         # Generate comprehensive report
+                        report_kpis = get_filtered_crm_kpis(df)
                         report_data = {
                             "Report Generated": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                            "Total Records": len(st.session_state.crm_data),
+                            "Total Records": len(get_crm_data()),
                             "Filtered Records": len(df),
-                            "Success Rate": f"{(df['call_success'] == 'Yes').mean():.1%}",
-                            "Average Satisfaction": f"{df['customer_satisfaction'].mean():.1f}",
-                            "Total Revenue": f"${df['revenue_impact'].sum():,.2f}",
-                            "Top Category": df['call_category'].mode().iloc[0] if not df.empty else "N/A",
-                            "Top Agent": df['voice_agent_name'].mode().iloc[0] if not df.empty else "N/A"
+                            "Success Rate": f"{report_kpis['success_rate']:.1%}",
+                            "Average Satisfaction": f"{report_kpis['avg_satisfaction']:.1f}",
+                            "Total Revenue": f"${report_kpis['total_revenue']:,.2f}",
+                            "Top Category": get_top_crm_value(df, 'call_category'),
+                            "Top Agent": get_top_crm_value(df, 'voice_agent_name')
                         }
                         
                         report_json = json.dumps(report_data, indent=2)
@@ -1943,7 +5019,7 @@ def show_crm_dashboard():
                     
                     if st.button("📥 Export Data", use_container_width=True):
                         if export_format == "CSV":
-                            csv_data = df.to_csv(index=False)
+                            csv_data = hydrate_text_columns(df).to_csv(index=False)
                             st.download_button(
                                 label="⬇️ Download CSV",
                                 data=csv_data,
@@ -1953,7 +5029,7 @@ def show_crm_dashboard():
                         elif export_format == "Excel":
                             output = io.BytesIO()
                             with pd.ExcelWriter(output, engine='openpyxl') as writer:
-                                df.to_excel(writer, sheet_name='CRM_Data', index=False)
+                                hydrate_text_columns(df).to_excel(writer, sheet_name='CRM_Data', index=False)
                             
                             st.download_button(
                                 label="⬇️ Download Excel",
@@ -1962,7 +5038,7 @@ def show_crm_dashboard():
                                 mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
                             )
                         else:  # JSON
-                            json_data = df.to_json(orient='records', indent=2)
+                            json_data = hydrate_text_columns(df).to_json(orient='records', indent=2)
                             st.download_button(
                                 label="⬇️ Download JSON",
                                 data=json_data,
@@ -1988,32 +5064,31 @@ def show_analytics_page():
     st.markdown("## 📈 Advanced Analytics & Performance Insights")
     
     # Load data
-    if 'crm_data' not in st.session_state:
-        st.session_state.crm_data = load_data_from_google_sheets()
-    
-    df = st.session_state.get('filtered_crm_data', st.session_state.crm_data)
+    df = get_filtered_crm_data()
     
     if not df.empty:
+        totals = get_crm_rollup(df).iloc[0]
+        
         # Advanced metrics row
         col1, col2, col3, col4 = st.columns(4)
         
         with col1:
-            conversion_rate = (df['conversion_probability'] > 0.5).mean() if 'conversion_probability' in df.columns else 0
+            conversion_rate = totals['converting'] if 'converting' in totals.index else 0
             st.metric("🎯 Conversion Rate", f"{conversion_rate:.1%}", 
                      delta=f"+{(conversion_rate-0.15):.1%}" if conversion_rate > 0.15 else f"{(conversion_rate-0.15):.1%}")
         
         with col2:
-            avg_ai_accuracy = df['ai_accuracy_score'].mean() if 'ai_accuracy_score' in df.columns else 0
+            avg_ai_accuracy = totals['ai_accuracy_score'] if 'ai_accuracy_score' in totals.index else 0
             st.metric("🤖 AI Accuracy", f"{avg_ai_accuracy:.1%}",
                      delta=f"+{(avg_ai_accuracy-0.85):.1%}" if avg_ai_accuracy > 0.85 else f"{(avg_ai_accuracy-0.85):.1%}")
         
         with col3:
-            escalation_rate = (df['escalation_required'] == 'Yes').mean() if 'escalation_required' in df.columns else 0
+            escalation_rate = totals['escalation_required'] if 'escalation_required' in totals.index else 0
             st.metric("⚠️ Escalation Rate", f"{escalation_rate:.1%}",
                      delta=f"-{(0.1-escalation_rate):.1%}" if escalation_rate < 0.1 else f"+{(escalation_rate-0.1):.1%}")
         
         with col4:
-            avg_resolution_time = df['resolution_time_seconds'].mean() / 60 if 'resolution_time_seconds' in df.columns else 0
+            avg_resolution_time = totals['resolution_time_seconds'] / 60 if 'resolution_time_seconds' in totals.index else 0
             st.metric("⚡ Avg Resolution Time", f"{avg_resolution_time:.1f} min",
                      delta=f"-{(3-avg_resolution_time):.1f} min" if avg_resolution_time < 3 else f"+{(avg_resolution_time-3):.1f} min")
         
@@ -2025,11 +5100,10 @@ def show_analytics_page():
         with col1:
             # Customer satisfaction heatmap by category and tier
             if 'customer_tier' in df.columns:
-                satisfaction_pivot = df.pivot_table(
-                    values='customer_satisfaction', 
-                    index='call_category', 
-                    columns='customer_tier', 
-                    aggfunc='mean'
+                satisfaction_pivot = get_crm_rollup(df, ('call_category', 'customer_tier')).pivot(
+                    index='call_category',
+                    columns='customer_tier',
+                    values='customer_satisfaction'
                 )
                 
                 fig_heatmap = px.imshow(
@@ -2105,54 +5179,32 @@ def show_customer_management_page():
     st.markdown("## 👥 Customer Intelligence & Management")
     
     # Load data
-    if 'crm_data' not in st.session_state:
-        st.session_state.crm_data = load_data_from_google_sheets()
-    
-    df = st.session_state.get('filtered_crm_data', st.session_state.crm_data)
+    df = get_filtered_crm_data()
     
     if not df.empty:
+        customer_summary = get_customer_profiles(df)
+        
         # Customer overview metrics
         col1, col2, col3, col4 = st.columns(4)
         
         with col1:
-            unique_customers = df['customer_name'].nunique()
+            unique_customers = len(customer_summary)
             st.metric("👥 Unique Customers", unique_customers)
         
         with col2:
-            premium_customers = (df['customer_tier'] == 'Premium').sum() if 'customer_tier' in df.columns else 0
+            premium_customers = int((customer_summary['Tier'] == 'Premium').sum())
             st.metric("👑 Premium Customers", premium_customers)
         
         with col3:
-            high_value_customers = (df['customer_lifetime_value'] > 20000).sum() if 'customer_lifetime_value' in df.columns else 0
+            high_value_customers = int((customer_summary['Lifetime_Value'] > 20000).sum())
             st.metric("💎 High Value Customers", high_value_customers)
         
         with col4:
-            repeat_customers = df.groupby('customer_name').size()
-            repeat_count = (repeat_customers > 1).sum()
+            repeat_count = int((customer_summary['Total_Calls'] > 1).sum())
             st.metric("🔄 Repeat Customers", repeat_count)
         
         st.markdown("---")
         
-        # Enhanced customer analysis
-        customer_summary = df.groupby('customer_name').agg({
-            'call_id': 'count',
-            'customer_satisfaction': 'mean',
-            'customer_lifetime_value': 'first' if 'customer_lifetime_value' in df.columns else lambda x: 0,
-            'customer_tier': 'first' if 'customer_tier' in df.columns else lambda x: 'Standard',
-            'revenue_impact': 'sum',
-            'conversion_probability': 'mean' if 'conversion_probability' in df.columns else lambda x: 0,
-            'call_category': lambda x: ', '.join(x.unique()),
-            'call_outcome': lambda x: ', '.join(x.unique()),
-            'next_best_action': 'last' if 'next_best_action' in df.columns else lambda x: 'Follow_up',
-            'pain_points': 'last' if 'pain_points' in df.columns else lambda x: 'General inquiry'
-        }).reset_index()
-        
-        customer_summary.columns = [
-            'Customer', 'Total_Calls', 'Avg_Satisfaction', 'Lifetime_Value', 
-            'Tier', 'Revenue_Impact', 'Conversion_Probability', 'Categories', 
-            'Outcomes', 'Next_Action', 'Pain_Points'
-        ]
-        
         # Customer segmentation
         col1, col2 = st.columns(2)
         
@@ -2252,30 +5304,26 @@ def show_agent_performance_page():
     st.markdown("## 🎯 Agent Performance Dashboard")
     
     # Load data
-    if 'crm_data' not in st.session_state:
-        st.session_state.crm_data = load_data_from_google_sheets()
-    
-    df = st.session_state.get('filtered_crm_data', st.session_state.crm_data)
+    df = get_filtered_crm_data()
     
     if not df.empty:
-        # Agent performance aggregation
-        agent_performance = df.groupby('voice_agent_name').agg({
-            'call_id': 'count',
-            'agent_performance_score': 'mean' if 'agent_performance_score' in df.columns else lambda x: 8.0,
-            'customer_satisfaction': 'mean',
-            'call_success': lambda x: (x == 'Yes').mean(),
-            'ai_accuracy_score': 'mean' if 'ai_accuracy_score' in df.columns else lambda x: 0.9,
-            'call_duration_seconds': 'mean',
-            'resolution_time_seconds': 'mean' if 'resolution_time_seconds' in df.columns else lambda x: 120,
-            'escalation_required': lambda x: (x == 'Yes').mean() if 'escalation_required' in df.columns else lambda x: 0.1,
-            'revenue_impact': 'sum'
-        }).reset_index()
-        
-        agent_performance.columns = [
-            'Agent', 'Total_Calls', 'Performance_Score', 'Customer_Satisfaction',
-            'Success_Rate', 'AI_Accuracy', 'Avg_Duration', 'Avg_Resolution_Time',
-            'Escalation_Rate', 'Revenue_Generated'
-        ]
+        # Agent performance from the per-agent accumulator (missing scores get neutral defaults);
+        # the leaderboard, charts and recommendations below all read this one table
+        agent_stats = agent_accumulator_stats(get_agent_accumulator(df))
+        agent_mean = lambda col, default: agent_stats[col] if col in agent_stats.columns else default
+        agent_performance = pd.DataFrame({
+            'Agent': agent_stats['voice_agent_name'],
+            'Total_Calls': agent_stats['calls'],
+            'Performance_Score': agent_mean('agent_performance_score', 8.0),
+            'Performance_Std': agent_mean('agent_performance_score_std', np.nan),
+            'Customer_Satisfaction': agent_stats['customer_satisfaction'],
+            'Success_Rate': agent_stats['call_success'],
+            'AI_Accuracy': agent_mean('ai_accuracy_score', 0.9),
+            'Avg_Duration': agent_stats['call_duration_seconds'],
+            'Avg_Resolution_Time': agent_mean('resolution_time_seconds', 120),
+            'Escalation_Rate': agent_mean('escalation_required', 0.1),
+            'Revenue_Generated': agent_stats['revenue_impact_sum']
+        })
         
         # Top agent metrics
         col1, col2, col3, col4 = st.columns(4)
@@ -2408,32 +5456,31 @@ def show_revenue_tracking_page():
     st.markdown("## 💰 Revenue & Pipeline Analysis")
     
     # Load data
-    if 'crm_data' not in st.session_state:
-        st.session_state.crm_data = load_data_from_google_sheets()
-    
-    df = st.session_state.get('filtered_crm_data', st.session_state.crm_data)
+    df = get_filtered_crm_data()
     
     if not df.empty:
+        totals = get_crm_rollup(df).iloc[0]
+        
         # Revenue metrics
         col1, col2, col3, col4 = st.columns(4)
         
         with col1:
-            total_revenue = df['revenue_impact'].sum()
+            total_revenue = totals['revenue_impact_sum']
             st.metric("💰 Total Revenue", f"${total_revenue:,.0f}")
         
         with col2:
-            avg_deal_size = df[df['revenue_impact'] > 0]['revenue_impact'].mean()
+            avg_deal_size = totals['deal_revenue']
             st.metric("📊 Avg Deal Size", f"${avg_deal_size:,.0f}" if not pd.isna(avg_deal_size) else "$0")
         
         with col3:
-            if 'customer_lifetime_value' in df.columns and 'conversion_probability' in df.columns:
-                pipeline_value = (df['customer_lifetime_value'] * df['conversion_probability']).sum()
+            if 'pipeline_value_sum' in totals.index:
+                pipeline_value = totals['pipeline_value_sum']
                 st.metric("🎯 Pipeline Value", f"${pipeline_value:,.0f}")
             else:
                 st.metric("🎯 Pipeline Value", "$0")
         
         with col4:
-            deals_closed = (df['revenue_impact'] > 0).sum()
+            deals_closed = int(totals['deal_revenue_count'])
             st.metric("🤝 Deals Closed", deals_closed)
         
         st.markdown("---")
@@ -2443,7 +5490,7 @@ def show_revenue_tracking_page():
         
         with col1:
             # Revenue by category
-            revenue_by_category = df.groupby('call_category')['revenue_impact'].sum().reset_index()
+            revenue_by_category = get_filtered_crm_aggregates(df, 'call_category')[['call_category', 'revenue_impact']]
             fig_revenue_cat = px.bar(
                 revenue_by_category,
                 x='call_category',
@@ -2467,10 +5514,10 @@ def show_revenue_tracking_page():
             funnel_data = pd.DataFrame({
                 'Stage': ['Total Calls', 'Successful Calls', 'Appointments Scheduled', 'Deals Closed'],
                 'Count': [
-                    len(df),
-                    (df['call_success'] == 'Yes').sum(),
-                    (df['appointment_scheduled'] == 'Yes').sum() if 'appointment_scheduled' in df.columns else 0,
-                    (df['revenue_impact'] > 0).sum()
+                    int(totals['calls']),
+                    int(totals['call_success_sum']),
+                    int(totals['appointment_scheduled_sum']) if 'appointment_scheduled_sum' in totals.index else 0,
+                    deals_closed
                 ]
             })
             
@@ -2536,13 +5583,13 @@ def show_revenue_tracking_page():
         st.markdown("### 🏆 Top Revenue Opportunities")
         
         if 'customer_lifetime_value' in df.columns:
-            opportunities = df.nlargest(20, 'customer_lifetime_value')[
-                ['customer_name', 'customer_lifetime_value', 'conversion_probability', 
-                 'revenue_impact', 'next_best_action', 'call_outcome', 'customer_tier']
+            opportunities = get_customer_profiles(df).nlargest(20, 'Lifetime_Value')[
+                ['Customer', 'Lifetime_Value', 'Conversion_Probability',
+                 'Revenue_Impact', 'Next_Action', 'Outcomes', 'Tier']
             ].copy()
             
-            if 'conversion_probability' in opportunities.columns:
-                opportunities['Expected_Value'] = opportunities['customer_lifetime_value'] * opportunities['conversion_probability']
+            if 'conversion_probability' in df.columns:
+                opportunities['Expected_Value'] = opportunities['Lifetime_Value'] * opportunities['Conversion_Probability']
                 opportunities = opportunities.sort_values('Expected_Value', ascending=False)
             
             display_enhanced_dataframe_with_editing(opportunities, "Top Revenue Opportunities", "revenue_opportunities")
@@ -2556,10 +5603,7 @@ def show_ai_insights_page():
     st.markdown("## 🔮 AI Insights & Predictive Analytics")
     
     # Load data
-    if 'crm_data' not in st.session_state:
-        st.session_state.crm_data = load_data_from_google_sheets()
-    
-    df = st.session_state.get('filtered_crm_data', st.session_state.crm_data)
+    df = get_filtered_crm_data()
     
     if not df.empty:
         # AI insights metrics
@@ -2578,7 +5622,7 @@ def show_ai_insights_page():
             st.metric("😊 Positive Sentiment", int(sentiment_positive))
         
         with col4:
-            auto_resolved = (df['escalation_required'] == 'No').sum() if 'escalation_required' in df.columns else len(df) * 0.9
+            auto_resolved = (~df['escalation_required']).sum() if 'escalation_required' in df.columns else len(df) * 0.9
             st.metric("✅ Auto-Resolved", int(auto_resolved))
         
         st.markdown("---")
@@ -2685,24 +5729,26 @@ def show_ai_insights_page():
         with col1:
             st.markdown("#### 🔮 AI Predictions")
             
+            customer_profiles = get_customer_profiles(df)
+            
             # High probability conversions
             if 'conversion_probability' in df.columns:
-                high_conversion = df[df['conversion_probability'] > 0.8]
+                high_conversion = customer_profiles[customer_profiles['Conversion_Probability'] > 0.8]
                 st.write(f"**🎯 High Conversion Probability ({len(high_conversion)} customers):**")
                 if not high_conversion.empty:
                     for _, row in high_conversion.head(5).iterrows():
-                        st.success(f"• {row['customer_name']} - {row['conversion_probability']:.0%} likely to convert")
+                        st.success(f"• {row['Customer']} - {row['Conversion_Probability']:.0%} likely to convert")
             
             # Risk indicators
             if 'customer_lifetime_value' in df.columns:
-                risk_customers = df[
-                    (df['customer_satisfaction'] < 7) & 
-                    (df['customer_lifetime_value'] > 10000)
+                risk_customers = customer_profiles[
+                    (customer_profiles['Avg_Satisfaction'] < 7) & 
+                    (customer_profiles['Lifetime_Value'] > 10000)
                 ]
                 if not risk_customers.empty:
                     st.write(f"**⚠️ At-Risk High-Value Customers ({len(risk_customers)}):**")
                     for _, row in risk_customers.head(3).iterrows():
-                        st.warning(f"• {row['customer_name']} - Satisfaction: {row['customer_satisfaction']:.1f}")
+                        st.warning(f"• {row['Customer']} - Satisfaction: {row['Avg_Satisfaction']:.1f}")
         
         with col2:
             st.markdown("#### 💡 Optimization Recommendations")
@@ -2731,26 +5777,29 @@ def show_admin_center_page():
     """Display admin center page"""
     st.markdown("## ⚙️ Admin Center & System Management")
     
+    crm_data = peek_shared_dataset('crm')
+    has_data = crm_data is not None and not crm_data.empty
+    
     # System health metrics
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        total_records = len(st.session_state.get('crm_data', []))
+        total_records = len(crm_data) if crm_data is not None else 0
         st.metric("📊 Total Records", f"{total_records:,}")
     
     with col2:
-        filtered_records = len(st.session_state.get('filtered_crm_data', st.session_state.get('crm_data', [])))
+        filtered_records = len(get_filtered_crm_data()) if crm_data is not None else 0
         filter_percentage = (filtered_records / total_records * 100) if total_records > 0 else 0
         st.metric("🔍 Filtered Records", f"{filtered_records:,}", delta=f"{filter_percentage:.1f}% of total")
     
     with col3:
-        if 'crm_data' in st.session_state and not st.session_state.crm_data.empty:
-            date_range_days = (st.session_state.crm_data['call_date'].max() - st.session_state.crm_data['call_date'].min()).days
+        if has_data:
+            date_range_days = (crm_data['call_date'].max() - crm_data['call_date'].min()).days
             st.metric("📅 Date Range", f"{date_range_days} days")
     
     with col4:
-        if 'crm_data' in st.session_state and not st.session_state.crm_data.empty:
-            categories_count = st.session_state.crm_data['call_category'].nunique()
+        if has_data:
+            categories_count = crm_data['call_category'].nunique()
             st.metric("📂 Categories", categories_count)
     
     st.markdown("---")
@@ -2761,8 +5810,8 @@ def show_admin_center_page():
     with col1:
         st.markdown("### 🔍 Data Quality Assessment")
         
-        if 'crm_data' in st.session_state and not st.session_state.crm_data.empty:
-            df_quality = st.session_state.crm_data
+        if has_data:
+            df_quality = crm_data
             
             # Missing data analysis
             missing_data = df_quality.isnull().sum()
@@ -2787,7 +5836,7 @@ def show_admin_center_page():
             if duplicates > 0:
                 st.warning(f"⚠️ Found {duplicates} duplicate records")
                 if st.button("🧹 Remove Duplicates"):
-                    st.session_state.crm_data = st.session_state.crm_data.drop_duplicates()
+                    update_crm_data(lambda df: df.drop_duplicates())
                     st.success(f"Removed {duplicates} duplicate records")
                     st.rerun()
             else:
@@ -2796,8 +5845,8 @@ def show_admin_center_page():
     with col2:
         st.markdown("### 📈 System Statistics")
         
-        if 'crm_data' in st.session_state and not st.session_state.crm_data.empty:
-            df_stats = st.session_state.crm_data
+        if has_data:
+            df_stats = crm_data
             
             stats_data = {
                 "Data Points": [
@@ -2822,6 +5871,71 @@ def show_admin_center_page():
             
             stats_df = pd.DataFrame(stats_data)
             st.dataframe(stats_df, use_container_width=True, hide_index=True)
+            
+            # Memory footprint of the compact dtypes (computed on demand, it scans every column)
+            if st.checkbox("🧠 Show memory footprint", value=False):
+                memory_report = crm_memory_report(df_stats)
+                total_bytes = memory_report['Bytes'].sum()
+                baseline_bytes = memory_report['Uncompacted Bytes'].sum()
+                st.write(f"**{total_bytes / 1e6:.2f} MB** in memory vs **{baseline_bytes / 1e6:.2f} MB** uncompacted "
+                         f"({baseline_bytes / max(total_bytes, 1):.1f}x smaller)")
+                st.dataframe(memory_report, use_container_width=True, hide_index=True)
+    
+    # Freshness of the shared datasets kept up to date by the background refresher
+    st.markdown("### ⏱️ Data Freshness")
+    freshness = shared_dataset_stats()
+    if not freshness.empty:
+        col1, col2 = st.columns(2)
+        with col1:
+            st.metric("🕒 Oldest Data", f"{freshness['Age (s)'].max():.0f}s",
+                      help=f"Datasets are reloaded in the background after {SHARED_DATASET_TTL_SECONDS * SHARED_REFRESH_AHEAD:.0f}s")
+        with col2:
+            last_refresh = freshness['Last Refresh (s)'].dropna()
+            st.metric("⚡ Slowest Last Refresh", f"{last_refresh.max():.2f}s" if not last_refresh.empty else "N/A")
+        st.dataframe(freshness, use_container_width=True, hide_index=True)
+    
+    with st.expander("📒 CRM Change Journal", expanded=False):
+        crm_entry = get_shared_data_store()['datasets'].get('crm')
+        journal = list(crm_entry['meta']['journal']) if crm_entry is not None else []
+        if journal:
+            st.dataframe(pd.DataFrame([
+                {
+                    'Version': change['version'],
+                    'At': datetime.fromtimestamp(change['at']).strftime('%Y-%m-%d %H:%M:%S'),
+                    'User': change['user'],
+                    'Edited': len(change['edited']),
+                    'Added': len(change['added']),
+                    'Deleted': len(change['deleted']),
+                    'Columns': ", ".join(sorted({col for columns in change['edited'].values() for col in columns})),
+                    'Replaced': change['replaced']
+                }
+                for change in reversed(journal)
+            ]), use_container_width=True, hide_index=True)
+        else:
+            st.info("No writes recorded since the data was loaded")
+
+    with st.expander("📤 Write-back Queue", expanded=False):
+        stats = write_back_stats()
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Pending Writes", stats['pending'])
+        col2.metric("Flushed Writes", stats['entries'])
+        col3.metric("Flushed Batches", stats['batches'])
+        col4.metric("Failed Attempts", stats['failures'])
+        if stats['last_flush_at'] is not None:
+            st.caption(f"Last flush: {datetime.fromtimestamp(stats['last_flush_at']).strftime('%Y-%m-%d %H:%M:%S')}")
+        if stats['last_error'] is not None:
+            retry_in = max(0, round(stats['retry_at'] - time.time())) if stats['retry_at'] is not None else 0
+            st.error(f"❌ Write-back failing ({stats['last_error']}); retrying in {retry_in}s")
+        if st.button("📤 Flush Now", key="admin_flush_write_back", disabled=stats['pending'] == 0):
+            get_write_back_pipeline()['wake'].set()
+            st.success("✅ Flush requested")
+
+    with st.expander("🗂️ Cache Regions", expanded=False):
+        st.dataframe(cache_region_stats(), use_container_width=True, hide_index=True)
+        region = st.selectbox("Region", CACHE_REGIONS, key="admin_cache_region")
+        if st.button("🧹 Clear Region", key="admin_clear_region"):
+            invalidate_cache(region)
+            st.success(f"✅ Cleared the {region} cache region")
     
     # Bulk operations
     st.markdown("### 🔧 Bulk Operations")
@@ -2830,38 +5944,30 @@ def show_admin_center_page():
     
     with col1:
         if st.button("🔄 Refresh Data", help="Reload data from source"):
-            st.session_state.crm_data = load_data_from_google_sheets()
-            st.success("✅ Data refreshed successfully!")
+            if refresh_cache_region('crm', force=True):
+                st.success("✅ Data refreshed successfully!")
+            else:
+                st.info("ℹ️ No live data source to refresh from")
             st.rerun()
     
     with col2:
         if st.button("🧹 Clean Data", help="Remove duplicates and handle missing values"):
-            if 'crm_data' in st.session_state:
-                original_count = len(st.session_state.crm_data)
-                
-                # Remove duplicates
-                st.session_state.crm_data = st.session_state.crm_data.drop_duplicates()
-                
-                # Fill missing numeric values with median
-                numeric_columns = st.session_state.crm_data.select_dtypes(include=[np.number]).columns
-                st.session_state.crm_data[numeric_columns] = st.session_state.crm_data[numeric_columns].fillna(
-                    st.session_state.crm_data[numeric_columns].median()
-                )
-                
-                new_count = len(st.session_state.crm_data)
+            if crm_data is not None:
+                original_count = len(crm_data)
+                new_count = len(clean_crm_data())
                 st.success(f"✅ Data cleaned! Removed {original_count - new_count} records")
     
     with col3:
         if st.button("📊 Generate Report", help="Create comprehensive data report"):
-            if 'crm_data' in st.session_state and not st.session_state.crm_data.empty:
+            if has_data:
                 # Generate a comprehensive report
                 report_data = {
                     "Report Generated": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                    "Total Records": len(st.session_state.crm_data),
-                    "Date Range": f"{st.session_state.crm_data['call_date'].min().strftime('%Y-%m-%d')} to {st.session_state.crm_data['call_date'].max().strftime('%Y-%m-%d')}",
-                    "Success Rate": f"{(st.session_state.crm_data['call_success'] == 'Yes').mean():.1%}",
-                    "Average Satisfaction": f"{st.session_state.crm_data['customer_satisfaction'].mean():.1f}",
-                    "Total Revenue": f"${st.session_state.crm_data['revenue_impact'].sum():,.2f}"
+                    "Total Records": len(crm_data),
+                    "Date Range": f"{crm_data['call_date'].min().strftime('%Y-%m-%d')} to {crm_data['call_date'].max().strftime('%Y-%m-%d')}",
+                    "Success Rate": f"{crm_data['call_success'].mean():.1%}",
+                    "Average Satisfaction": f"{crm_data['customer_satisfaction'].mean():.1f}",
+                    "Total Revenue": f"${crm_data['revenue_impact'].sum():,.2f}"
                 }
                 
                 report_json = json.dumps(report_data, indent=2)
@@ -2875,8 +5981,8 @@ def show_admin_center_page():
     
     with col4:
         if st.button("💾 Backup Data", help="Create backup of current data"):
-            if 'crm_data' in st.session_state and not st.session_state.crm_data.empty:
-                backup_csv = st.session_state.crm_data.to_csv(index=False)
+            if has_data:
+                backup_csv = hydrate_text_columns(crm_data).to_csv(index=False)
                 st.download_button(
                     label="📥 Download Backup",
                     data=backup_csv,
@@ -2884,7 +5990,34 @@ def show_admin_center_page():
                     mime="text/csv"
                 )
                 st.success("💾 Backup created successfully!")
-    
+
+    # Bulk import of historical exports
+    with st.expander("📥 Import CSV Export", expanded=False):
+        uploaded_file = st.file_uploader("Call export (CSV)", type=["csv"], key="admin_import_csv")
+        col1, col2 = st.columns(2)
+        with col1:
+            import_mode = st.radio("Import mode", ["Append to current data", "Replace current data"], key="admin_import_mode")
+        with col2:
+            chunk_rows = st.number_input("📦 Rows per chunk", min_value=1000, max_value=1_000_000, value=CRM_INGEST_CHUNK_ROWS, step=10_000)
+
+        if uploaded_file is not None and st.button("📥 Import", key="admin_import_button"):
+            try:
+                with st.spinner("Importing..."):
+                    imported, stats = ingest_crm_csv(uploaded_file, chunksize=int(chunk_rows))
+                    if import_mode == "Replace current data":
+                        publish_crm_data(imported)
+                    else:
+                        update_crm_data(lambda df: concat_crm_frames([df, imported]), added=imported)
+
+                st.success(f"✅ Imported {stats['rows']:,} records in {stats['chunks']} chunks ({stats['seconds']:.1f}s)")
+                col1, col2, col3 = st.columns(3)
+                col1.metric("⚡ Throughput", f"{stats['rows_per_second'] or 0:,.0f} rows/s")
+                col2.metric("🧠 Imported Size", f"{stats['memory_mb']:.1f} MB")
+                if stats['peak_rss_mb'] is not None:
+                    col3.metric("📈 Peak Process Memory", f"{stats['peak_rss_mb']:.0f} MB")
+            except Exception as e:
+                st.error(f"Error importing CSV: {e}")
+
     # Configuration settings
     st.markdown("### ⚙️ System Configuration")
     
@@ -2983,7 +6116,9 @@ def show_settings_page():
                 st.session_state.auth_config["google_sheets"]["calendar_sheet"] = new_calendar_url
                 
                 st.success("✅ Configuration saved successfully!")
-                st.cache_data.clear()
+                # The source URLs changed: reload both datasets from the new sheets
+                reset_cache_region('crm')
+                reset_cache_region('calendar')
     
     with col2:
         st.markdown("### 👥 User Management")
@@ -3015,7 +6150,7 @@ def show_settings_page():
     
     with col2:
         st.markdown("**Data Status:**")
-        data_count = len(st.session_state.get('crm_data', []))
+        data_count = get_crm_record_count()
         st.info(f"📊 {data_count:,} records loaded\n🔄 Auto-refresh: 5 min")
     
     with col3:
@@ -3034,7 +6169,7 @@ st.markdown(f"""
     <h4>🚀 AI Call Center CRM Dashboard</h4>
     <p>Built with Streamlit | Enhanced Wide-Screen Display | Advanced Analytics | Full Data Editing</p>
     <p>Last Updated: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")} | 
-       Records Loaded: {len(st.session_state.get('crm_data', [])):,} | 
+       Records Loaded: {get_crm_record_count():,} | 
        User: {st.session_state.get('user', {}).get('name', 'Guest')}</p>
 </div>
 """, unsafe_allow_html=True)
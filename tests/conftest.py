@@ -0,0 +1,20 @@
+import os
+import sys
+
+import pytest
+
+# app.py is a single-module Streamlit app at the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def write_back(tmp_path, monkeypatch):
+    """A fresh write-back pipeline logging to tmp_path, flushed only when a test says so"""
+    import app
+
+    # The log and outbox paths are relative to the working directory
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(app, "WRITE_BACK_DELAY_SECONDS", 3600)
+    app.get_write_back_pipeline.clear()
+    yield app.get_write_back_pipeline()
+    app.get_write_back_pipeline.clear()
@@ -0,0 +1,22 @@
+"""Named cache regions"""
+import app
+
+
+def test_slider_masks_and_rendered_pages_do_not_evict_the_indexes():
+    df = app.sort_crm_by_date(app.create_comprehensive_sample_data(500, seed=8))
+    version = ('test', 'regions')
+    app.invalidate_cache('crm')
+    bitmaps = app.get_crm_bitmaps(df, version)
+    id_index = app.get_crm_id_index(df, version)
+
+    # Dragging the satisfaction slider and paging through a table
+    for step in range(200):
+        app.crm_predicate_mask(df, 'satisfaction_range', (1.0, 1.0 + step * 0.05), version)
+        app.cached_in_region('renders', ('html_table', step), lambda: "<table></table>")
+
+    assert app.peek_region_cache('indexes', ('bitmaps', version, len(df))) is bitmaps
+    assert app.peek_region_cache('indexes', ('id_index', version, len(df))) is id_index
+    stats = app.cache_region_stats().set_index('Region')['Entries']
+    assert stats['filters'] <= app.CACHE_REGION_DEFAULT_MAX_ENTRIES
+    assert stats['renders'] <= app.CACHE_REGION_MAX_ENTRIES['renders']
+    app.invalidate_cache('crm')
@@ -0,0 +1,20 @@
+"""Change sets built from the record edit form"""
+import app
+
+
+def test_edit_form_journals_only_the_fields_that_changed():
+    record = app.create_comprehensive_sample_data(5, seed=2).iloc[0]
+    form = {
+        'customer_name': record['customer_name'],
+        'customer_satisfaction': float(record['customer_satisfaction']),
+        'revenue_impact': float(record['revenue_impact']),
+        'call_success': "Yes" if record['call_success'] else "No",
+        'transcript': app.get_text(record['transcript_key']) or '',
+        'call_summary': app.get_text(record['call_summary_key']) or ''
+    }
+    assert app.changed_record_values(record, form) == {}
+
+    form.update(customer_name="Zed Tester", call_success="No" if record['call_success'] else "Yes", transcript="Rewritten")
+    assert app.changed_record_values(record, form) == {
+        'customer_name': "Zed Tester", 'call_success': form['call_success'], 'transcript': "Rewritten"
+    }
@@ -0,0 +1,28 @@
+"""Chunked ingest of CSV exports"""
+import numpy as np
+import pandas as pd
+
+import app
+
+
+def test_multi_chunk_csv_ingests_into_the_compact_schema(tmp_path):
+    df = app.create_comprehensive_sample_data(120, seed=12)
+    # A label that only shows up in the last chunk
+    df['call_category'] = df['call_category'].cat.add_categories(["Renewal"])
+    df.loc[df.index[-1], 'call_category'] = "Renewal"
+    path = tmp_path / "export.csv"
+    app.crm_frame_to_sheet_format(df).to_csv(path, index=False)
+
+    ingested, stats = app.ingest_crm_csv(str(path), chunksize=25)
+
+    assert (stats['rows'], stats['chunks']) == (120, 5)
+    assert ingested['call_id'].tolist() == df['call_id'].tolist()
+    for col in app.CRM_CATEGORICAL_COLUMNS + app.TEXT_KEY_COLUMNS:
+        assert isinstance(ingested[col].dtype, pd.CategoricalDtype), col
+    assert ingested['call_category'].iloc[-1] == "Renewal"
+    assert all(ingested[col].dtype == bool for col in app.CRM_BOOLEAN_COLUMNS)
+    assert all(ingested[col].dtype == np.float32 for col in app.CRM_FLOAT32_COLUMNS)
+    assert all(ingested[col].dtype == np.int32 for col in app.CRM_INT32_COLUMNS)
+    assert pd.api.types.is_datetime64_any_dtype(ingested['call_date'])
+    assert ingested['call_success'].tolist() == df['call_success'].tolist()
+    assert app.hydrate_text_columns(ingested)['transcript'].tolist() == app.hydrate_text_columns(df)['transcript'].tolist()
@@ -0,0 +1,19 @@
+"""Customer profile tables"""
+import pandas as pd
+
+import app
+
+
+def test_profiles_are_sorted_by_name_whatever_the_category_order():
+    df = app.create_comprehensive_sample_data(300, seed=6)
+    names = sorted(df['customer_name'].astype(str).unique())
+    df['customer_name'] = pd.Categorical(df['customer_name'].astype(str), categories=names[::-1])
+
+    profiles = app.build_customer_profiles(df)
+    assert profiles['Customer'].tolist() == names
+
+    # Rebuilding a few customers after a write gives the same table as a full build
+    changed = names[::7]
+    edited = df[df['customer_name'] != names[0]]
+    updated = app.update_customer_profiles(profiles, edited, changed)
+    pd.testing.assert_frame_equal(updated, app.build_customer_profiles(edited), check_dtype=False)
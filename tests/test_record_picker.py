@@ -0,0 +1,15 @@
+"""Typeahead lookups behind the record picker"""
+import app
+
+
+def test_phone_typed_with_punctuation_matches_by_digits():
+    df = app.sort_crm_by_date(app.create_comprehensive_sample_data(200, seed=5))
+    # The picker searches the shared CRM frame the view was cut from
+    app.drop_shared_dataset('crm')
+    app.get_shared_dataset('crm', lambda: df)
+    phone = df['customer_phone'].iloc[10]
+    digits = "".join(ch for ch in phone if ch.isdigit())
+    expected = set(df.loc[df['customer_phone'] == phone, 'call_id'])
+
+    for query in (phone, digits, f"({digits[:4]}) {digits[4:]}", f"{digits[:4]}-{digits[4:]}"):
+        assert expected <= set(app.search_crm_records(df, query, limit=len(df))), query
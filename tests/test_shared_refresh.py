@@ -0,0 +1,97 @@
+"""Background refreshes of a shared dataset that holds in-app edits"""
+import pandas as pd
+
+import app
+
+
+def load_crm(df, fetched):
+    """Seed the shared CRM store with df, refreshing to a copy of fetched and counting downloads"""
+    downloads = []
+    def refresh():
+        downloads.append(1)
+        return fetched.copy()
+    app.drop_shared_dataset('crm')
+    app.get_shared_dataset('crm', lambda: df, refresh)
+    return downloads
+
+
+def sample_crm():
+    return app.sort_crm_by_date(app.create_comprehensive_sample_data(50, seed=3))
+
+
+def test_edits_the_source_never_receives_survive_refreshes(write_back):
+    df = sample_crm()
+    # The sheet gained a call since it was loaded
+    sheet = app.sort_crm_by_date(app.concat_crm_frames([df, app.create_comprehensive_sample_data(1, seed=9).assign(call_id="CALL_SHEET")]))
+    downloads = load_crm(df, sheet)
+    deleted, edited = df['call_id'].iloc[0], df['call_id'].iloc[1]
+
+    app.commit_crm_change_set({
+        'edited': {edited: {'customer_name': "Zed Tester"}},
+        'added': [{'call_id': "CALL_APP", 'customer_name': "New Caller", 'call_date': df['call_date'].iloc[-1]}],
+        'deleted': [deleted]
+    })
+    # Flushed to the local outbox, which the sheet never sees
+    assert app.flush_write_back(write_back)
+
+    for refreshes in (1, 2):
+        assert app.refresh_shared_dataset('crm')
+        assert len(downloads) == refreshes
+        current = app.peek_shared_dataset('crm').set_index('call_id')
+        assert deleted not in current.index
+        assert current.loc[edited, 'customer_name'] == "Zed Tester"
+        assert {"CALL_APP", "CALL_SHEET"} <= set(current.index)
+
+
+def test_refresh_trusts_the_source_once_it_has_the_edits(write_back, monkeypatch):
+    monkeypatch.setattr(app, "crm_write_back_reaches_source", lambda: True)
+    df = sample_crm()
+    downloads = load_crm(df, df)
+    deleted = df['call_id'].iloc[0]
+
+    app.update_crm_data(lambda d: d[d['call_id'] != deleted], deleted_ids=[deleted])
+
+    # The write is still queued: no download, the edit is kept
+    assert not app.refresh_shared_dataset('crm')
+    assert not downloads
+    assert deleted not in set(app.peek_shared_dataset('crm')['call_id'])
+
+    # Flushed: whatever the source now serves is taken as is
+    assert app.flush_write_back(write_back)
+    assert app.refresh_shared_dataset('crm')
+    assert len(downloads) == 1
+    assert len(app.peek_shared_dataset('crm')) == len(df)
+
+
+def test_forced_refresh_discards_unsaved_edits(write_back):
+    df = sample_crm()
+    downloads = load_crm(df, df)
+
+    app.update_crm_data(lambda d: d.iloc[1:], deleted_ids=[df['call_id'].iloc[0]])
+
+    assert app.refresh_shared_dataset('crm', force=True)
+    assert len(downloads) == 1
+    assert len(app.peek_shared_dataset('crm')) == len(df)
+    assert app.refresh_shared_dataset('crm')
+    assert len(app.peek_shared_dataset('crm')) == len(df)
+
+
+def test_calendar_edits_are_replayed_and_refreshes_continue():
+    events = pd.DataFrame({'id': ["a", "b"], 'title': ["Demo", "Review"]})
+    downloads = []
+    def refresh():
+        downloads.append(1)
+        return events.copy()
+    app.drop_shared_dataset('calendar')
+    app.get_shared_dataset('calendar', lambda: events, refresh)
+
+    app.save_calendar_event({'id': "c", 'title': "Onboarding"})
+    app.update_calendar_event("a", {'title': "Demo (moved)"})
+    app.delete_calendar_event("b")
+
+    for refreshes in (1, 2):
+        assert app.refresh_shared_dataset('calendar')
+        assert len(downloads) == refreshes
+        current = app.peek_shared_dataset('calendar')
+        assert dict(zip(current['id'], current['title'])) == {'a': "Demo (moved)", 'c': "Onboarding"}
+    app.drop_shared_dataset('calendar')
@@ -0,0 +1,43 @@
+"""Loading datasets into the process-wide shared store"""
+import threading
+
+import pandas as pd
+
+import app
+
+
+def test_slow_load_does_not_block_other_datasets():
+    started, release = threading.Event(), threading.Event()
+    loads = []
+    def slow_loader():
+        loads.append(1)
+        started.set()
+        release.wait(10)
+        return pd.DataFrame({'id': [1]})
+
+    for name in ('slow', 'fast'):
+        app.drop_shared_dataset(name)
+    readers = [threading.Thread(target=app.get_shared_dataset, args=('slow', slow_loader)) for _ in range(2)]
+    for reader in readers:
+        reader.start()
+    assert started.wait(5)
+
+    def other_dataset():
+        app.get_shared_dataset('fast', lambda: pd.DataFrame({'id': [1, 2]}))
+        app.update_shared_dataset('fast', lambda df: df[df['id'] > 1], lambda: None)
+    worker = threading.Thread(target=other_dataset)
+    worker.start()
+    worker.join(5)
+    try:
+        assert not worker.is_alive()
+        assert app.peek_shared_dataset('fast')['id'].tolist() == [2]
+    finally:
+        release.set()
+        for reader in readers:
+            reader.join(5)
+
+    # Both first readers shared one load
+    assert len(loads) == 1
+    assert app.peek_shared_dataset('slow')['id'].tolist() == [1]
+    for name in ('slow', 'fast'):
+        app.drop_shared_dataset(name)
@@ -0,0 +1,131 @@
+"""Delta sync of the CRM sheet against an in-process stand-in for the sheet server"""
+import hashlib
+
+import pytest
+
+import app
+
+URL = "https://sheets.example/export?format=csv"
+HEADER = "call_id,call_date,customer_name,customer_satisfaction,revenue_impact\n"
+
+
+def sheet_rows(start, stop):
+    return "".join(
+        f"CALL_{i:05d},2024-01-{i % 28 + 1:02d} 10:00:00,Customer {i},{i % 10 + 0.5},{i * 10.0}\n"
+        for i in range(start, stop)
+    )
+
+
+class FakeResponse:
+    def __init__(self, status_code, content=b"", headers=None):
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers or {}
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise RuntimeError(f"HTTP {self.status_code}")
+
+
+class FakeSheetServer:
+    """Serves one CSV body with an ETag, conditional GETs and byte ranges"""
+
+    def __init__(self, text):
+        self.body = text.encode()
+        self.requests = []
+
+    @property
+    def etag(self):
+        return '"' + hashlib.md5(self.body).hexdigest() + '"'
+
+    def get(self, url, headers=None, timeout=None):
+        headers = headers or {}
+        self.requests.append(headers)
+        if headers.get('If-None-Match') == self.etag:
+            return FakeResponse(304)
+        common = {'ETag': self.etag, 'Accept-Ranges': 'bytes'}
+        if 'Range' in headers:
+            start = int(headers['Range'][len("bytes="):-1])
+            if start >= len(self.body):
+                return FakeResponse(416)
+            return FakeResponse(206, self.body[start:], common)
+        return FakeResponse(200, self.body, common)
+
+
+@pytest.fixture
+def server():
+    return FakeSheetServer(HEADER + sheet_rows(0, 40))
+
+
+def test_unchanged_sheet_is_a_304(server):
+    state = {}
+    first = app.sync_sheet_delta(URL, state, http=server)
+    again = app.sync_sheet_delta(URL, state, http=server)
+
+    assert again is first
+    assert server.requests[-1]['If-None-Match'] == server.etag
+    assert len(first) == 40
+
+
+def test_appended_rows_are_fetched_as_a_range(server):
+    state = {}
+    app.sync_sheet_delta(URL, state, http=server)
+    length = len(server.body)
+    server.body += sheet_rows(40, 45).encode()
+
+    df = app.sync_sheet_delta(URL, state, http=server)
+
+    assert server.requests[-1]['Range'] == f"bytes={length - app.SHEET_RANGE_OVERLAP}-"
+    assert len(df) == 45
+    assert set(df['call_id']) == {f"CALL_{i:05d}" for i in range(45)}
+
+
+def test_shrunken_sheet_falls_back_to_a_full_download(server):
+    state = {}
+    app.sync_sheet_delta(URL, state, http=server)
+    server.body = (HEADER + sheet_rows(0, 3)).encode()
+
+    df = app.sync_sheet_delta(URL, state, http=server)
+
+    # The ranged request got a 416 and was retried without range or validators
+    assert 'Range' in server.requests[-2]
+    assert server.requests[-1] == {}
+    assert sorted(df['call_id']) == ["CALL_00000", "CALL_00001", "CALL_00002"]
+
+    # The next sync is back on the conditional path
+    assert app.sync_sheet_delta(URL, state, http=server) is df
+    assert server.requests[-1]['If-None-Match'] == server.etag
+
+
+def test_failed_refetch_does_not_wedge_later_syncs(server):
+    state = {}
+    app.sync_sheet_delta(URL, state, http=server)
+    server.body = (HEADER + sheet_rows(0, 3)).encode()
+    healthy_get = server.get
+    server.get = lambda url, headers=None, timeout=None: (
+        healthy_get(url, headers, timeout) if headers else FakeResponse(503)
+    )
+
+    with pytest.raises(RuntimeError):
+        app.sync_sheet_delta(URL, state, http=server)
+
+    server.get = healthy_get
+    df = app.sync_sheet_delta(URL, state, http=server)
+    assert server.requests[-1] == {}
+    assert len(df) == 3
+
+
+def test_periodic_full_resync(server):
+    state = {}
+    app.sync_sheet_delta(URL, state, http=server)
+    for i in range(app.SHEET_FULL_RESYNC_INTERVAL):
+        server.body += sheet_rows(40 + i, 41 + i).encode()
+        app.sync_sheet_delta(URL, state, http=server)
+        assert 'Range' in server.requests[-1]
+
+    server.body += sheet_rows(100, 101).encode()
+    df = app.sync_sheet_delta(URL, state, http=server)
+
+    assert 'Range' not in server.requests[-1]
+    assert state[URL]['syncs_since_full'] == 0
+    assert len(df) == 40 + app.SHEET_FULL_RESYNC_INTERVAL + 1
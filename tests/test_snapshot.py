@@ -0,0 +1,32 @@
+"""Arrow snapshots used for cold starts"""
+import logging
+import threading
+
+import pandas as pd
+
+import app
+
+SHEET_A = "https://sheets.example/a/export?format=csv"
+SHEET_B = "https://sheets.example/b/export?format=csv"
+
+
+def test_snapshot_is_only_served_for_the_sheet_it_was_built_from(tmp_path):
+    path = str(tmp_path / "crm_snapshot.arrow")
+    df = app.create_comprehensive_sample_data(20, seed=1)
+
+    assert app.write_crm_snapshot(df, path, source=SHEET_A)
+
+    restored = app.read_crm_snapshot(path, source=SHEET_A)
+    pd.testing.assert_frame_equal(restored, df.reset_index(drop=True))
+    assert app.read_crm_snapshot(path, source=SHEET_B) is None
+    # Without a source (write-ahead log frames) the file is read as is
+    assert len(app.read_crm_snapshot(path)) == 20
+
+
+def test_load_errors_off_the_script_thread_are_logged(caplog):
+    with caplog.at_level(logging.ERROR, logger=app.logger.name):
+        thread = threading.Thread(target=app.report_load_error, args=("sheet unreachable",))
+        thread.start()
+        thread.join()
+
+    assert "sheet unreachable" in caplog.text
@@ -0,0 +1,42 @@
+"""Smart Filters pushed down to SQL select the same rows as the in-memory path"""
+import numpy as np
+import pytest
+
+import app
+
+pytest.importorskip("sqlalchemy")
+
+
+@pytest.fixture(scope="module")
+def crm(tmp_path_factory):
+    url = f"sqlite:///{tmp_path_factory.mktemp('sql') / 'crm.db'}"
+    df = app.sort_crm_by_date(app.create_comprehensive_sample_data(3000, seed=7))
+    app.write_crm_sql_table(url, df)
+    return url, df
+
+
+@pytest.mark.parametrize("filters", [
+    # Slider edges that land exactly on stored float32 values
+    {'satisfaction_range': (7.0, 8.3)},
+    {'satisfaction_range': (8.3, 9.1)},
+    {'satisfaction_range': (6.5, 9.8)},
+    {'satisfaction_range': (7.7, 7.7)},
+    {'revenue_range': (0, 1000)},
+    {'satisfaction_range': (8.1, 9.3), 'categories': ['Sales', 'Support'], 'tiers': ['Premium']},
+])
+def test_sql_and_pandas_filters_select_the_same_calls(crm, filters):
+    url, df = crm
+    expected = app.apply_crm_filters(df, filters)['call_id']
+    got = app.query_crm_rows(url, filters, ('test', repr(filters)))['call_id']
+
+    assert len(expected) > 0
+    assert sorted(got) == sorted(expected)
+
+
+def test_upper_satisfaction_bound_is_inclusive(crm):
+    url, df = crm
+    at_bound = df['customer_satisfaction'] == np.float32(8.3)
+    assert at_bound.any()
+
+    got = app.query_crm_rows(url, {'satisfaction_range': (7.0, 8.3)}, ('test', 'bound'))
+    assert set(df.loc[at_bound, 'call_id']) <= set(got['call_id'])
@@ -0,0 +1,107 @@
+"""Write-ahead log and batched write-back of CRM edits"""
+import json
+import os
+
+import pandas as pd
+
+import app
+
+
+def read_outbox():
+    with open(app.CRM_OUTBOX_PATH) as outbox:
+        return [json.loads(line) for line in outbox]
+
+
+def test_writes_are_coalesced_into_one_batch(write_back):
+    app.log_crm_write({'edited': {'CALL_001': {'customer_name': "Ann"}}, 'added': [], 'deleted': []})
+    app.log_crm_write({'edited': {'CALL_001': {'call_category': "Sales"}}, 'added': [], 'deleted': []})
+    app.log_crm_write({'edited': {}, 'added': [{'call_id': 'CALL_NEW', 'customer_name': "Bo"}], 'deleted': []})
+    app.log_crm_write({'edited': {'CALL_NEW': {'customer_name': "Bea"}, 'CALL_002': {'customer_name': "Cy"}}, 'added': [], 'deleted': []})
+    app.log_crm_write({'edited': {}, 'added': [], 'deleted': ['CALL_002']})
+
+    assert app.flush_write_back(write_back)
+
+    [batch] = read_outbox()
+    assert batch['edited'] == {'CALL_001': {'customer_name': "Ann", 'call_category': "Sales"}}
+    assert batch['added'] == [{'call_id': 'CALL_NEW', 'customer_name': "Bea"}]
+    assert batch['deleted'] == ['CALL_002']
+    assert (write_back['batches'], write_back['entries']) == (1, 5)
+
+
+def test_flush_checkpoints_and_truncates_the_log(write_back):
+    df = app.create_comprehensive_sample_data(10, seed=4)
+    app.log_crm_write({'edited': {}, 'added': [], 'deleted': []}, frame=df)
+    seq = app.log_crm_write({'edited': {'CALL_001': {'customer_name': "Ann"}}, 'added': [], 'deleted': []})
+    frame_path = f"{write_back['path']}.{seq - 1}.arrow"
+    assert os.path.getsize(write_back['path']) > 0
+    assert os.path.exists(frame_path)
+
+    assert app.flush_write_back(write_back)
+
+    with open(f"{write_back['path']}.checkpoint") as checkpoint:
+        assert int(checkpoint.read()) == seq
+    assert os.path.getsize(write_back['path']) == 0
+    assert not os.path.exists(frame_path)
+    assert read_outbox()[0]['replaced'] == len(df)
+
+
+def test_unflushed_writes_are_replayed_after_a_crash(write_back):
+    app.log_crm_write({'edited': {'CALL_001': {'customer_name': "Ann"}}, 'added': [], 'deleted': []})
+    assert app.flush_write_back(write_back)
+    app.log_crm_write({'edited': {'CALL_002': {'customer_name': "Bo"}}, 'added': [], 'deleted': []})
+    last = app.log_crm_write({'edited': {}, 'added': [], 'deleted': ['CALL_003']})
+
+    # Crash before the flusher ran, in the middle of appending another write
+    write_back['log_file'].write('{"edited": {"CALL_004"')
+    write_back['log_file'].close()
+    logged = os.path.getsize(write_back['path'])
+    app.get_write_back_pipeline.clear()
+    restarted = app.get_write_back_pipeline()
+
+    assert [entry['seq'] for entry in restarted['pending']] == [last - 1, last]
+    assert restarted['seq'] == last
+    # The torn entry was never acknowledged and is cut off the log
+    assert os.path.getsize(restarted['path']) < logged
+
+    assert app.flush_write_back(restarted)
+    replayed = read_outbox()[-1]
+    assert replayed['edited'] == {'CALL_002': {'customer_name': "Bo"}}
+    assert replayed['deleted'] == ['CALL_003']
+    assert len(read_outbox()) == 2
+
+
+def crash_and_restart(pipeline):
+    """Drop a pipeline as a crash would and start a new one on its log"""
+    pipeline['log_file'].close()
+    app.get_write_back_pipeline.clear()
+    return app.get_write_back_pipeline()
+
+
+def test_frame_replacement_is_replayed_after_a_crash(write_back):
+    df = app.create_comprehensive_sample_data(12, seed=5)
+    app.log_crm_write({'edited': {}, 'added': [], 'deleted': []}, frame=df)
+
+    restarted = crash_and_restart(write_back)
+    [entry] = restarted['pending']
+    pd.testing.assert_series_equal(app.wal_frame(entry['frame'])['call_id'], df['call_id'].reset_index(drop=True))
+
+    assert app.flush_write_back(restarted)
+    assert read_outbox()[-1]['replaced'] == len(df)
+
+
+def test_frame_replacement_without_a_snapshot_is_inlined_in_the_log(write_back, monkeypatch):
+    monkeypatch.setattr(app, "write_crm_snapshot", lambda *args, **kwargs: False)
+    df = app.create_comprehensive_sample_data(12, seed=5)
+    app.log_crm_write({'edited': {}, 'added': [], 'deleted': []}, frame=df)
+    app.log_crm_write({'edited': {df['call_id'].iloc[0]: {'customer_name': "Ann"}}, 'added': [], 'deleted': []})
+
+    restarted = crash_and_restart(write_back)
+    replayed = app.wal_frame(restarted['pending'][0]['frame'])
+    assert replayed['call_id'].tolist() == df['call_id'].tolist()
+    assert replayed['customer_satisfaction'].dtype == df['customer_satisfaction'].dtype
+    assert app.hydrate_text_columns(replayed)['transcript'].tolist() == app.hydrate_text_columns(df)['transcript'].tolist()
+
+    assert app.flush_write_back(restarted)
+    batch = read_outbox()[-1]
+    assert batch['replaced'] == len(df)
+    assert batch['edited'] == {df['call_id'].iloc[0]: {'customer_name': "Ann"}}